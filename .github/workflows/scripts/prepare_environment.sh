@@ -41,3 +41,7 @@ echo "pipx installed"
 pipx install eth-brownie
 echo "eth-brownie installed"
 
+# server dependencies, brownie test also runs the server unit tests
+pipx inject eth-brownie fastapi "uvicorn[standard]" prometheus_client aiohttp
+echo "server dependencies installed"
+
@@ -45,7 +45,7 @@ contract FireOracle is Oracle {
     }
 
     function respond(uint256 requestId, bytes1 fireCategory) 
-        external
+        public
     {
         // input validation
         require(
@@ -59,4 +59,16 @@ contract FireOracle is Oracle {
         bytes memory output = abi.encode(fireCategory);
         _respond(requestId, output);
     }
+
+    function respondBatch(uint256[] calldata requestIds, bytes1[] calldata fireCategories) 
+        external
+    {
+        require(
+            requestIds.length == fireCategories.length, 
+            "ERROR:FO-001:ARRAY_LENGTH_MISMATCH");
+
+        for (uint256 i = 0; i < requestIds.length; i++) {
+            respond(requestIds[i], fireCategories[i]);
+        }
+    }
 }
\ No newline at end of file
@@ -95,6 +95,36 @@ contract FireProduct is Product {
         string memory objectName,
         uint256 objectValue
     ) external returns (bytes32 processId, uint256 requestId) {
+        return _applyForPolicy(objectName, objectValue);
+    }
+
+    function applyForPolicies(
+        string[] memory objectNames,
+        uint256[] memory objectValues
+    )
+        external
+        returns (bytes32[] memory processIds, uint256[] memory requestIds)
+    {
+        require(
+            objectNames.length == objectValues.length,
+            "ERROR:FI-012:ARRAY_LENGTH_MISMATCH"
+        );
+
+        processIds = new bytes32[](objectNames.length);
+        requestIds = new uint256[](objectNames.length);
+
+        for (uint256 i = 0; i < objectNames.length; i++) {
+            (processIds[i], requestIds[i]) = _applyForPolicy(
+                objectNames[i],
+                objectValues[i]
+            );
+        }
+    }
+
+    function _applyForPolicy(
+        string memory objectName,
+        uint256 objectValue
+    ) internal returns (bytes32 processId, uint256 requestId) {
         // Validate input parameters
         require(objectValue > 0, "ERROR:FI-010:OBJECT_VALUE_ZERO");
         require(!activePolicy[objectName], "ERROR:FI-011:ACTIVE_POLICY_EXISTS");
@@ -0,0 +1,42 @@
+// SPDX-License-Identifier: Apache-2.0
+pragma solidity ^0.8.2;
+
+import "@etherisc/gif-interface/contracts/modules/IRegistry.sol";
+
+// registers many contracts in a single transaction.
+// the registry only accepts registrations from the contract registered as
+// "InstanceOperatorService". the owner hands this name to the batcher before
+// a batch and the batcher hands it back to the owner at the end of each batch
+contract RegistryBatcher {
+
+    bytes32 public constant INSTANCE_OPERATOR_SERVICE_NAME = "InstanceOperatorService";
+
+    address public owner;
+
+    constructor() {
+        owner = msg.sender;
+    }
+
+    function registerBatch(
+        IRegistry registry, 
+        bytes32[] calldata names, 
+        address[] calldata addresses
+    ) 
+        external
+    {
+        require(msg.sender == owner, "ERROR:RB-001:NOT_OWNER");
+        require(
+            names.length == addresses.length, 
+            "ERROR:RB-002:ARRAY_LENGTH_MISMATCH");
+        require(
+            registry.getContract(INSTANCE_OPERATOR_SERVICE_NAME) == address(this), 
+            "ERROR:RB-003:BATCHER_NOT_INSTANCE_OPERATOR");
+
+        for (uint256 i = 0; i < names.length; i++) {
+            registry.register(names[i], addresses[i]);
+        }
+
+        // hand instance operator rights back to the owner
+        registry.register(INSTANCE_OPERATOR_SERVICE_NAME, owner);
+    }
+}
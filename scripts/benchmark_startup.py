@@ -0,0 +1,54 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# startup time of the api server module, with the brownie project and with an abi manifest
+# usage: python scripts/benchmark_startup.py --manifest server_manifest.json
+
+IMPORT_SERVER = 'import server.api'
+RUNS = 5
+
+def time_import(env:dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', IMPORT_SERVER],
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL)
+
+    return time.perf_counter() - start
+
+def benchmark(name:str, env:dict, runs:int) -> float:
+    samples = [time_import(env) for _ in range(runs)]
+    median = statistics.median(samples)
+
+    print('{:<16} median {:.3f}s min {:.3f}s max {:.3f}s ({} runs)'.format(
+        name,
+        median,
+        min(samples),
+        max(samples),
+        runs))
+
+    return median
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--manifest', default='server_manifest.json')
+    parser.add_argument('--runs', type=int, default=RUNS)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop('FIRE_SERVER_MANIFEST', None)
+    project = benchmark('brownie project', env, args.runs)
+
+    env['FIRE_SERVER_MANIFEST'] = args.manifest
+    manifest = benchmark('abi manifest', env, args.runs)
+
+    print('speedup {:.1f}x'.format(project / manifest))
+
+if __name__ == '__main__':
+    main()
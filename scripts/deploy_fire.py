@@ -10,6 +10,8 @@ from brownie import (
     FireRiskpool
 )
 
+from scripts.util import s2h
+
 from scripts.deploy_product import (
     all_in_1_base,
     verify_deploy_base,
@@ -21,6 +23,7 @@ from scripts.deploy_product import (
     get_riskpool_token,
     get_bundle_id,
     get_process_id,
+    get_process_ids,
     to_token_amount
 )
 
@@ -106,6 +109,50 @@ def create_policy(
     return get_process_id(tx)
 
 
+def create_policies(
+    instance, 
+    instance_operator,
+    product,
+    customer,
+    object_names,
+    object_values
+):
+    # fund customer to pay premiums of all policies
+    token = get_product_token(product)
+    sum_insured_amounts = [to_token_amount(token, object_value) for object_value in object_values]
+    premium_amount = sum([product.calculatePremium(amount) for amount in sum_insured_amounts])
+
+    fund_and_create_allowance(
+        instance,
+        instance_operator,
+        customer,
+        token,
+        premium_amount)
+
+    # create new policies in a single transaction
+    tx = product.applyForPolicies(
+        object_names,
+        sum_insured_amounts,
+        {'from': customer})
+
+    return get_process_ids(tx)
+
+
+def respond_to_requests(
+    oracle,
+    oracle_provider,
+    request_ids,
+    fire_categories
+):
+    # fire categories are provided as single characters 'S', 'M' or 'L'
+    tx = oracle.respondBatch(
+        request_ids,
+        [s2h(fire_category) for fire_category in fire_categories],
+        {'from': oracle_provider})
+
+    return tx
+
+
 def all_in_1(
     stakeholders_accounts=None,
     registry_address=None,
@@ -16,7 +16,13 @@ from scripts.util import (
     get_package
 )
 
-from os.path import exists
+from scripts.deployment_manifest import (
+    build_deployment_manifest,
+    write_deployment_manifest,
+    load_deployment_manifest,
+    load_addresses,
+    validate_deployment_manifest,
+)
 
 # allowance for claim payouts or staking withdrawals
 RISKPOOL_WALLET_ALLOWANCE = 10 ** 32
@@ -117,6 +123,9 @@ def verify_deploy_base(
 
     instanceService = instance.getInstanceService()
     verify_element('Registry', instanceService.getRegistry(), registry_address)
+
+    if instance.manifest is not None:
+        verify_element('DeploymentManifestMismatches', validate_deployment_manifest(instance.manifest, instance.getRegistry()), [])
     verify_element('InstanceOperator', instanceService.getInstanceOperator(), instanceOperator)
     verify_element('InstanceWallet', instanceService.getInstanceWallet(), instanceWallet)
 
@@ -402,7 +411,8 @@ def all_in_1_base(
             instanceOperator=a[INSTANCE_OPERATOR], 
             instanceWallet=a[INSTANCE_WALLET],
             registryAddress=registry_address or get_address('registry'),
-            publish_source=publish_source)
+            publish_source=publish_source,
+            manifest=load_deployment_manifest())
 
     print('====== token setup ======')
     print('- token {} {}'.format(token.symbol(), token))
@@ -473,6 +483,14 @@ def all_in_1_base(
         product,
         customer)
 
+    write_deployment_manifest(
+        build_deployment_manifest(
+            instance,
+            token=token,
+            product=product,
+            oracle=oracle,
+            riskpool=riskpool))
+
     return (
         deployment[CUSTOMER1],
         deployment[CUSTOMER2],
@@ -520,15 +538,22 @@ def get_process_id(tx):
     return tx.events['LogMetadataCreated']['processId']
 
 
+def get_process_ids(tx):
+    return [event['processId'] for event in tx.events['LogMetadataCreated']]
+
+
 def get_address(name):
-    if not exists('gif_instance_address.txt'):
-        return None
-    with open('gif_instance_address.txt') as file:
-        for line in file:
-            if line.startswith(name):
-                t = line.split('=')[1].strip()
-                print('found {} in gif_instance_address.txt: {}'.format(name, t))
-                return t
+    addresses = load_addresses()
+    if name in addresses:
+        print('found {} in deployment: {}'.format(name, addresses[name]))
+        return addresses[name]
+
+    # legacy address files may use longer names
+    for (key, address) in addresses.items():
+        if key.startswith(name):
+            print('found {} in deployment: {}'.format(name, address))
+            return address
+
     return None
 
 
@@ -668,7 +693,9 @@ def from_registry_base(
     oracle_id=0,
     riskpool_id=0
 ):
-    instance = GifInstance(registryAddress=registryAddress)
+    instance = GifInstance(
+        registryAddress=registryAddress,
+        manifest=load_deployment_manifest())
     instance_service = instance.getInstanceService()
 
     products = instance_service.products()
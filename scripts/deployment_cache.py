@@ -0,0 +1,71 @@
+import os
+import time
+
+from brownie import chain
+
+# set to 0 to redeploy the cached objects for every test module
+DEPLOYMENT_CACHE_ENV = 'GIF_DEPLOYMENT_CACHE'
+
+
+class DeploymentCache(object):
+
+    # deploys objects (gif instance, tokens, products) only once per session.
+    # a chain snapshot is taken right after each new deployment and test modules
+    # revert to it instead of resetting the chain (see revert), so later modules
+    # start from a chain that already contains all cached deployments
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.getenv(DEPLOYMENT_CACHE_ENV, '1') not in ['0', 'false']
+
+        self.enabled = enabled
+        self.objects = {}
+        self.deployTime = {}
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, key, deploy):
+        if self.enabled and key in self.objects:
+            self.hits[key] = self.hits.get(key, 0) + 1
+            return self.objects[key]
+
+        start = time.perf_counter()
+        obj = deploy()
+        duration = time.perf_counter() - start
+
+        self.misses[key] = self.misses.get(key, 0) + 1
+        self.deployTime[key] = self.deployTime.get(key, 0) + duration
+
+        if self.enabled:
+            self.objects[key] = obj
+            chain.snapshot()
+
+        return obj
+
+    def revert(self):
+        # brownie's fn_isolation replaces the snapshot with one taken after the module
+        # scoped fixtures. as long as these only use cached deployments both snapshots
+        # hold the same chain state
+        if self.enabled and len(self.objects) > 0:
+            chain.revert()
+        else:
+            chain.reset()
+
+    def savedTime(self) -> float:
+        return sum([
+            self.hits.get(key, 0) * self.deployTime[key] / self.misses[key]
+            for key in self.deployTime])
+
+    def report(self) -> list:
+        if not self.deployTime:
+            return []
+
+        lines = ['deployment cache {}'.format('enabled' if self.enabled else 'disabled')]
+        for key in self.deployTime:
+            lines.append('{}: {} deployments {:.2f}s, {} cache hits'.format(
+                key,
+                self.misses[key],
+                self.deployTime[key],
+                self.hits.get(key, 0)))
+
+        lines.append('time saved {:.2f}s'.format(self.savedTime()))
+        return lines
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+
+from brownie import network
+
+from scripts.registry import RegistryResolver
+from scripts.util import b2s
+
+# deployment manifest written by all_in_1_base
+DEPLOYMENT_MANIFEST_VERSION = 1
+DEPLOYMENT_MANIFEST_FILE = 'gif_instance_deployment.json'
+
+# legacy name=address file, still read when no manifest is available
+ADDRESS_FILE = 'gif_instance_address.txt'
+
+# manifests and address files already read, keyed by path
+# entries hold (mtime, content, manifest check per chain id)
+_cache = {}
+
+
+def abi_hash(abi) -> str:
+    return hashlib.sha256(json.dumps(abi, sort_keys=True).encode()).hexdigest()
+
+
+def build_deployment_manifest(
+    instance,
+    token=None,
+    product=None,
+    oracle=None,
+    riskpool=None
+) -> dict:
+    registry = instance.getRegistry()
+    contracts = {}
+
+    # all contracts registered in the instance
+    names = [b2s(registry.contractName(idx)) for idx in range(registry.contracts())]
+    for (name, address) in RegistryResolver(registry.address).resolve(names).items():
+        contracts[name] = _entry(address, _gif_contract_class(instance.gif, name))
+
+    # tokens and components of the sandbox
+    contracts['registry'] = _entry(registry.address, instance.gif.RegistryController)
+    for (name, contract) in [('token', token), ('product', product), ('oracle', oracle), ('riskpool', riskpool)]:
+        if contract is not None:
+            contracts[name] = _entry(contract.address, contract, _deployment_block(contract))
+
+    return {
+        'version': DEPLOYMENT_MANIFEST_VERSION,
+        'chain_id': network.web3.eth.chain_id,
+        'registry': registry.address,
+        'instance_operator': str(instance.getOwner()),
+        'contracts': contracts,
+    }
+
+
+def write_deployment_manifest(manifest:dict, path:str = DEPLOYMENT_MANIFEST_FILE) -> dict:
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print('wrote {} contract addresses to {}'.format(len(manifest['contracts']), path))
+    return manifest
+
+
+def load_deployment_manifest(path:str = DEPLOYMENT_MANIFEST_FILE, check:bool = True) -> dict:
+    # manifests of another chain (e.g. before a ganache restart) are ignored
+    if not os.path.exists(path):
+        return None
+
+    manifest = _load(path, _read_manifest)
+
+    if check and _check(path, manifest) is not None:
+        return None
+
+    return manifest
+
+
+def check_deployment_manifest(manifest:dict) -> str:
+    # returns why the manifest does not match the connected chain, None when it matches
+    chain_id = network.web3.eth.chain_id
+    if manifest.get('chain_id') != chain_id:
+        return 'chain id {} differs from connected chain {}'.format(manifest.get('chain_id'), chain_id)
+
+    if len(network.web3.eth.get_code(manifest['registry'])) == 0:
+        return 'no registry contract at {}'.format(manifest['registry'])
+
+    # the instance operator service is registered last when deploying an instance
+    name = 'InstanceOperatorService'
+    if name in manifest['contracts']:
+        address = RegistryResolver(manifest['registry']).resolve([name])[name]
+        if address != manifest['contracts'][name]['address']:
+            return '{} {} differs from registry {}'.format(name, manifest['contracts'][name]['address'], address)
+
+    return None
+
+
+def load_addresses(path:str = DEPLOYMENT_MANIFEST_FILE, address_file:str = ADDRESS_FILE) -> dict:
+    # flat name -> address map, taken from the manifest or the legacy address file
+    manifest = load_deployment_manifest(path)
+    if manifest is not None:
+        return {name: contract['address'] for name, contract in manifest['contracts'].items()}
+
+    if os.path.exists(address_file):
+        return _load(address_file, _read_address_file)
+
+    return {}
+
+
+def validate_deployment_manifest(manifest:dict, registry, names=None) -> list:
+    # compares manifest addresses against the registry, returns the names that differ
+    # sandbox entries (token, product, ...) are not registered
+    names = [name for name in names or manifest['contracts'] if not name[0].islower()]
+    addresses = RegistryResolver(registry.address).resolve(names)
+    mismatches = []
+
+    for name in names:
+        address = addresses[name]
+        if address != manifest['contracts'][name]['address']:
+            print('manifest mismatch for {}: manifest {} registry {}'.format(
+                name,
+                manifest['contracts'][name]['address'],
+                address))
+
+            mismatches.append(name)
+
+    return mismatches
+
+
+def _entry(address:str, contract_class, block:int = None) -> dict:
+    entry = {
+        'address': str(address),
+        'abi_hash': abi_hash(contract_class.abi) if contract_class is not None else None,
+    }
+
+    # first block with events of the contract, the fire server starts its log backfill there
+    if block is not None:
+        entry['block'] = block
+
+    return entry
+
+
+def _deployment_block(contract) -> int:
+    # only known for contracts deployed in this session, not for contracts loaded from an address
+    tx = getattr(contract, 'tx', None)
+    return tx.block_number if tx is not None else None
+
+
+def _gif_contract_class(gif, name:str):
+    from scripts.instance import GIF_CONTROLLERS
+
+    if name == 'Registry':
+        return gif.RegistryController
+
+    # module proxies are used via their controller abi
+    if name in GIF_CONTROLLERS:
+        return getattr(gif, GIF_CONTROLLERS[name])
+
+    for (moduleName, controllerName) in GIF_CONTROLLERS.items():
+        if name == '{}Controller'.format(moduleName)[:32]:
+            return getattr(gif, controllerName)
+
+    return getattr(gif, name, None)
+
+
+def _load(path:str, reader):
+    # rereads the file only when it has been modified
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, reader(path), {})
+        _cache[path] = cached
+
+    return cached[1]
+
+
+def _check(path:str, manifest:dict) -> str:
+    # checks the manifest once per file version and chain, brownie caches the chain id
+    checks = _cache[path][2]
+    chain_id = network.chain.id
+
+    if chain_id not in checks:
+        checks[chain_id] = check_deployment_manifest(manifest)
+        if checks[chain_id] is not None:
+            print('ignoring deployment manifest {}: {}'.format(path, checks[chain_id]))
+
+    return checks[chain_id]
+
+
+def _read_manifest(path:str) -> dict:
+    with open(path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('version') != DEPLOYMENT_MANIFEST_VERSION:
+        raise ValueError('unsupported deployment manifest version {} in {}'.format(manifest.get('version'), path))
+
+    return manifest
+
+
+def _read_address_file(path:str) -> dict:
+    addresses = {}
+
+    with open(path) as f:
+        for line in f:
+            if '=' in line:
+                (name, address) = line.split('=', 1)
+                addresses.setdefault(name.strip(), address.strip())
+
+    return addresses
@@ -1,6 +1,8 @@
 import json
 import os
+import rlp
 
+from eth_utils import keccak, to_checksum_address
 from web3 import Web3
 
 from brownie.convert import to_bytes
@@ -11,13 +13,16 @@ from brownie import (
     Wei,
     Contract, 
     network,
-    interface
+    interface,
+    RegistryBatcher
 )
 
 from scripts.const import (
     GIF_RELEASE,
 )
 
+from scripts.registry import get_resolver
+
 from scripts.util import (
     encode_function_data,
     get_account,
@@ -33,11 +38,18 @@ class GifRegistry(object):
         self, 
         instanceOperator: Account, 
         registryAddress: Account,
-        publish_source=False
+        publish_source=False,
+        manifest=None
     ):
         gif = get_package('gif-contracts')
 
-        if instanceOperator is not None and registryAddress is None:
+        # deployment manifests of other registries are ignored
+        if manifest is not None and (registryAddress is None or manifest['registry'].lower() != str(registryAddress).lower()):
+            manifest = None
+
+        deployed = instanceOperator is not None and registryAddress is None
+
+        if deployed:
             controller = gif.RegistryController.deploy(
                 {'from': instanceOperator},
                 publish_source=publish_source)
@@ -58,9 +70,16 @@ class GifRegistry(object):
 
             registryAddress = proxy.address
 
+            # addresses cached for an earlier deployment to the same address are stale
+            get_resolver(registryAddress).clear()
+
         elif registryAddress is not None:
-            registry = contract_from_address(gif.RegistryController, registryAddress)
-            instanceOperatorServiceAddress = registry.getContract(s2b('InstanceOperatorService'))
+            # the instance operator is always read from the chain, the manifest only saves the registry lookup
+            if manifest is not None and 'InstanceOperatorService' in manifest['contracts']:
+                instanceOperatorServiceAddress = manifest['contracts']['InstanceOperatorService']['address']
+            else:
+                instanceOperatorServiceAddress = get_resolver(registryAddress).getAddress('InstanceOperatorService')
+
             instanceOperatorService = contract_from_address(gif.InstanceOperatorService, instanceOperatorServiceAddress)
             
             instanceOperator = instanceOperatorService.owner()
@@ -70,12 +89,26 @@ class GifRegistry(object):
             return
 
         self.gif = gif
+        self.manifest = manifest
         self.instanceOperator = instanceOperator
         self.registry = contract_from_address(interface.IRegistry, registryAddress)
 
         print('owner {}'.format(instanceOperator))
         print('registry.address {}'.format(self.registry.address))
-        print('registry.getContract(\'InstanceOperatorService\') {}'.format(self.registry.getContract(s2b('InstanceOperatorService'))))
+
+        # the instance operator service of a fresh registry is still changing, skip the address cache
+        if deployed:
+            print('registry.getContract(\'InstanceOperatorService\') {}'.format(self.registry.getContract(s2b('InstanceOperatorService'))))
+        else:
+            print('registry.getContract(\'InstanceOperatorService\') {}'.format(self.getAddress('InstanceOperatorService')))
+
+    def getAddress(self, name:str) -> str:
+        # taken from the deployment manifest when available, from the registry otherwise
+        if self.manifest is not None and name in self.manifest['contracts']:
+            return self.manifest['contracts'][name]['address']
+
+        # all names needed by the sandbox are resolved in one batch and cached per registry
+        return get_resolver(self.registry.address).getAddress(name)
 
     def getOwner(self) -> Account:
         return self.instanceOperator
@@ -91,16 +124,24 @@ class GifInstance(GifRegistry):
         instanceOperator:Account=None, 
         instanceWallet:Account=None, 
         registryAddress:Account=None,
-        publish_source=False
+        publish_source=False,
+        pipelined=True,
+        batch_registrations=True,
+        manifest=None
     ):
         super().__init__(
             instanceOperator,
             registryAddress,
-            publish_source
+            publish_source,
+            manifest
         )
         
         if registryAddress is None:
-            self.deployWithRegistry(publish_source)
+            # source publishing needs to wait for each deployment
+            if pipelined and not publish_source:
+                self.deployWithRegistryPipelined(batch_registrations)
+            else:
+                self.deployWithRegistry(publish_source)
 
             self.instanceOperatorService.setInstanceWallet(
                 instanceWallet,
@@ -118,20 +159,20 @@ class GifInstance(GifRegistry):
         # minimal set of contracts
         self.instanceService = contract_from_address(
             gif.InstanceService,
-            registry.getContract(s2b('InstanceService')))
+            self.getAddress('InstanceService'))
         
         self.componentOwnerService = contract_from_address(
             gif.ComponentOwnerService,
-            registry.getContract(s2b('ComponentOwnerService')))
+            self.getAddress('ComponentOwnerService'))
 
         self.instanceOperatorService = contract_from_address(
             gif.InstanceOperatorService,
-            registry.getContract(s2b('InstanceOperatorService')))
+            self.getAddress('InstanceOperatorService'))
         
         # other contracts needed
         self.treasury = contract_from_address(
             gif.TreasuryModule,
-            registry.getContract(s2b('Treasury')))
+            self.getAddress('Treasury'))
 
 
     def deployWithRegistry(self, publish_source=False):
@@ -176,6 +217,74 @@ class GifInstance(GifRegistry):
         # ensure that the instance has 32 contracts when freshly deployed
         assert 32 == registry.contracts()
 
+    def deployWithRegistryPipelined(self, batch_registrations=True):
+        gif = self.gif
+        registry = self.getRegistry()
+        instanceOperator = self.getOwner()
+        deployer = PipelinedDeployer(instanceOperator)
+
+        # registrations of each round are sent in a single batcher transaction
+        if batch_registrations:
+            deployer.batcher = contract_from_address(
+                RegistryBatcher,
+                deployer.deploy(RegistryBatcher))
+
+        # tokens, module controllers and non proxy services do not depend on the registry content
+        bundleToken = deployer.deploy(gif.BundleToken)
+        deployer.register(registry, s2b('BundleToken'), bundleToken)
+        riskpoolToken = deployer.deploy(gif.RiskpoolToken)
+        deployer.register(registry, s2b('RiskpoolToken'), riskpoolToken)
+
+        controllers = {}
+        for (moduleName, controllerName, _) in GIF_MODULES:
+            controllers[moduleName] = deployer.deploy(getattr(gif, controllerName))
+            deployer.register(registry, s2b('{}Controller'.format(moduleName)[:32]), controllers[moduleName])
+
+        policyFlow = deployer.deploy(gif.PolicyDefaultFlow, registry.address)
+        productService = deployer.deploy(gif.ProductService, registry.address)
+        deployer.wait()
+
+        # module proxies level by level, the proxy initializers read their dependencies from the registry
+        proxies = {}
+        for (idx, level) in enumerate(gifModuleLevels(GIF_MODULES)):
+            print('modules {} deploy and register proxies'.format(level))
+
+            if idx == 0:
+                for (serviceClass, serviceAddress) in [(gif.PolicyDefaultFlow, policyFlow), (gif.ProductService, productService)]:
+                    service = contract_from_address(serviceClass, serviceAddress)
+                    deployer.register(registry, service.NAME.call(), serviceAddress)
+
+            for moduleName in level:
+                controllerClass = getattr(gif, GIF_CONTROLLERS[moduleName])
+                controller = contract_from_address(controllerClass, controllers[moduleName])
+                encoded_initializer = encode_function_data(
+                    registry.address,
+                    initializer=controller.initialize)
+
+                proxies[moduleName] = deployer.deploy(gif.CoreProxy, controller.address, encoded_initializer)
+                deployer.register(registry, s2b(moduleName), proxies[moduleName])
+
+            deployer.wait()
+
+        self.bundleToken = contract_from_address(gif.BundleToken, bundleToken)
+        self.riskpoolToken = contract_from_address(gif.RiskpoolToken, riskpoolToken)
+        self.policyFlow = contract_from_address(gif.PolicyDefaultFlow, policyFlow)
+        self.productService = contract_from_address(gif.ProductService, productService)
+
+        for (moduleName, controllerName, _) in GIF_MODULES:
+            setattr(
+                self,
+                GIF_ATTRIBUTES[moduleName],
+                contract_from_address(getattr(gif, controllerName), proxies[moduleName]))
+
+        print('instance deployed with {} transactions in {} rounds ({} registrations batched)'.format(
+            deployer.transactions,
+            deployer.rounds,
+            deployer.batched))
+
+        # ensure that the instance has 32 contracts when freshly deployed
+        assert 32 == registry.contracts()
+
     def getTreasury(self) -> interface.ITreasury:
         return self.treasury
 
@@ -198,6 +307,203 @@ class GifInstance(GifRegistry):
         return self.oracleService
 
 
+# upgradable gif modules and services with the registry names their initializers read,
+# every module reads the access controller from the registry when initialized
+GIF_MODULES = [
+    ('Access', 'AccessController', []),
+    ('Component', 'ComponentController', ['Access']),
+    ('Query', 'QueryModule', ['Access', 'Component']),
+    ('License', 'LicenseController', ['Access', 'Component']),
+    ('Policy', 'PolicyController', ['Access', 'Component']),
+    ('Bundle', 'BundleController', ['Access', 'Policy']),
+    ('Pool', 'PoolController', ['Access', 'Component', 'Policy', 'Bundle']),
+    ('Treasury', 'TreasuryModule', ['Access', 'Bundle', 'Component', 'Policy', 'Pool']),
+    ('InstanceService', 'InstanceService', ['Access', 'Bundle', 'Component', 'Policy', 'Pool', 'Treasury']),
+    ('ComponentOwnerService', 'ComponentOwnerService', ['Access', 'Component']),
+    ('OracleService', 'OracleService', ['Access', 'Component', 'Query']),
+    ('RiskpoolService', 'RiskpoolService', ['Access', 'Bundle', 'Component', 'Pool', 'Treasury']),
+    # rewires the instance operator service address, needs to be initialized last
+    ('InstanceOperatorService', 'InstanceOperatorService', [
+        'Access', 'Component', 'Query', 'License', 'Policy', 'Bundle', 'Pool', 'Treasury',
+        'InstanceService', 'ComponentOwnerService', 'OracleService', 'RiskpoolService']),
+]
+
+GIF_CONTROLLERS = {moduleName: controllerName for (moduleName, controllerName, _) in GIF_MODULES}
+
+# gif instance attribute per module
+GIF_ATTRIBUTES = {
+    'Access': 'access',
+    'Component': 'component',
+    'Query': 'query',
+    'License': 'license',
+    'Policy': 'policy',
+    'Bundle': 'bundle',
+    'Pool': 'pool',
+    'Treasury': 'treasury',
+    'InstanceService': 'instanceService',
+    'ComponentOwnerService': 'componentOwnerService',
+    'OracleService': 'oracleService',
+    'RiskpoolService': 'riskpoolService',
+    'InstanceOperatorService': 'instanceOperatorService',
+}
+
+
+def gifModuleLevels(modules) -> list:
+    # groups modules into levels that only depend on modules of earlier levels
+    dependencies = {moduleName: set(moduleDependencies) for (moduleName, _, moduleDependencies) in modules}
+    levels = []
+    done = set()
+
+    while len(done) < len(dependencies):
+        level = [
+            moduleName for (moduleName, _, _) in modules
+            if moduleName not in done and dependencies[moduleName] <= done]
+
+        assert len(level) > 0, 'cyclic or unknown module dependencies: {}'.format(
+            {name: deps - done for name, deps in dependencies.items() if name not in done})
+
+        levels.append(level)
+        done.update(level)
+
+    return levels
+
+
+def contractAddress(sender:str, nonce:int) -> str:
+    # address of a contract created by sender with the given nonce
+    return to_checksum_address(keccak(rlp.encode([bytes.fromhex(sender[2:]), nonce]))[12:])
+
+
+# registry names that may not be registered via the batcher
+# (the batcher hands the instance operator service name back to its owner)
+BATCHER_EXCLUDED_NAMES = [s2b('InstanceOperatorService')]
+
+# gas limits for batcher transactions, gas can not be estimated before the handover is mined.
+# failed batches are retried with an estimate once the handover is mined
+BATCHER_BASE_GAS = 100000
+BATCHER_REGISTER_GAS = 150000
+
+
+class PipelinedDeployer(object):
+
+    # sends transactions back to back with explicit nonces and waits only
+    # for receipts when later transactions depend on their effects
+    def __init__(self, owner:Account, batcher:RegistryBatcher=None):
+        self.owner = owner
+        self.batcher = batcher
+        self.nonce = network.web3.eth.get_transaction_count(owner.address, 'pending')
+        self.pending = []
+        self.registrations = []
+        self.batches = []
+        self.transactions = 0
+        self.rounds = 0
+        self.batched = 0
+
+    def deploy(self, contractClass, *args) -> str:
+        address = contractAddress(self.owner.address, self.nonce)
+        self.pending.append(contractClass.deploy(*args, self._txParams()))
+        return address
+
+    def register(self, registry, name, address:str):
+        if self.batcher and name not in BATCHER_EXCLUDED_NAMES:
+            self.registrations.append((registry, name, address))
+            return
+
+        # keep the registration order when mixing batched and direct registrations
+        self.flush()
+        self.pending.append(registry.register(name, address, self._txParams()))
+
+    def flush(self):
+        registrations = self.registrations
+        self.registrations = []
+
+        # handover and batch only pay off for more than two registrations
+        if len(registrations) <= 2:
+            for (registry, name, address) in registrations:
+                self.pending.append(registry.register(name, address, self._txParams()))
+
+            return
+
+        registry = registrations[0][0]
+        assert all([r[0].address == registry.address for r in registrations]), 'batch spans multiple registries'
+
+        names = [name for (_, name, _) in registrations]
+        addresses = [address for (_, _, address) in registrations]
+
+        self.pending.append(registry.register(
+            s2b('InstanceOperatorService'),
+            self.batcher.address,
+            self._txParams()))
+
+        params = self._txParams()
+        params['gas_limit'] = BATCHER_BASE_GAS + BATCHER_REGISTER_GAS * len(registrations)
+        tx = self.batcher.registerBatch(registry.address, names, addresses, params)
+        self.pending.append(tx)
+        self.batches.append((tx, registry, names, addresses))
+        self.batched += len(registrations)
+
+    def wait(self):
+        self.flush()
+
+        for tx in self.pending:
+            tx.wait(1)
+
+        # a failed batch leaves the instance operator service name with the batcher
+        batches = self.batches
+        self.batches = []
+
+        for (tx, registry, names, addresses) in batches:
+            if tx.status != 1:
+                self.pending[self.pending.index(tx)] = self._retryBatch(registry, names, addresses, tx)
+
+        for tx in self.pending:
+            assert tx.status == 1, 'tx {} failed: {}'.format(tx.txid, tx.revert_msg)
+
+        self.transactions += len(self.pending)
+        self.rounds += 1
+        self.pending = []
+
+    def _retryBatch(self, registry, names, addresses, failed):
+        # the handover is mined now, so the gas of the batch can be estimated
+        try:
+            gas = self.batcher.registerBatch.estimate_gas(registry.address, names, addresses, {'from': self.owner})
+        except Exception as e:
+            self._restoreInstanceOperator(registry)
+            raise ValueError('registry batch tx {} failed: {} ({})'.format(failed.txid, failed.revert_msg, e))
+
+        print('registry batch tx {} failed ({}), retrying with gas limit {}'.format(
+            failed.txid,
+            failed.revert_msg,
+            gas))
+
+        params = self._txParams()
+        params['gas_limit'] = gas
+        tx = self.batcher.registerBatch(registry.address, names, addresses, params)
+        tx.wait(1)
+
+        if tx.status != 1:
+            self._restoreInstanceOperator(registry)
+
+        return tx
+
+    def _restoreInstanceOperator(self, registry):
+        # an empty batch only hands the instance operator service name back to the owner
+        if registry.getContract(s2b('InstanceOperatorService')) != self.batcher.address:
+            return
+
+        tx = self.batcher.registerBatch(registry.address, [], [], self._txParams())
+        tx.wait(1)
+
+    def _txParams(self) -> dict:
+        params = {
+            'from': self.owner,
+            'nonce': self.nonce,
+            'required_confs': 0,
+        }
+
+        self.nonce += 1
+        return params
+
+
 # generic upgradable gif module deployment
 def deployGifModule(
     controllerClass, 
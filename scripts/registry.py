@@ -0,0 +1,97 @@
+from eth_utils import keccak, to_checksum_address
+
+from brownie import network
+
+from scripts.rpc import JsonRpcBatch
+from scripts.util import s2b
+
+# registry names resolved together on the first lookup
+SANDBOX_NAMES = [
+    'Registry',
+    'BundleToken',
+    'RiskpoolToken',
+    'Access',
+    'Component',
+    'Query',
+    'License',
+    'Policy',
+    'Bundle',
+    'Pool',
+    'Treasury',
+    'PolicyDefaultFlow',
+    'ProductService',
+    'InstanceService',
+    'ComponentOwnerService',
+    'OracleService',
+    'RiskpoolService',
+    'InstanceOperatorService',
+]
+
+GET_CONTRACT_SELECTOR = '0x' + keccak(text='getContract(bytes32)')[:4].hex()
+
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+
+# resolvers with their cached addresses, keyed by network and registry address
+_resolvers = {}
+
+
+class RegistryResolver(object):
+
+    # resolves registry names with a single batched rpc request and caches the addresses
+    def __init__(self, registryAddress:str, rpc=None):
+        self.registryAddress = to_checksum_address(str(registryAddress))
+        self.rpc = rpc
+        self.addresses = {}
+        self.requests = 0
+
+    def getAddress(self, name:str) -> str:
+        if name in self.addresses:
+            return self.addresses[name]
+
+        return self.resolve([name] + SANDBOX_NAMES)[name]
+
+    def resolve(self, names:list = SANDBOX_NAMES) -> dict:
+        missing = [name for name in dict.fromkeys(names) if name not in self.addresses]
+        resolved = {}
+
+        if missing:
+            results = self._getRpc().call([self._getContractCall(name) for name in missing])
+            self.requests += 1
+
+            for (name, result) in zip(missing, results):
+                resolved[name] = to_checksum_address('0x' + result[-40:])
+
+                # names not (yet) registered are looked up again next time
+                if resolved[name] != ZERO_ADDRESS:
+                    self.addresses[name] = resolved[name]
+
+        return {name: self.addresses.get(name, resolved.get(name)) for name in names}
+
+    def clear(self):
+        self.addresses = {}
+
+    def _getRpc(self):
+        if self.rpc is not None:
+            return self.rpc
+
+        # batches via the current web3 provider
+        return JsonRpcBatch()
+
+    def _getContractCall(self, name:str) -> dict:
+        return {
+            'method': 'eth_call',
+            'params': [
+                {'to': self.registryAddress, 'data': GET_CONTRACT_SELECTOR + s2b(name)[2:]},
+                'latest'],
+        }
+
+
+def get_resolver(registryAddress:str, rpc=None) -> RegistryResolver:
+    key = (network.show_active(), str(registryAddress).lower())
+
+    if key not in _resolvers:
+        _resolvers[key] = RegistryResolver(registryAddress, rpc)
+    elif rpc is not None:
+        _resolvers[key].rpc = rpc
+
+    return _resolvers[key]
@@ -0,0 +1,82 @@
+import logging
+
+from time import perf_counter
+from typing import Dict, List
+
+import requests
+
+from brownie.network.web3 import web3
+
+class JsonRpcBatch(object):
+
+    TIMEOUT = 30
+
+    # sends a list of json rpc calls in a single http request
+    # only depends on brownie, the server subclass adds rpc metrics
+    def __init__(self, provider=None):
+        self._provider = provider or web3.provider
+        self._endpoint = getattr(self._provider, 'endpoint_uri', None)
+        self._session = requests.Session()
+
+    @property
+    def batched(self) -> bool:
+        return self._endpoint is not None and str(self._endpoint).startswith('http')
+
+    def call(self, calls:List[Dict]) -> List:
+        if len(calls) == 0:
+            return []
+
+        payloads = _payloads(calls)
+        start = perf_counter()
+
+        # fall back to one round trip per request for non http providers
+        if not self.batched:
+            results = [
+                _result(self._provider.make_request(payload['method'], payload['params']))
+                for payload in payloads]
+
+            self._observe(payloads, perf_counter() - start)
+            return results
+
+        response = self._session.post(
+            self._endpoint,
+            json=payloads,
+            timeout=JsonRpcBatch.TIMEOUT)
+
+        response.raise_for_status()
+        self._observe(payloads, perf_counter() - start)
+
+        logging.debug('rpc batch with {} requests'.format(len(payloads)))
+        return _results(response.json())
+
+    def _observe(self, payloads:List[Dict], duration:float):
+        pass
+
+
+def _payloads(calls:List[Dict]) -> List[Dict]:
+    return [
+        {
+            'jsonrpc': '2.0',
+            'id': idx,
+            'method': call['method'],
+            'params': call['params'],
+        }
+        for idx, call in enumerate(calls)]
+
+
+def _results(responses:List[Dict]) -> List:
+    # nodes answer a rejected batch with a single error object without id
+    errors = [responses] if not isinstance(responses, list) else [r for r in responses if r.get('id') is None]
+    for response in errors:
+        _result(response)
+        raise ValueError('unexpected rpc batch response {}'.format(response))
+
+    return [_result(r) for r in sorted(responses, key=lambda r: r['id'])]
+
+
+def _result(response:Dict):
+    if 'error' in response:
+        error = response['error']
+        raise ValueError(error.get('message', str(error)))
+
+    return response['result']
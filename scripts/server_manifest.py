@@ -0,0 +1,22 @@
+import json
+import os
+
+from server import MANIFEST_ENV
+from server.artifacts import buildManifest
+
+# manifest format read by server/artifacts.py
+MANIFEST_FILE = 'server_manifest.json'
+
+def write_manifest(path:str = MANIFEST_FILE) -> dict:
+    # abis are taken from the brownie project, never from a previously written manifest
+    os.environ.pop(MANIFEST_ENV, None)
+    manifest = buildManifest()
+
+    with open(path, 'w') as f:
+        json.dump(manifest, f)
+
+    print('wrote abis of {} contracts to {}'.format(len(manifest['contracts']), path))
+    return manifest
+
+def main():
+    write_manifest()
@@ -1,13 +1,33 @@
 import logging
+import os
 
-# setup to allow importing smart contract classes
-from brownie import project
-p = project.load('.', name='Project')
-p.load_config()
+from time import perf_counter
 
-# connect to ganache network
-from brownie import network
-if not network.is_connected():
-    network.connect('ganache')
+# prebuilt abi manifest, when set the brownie project is not loaded at import
+MANIFEST_ENV = 'FIRE_SERVER_MANIFEST'
+NETWORK_ENV = 'FIRE_SERVER_NETWORK'
+NETWORK = 'ganache'
+
+_started = perf_counter()
+
+def connect():
+    from brownie import network
+    if not network.is_connected():
+        network.connect(os.environ.get(NETWORK_ENV, NETWORK))
+
+if os.environ.get(MANIFEST_ENV) is None:
+    # setup to allow importing smart contract classes
+    from brownie import project
+
+    # reuse the project already loaded by brownie (e.g. brownie test)
+    if not project.get_loaded_projects():
+        p = project.load('.', name='Project')
+        p.load_config()
+
+    # connect to ganache network
+    connect()
 
 logging.getLogger().setLevel(logging.INFO)
+logging.info('server package initialized in {:.3f}s ({})'.format(
+    perf_counter() - _started,
+    'manifest {}'.format(os.environ[MANIFEST_ENV]) if os.environ.get(MANIFEST_ENV) else 'brownie project'))
@@ -1,75 +1,287 @@
+import asyncio
+import json
 import logging
-from typing import List
+from typing import AsyncIterator, List, Union
 
-from fastapi import FastAPI, Response, status, HTTPException
+from time import perf_counter
+
+from fastapi import FastAPI, Header, Request as HttpRequest, Response, status, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.routing import Match
+
+from server.async_node import AsyncNode
 
 from server.category import FireCategory
 from server.config import Config, PostConfig
-from server.policy import Policy
-from server.request import Request
+from server.engine import WatcherStatus
+from server.job import Job, JobRegistry
+from server.metrics import ROUTE, ROUTE_SECONDS
+from server.trace import TRACE, Trace, finishAfterBody
+from server.policy import Policy, PolicyApplication, PolicyApplicationResult, PolicyPage, PolicyState
+from server.request import OracleResponse, OracleResponseResult, Request
+from server.request_store import RequestStoreStatus
+from server.responder import ResponderStatus
+from server.stream import fromCursor
 from server.node import Node
 
 app = FastAPI()
 node = Node()
+async_node = AsyncNode(node)
+jobs = JobRegistry()
+
+@app.on_event('shutdown')
+async def close_async_node():
+    await async_node.close()
+
+# label rpc metrics with the route template of the api request that triggered them
+@app.middleware('http')
+async def route_metrics(request:HttpRequest, call_next):
+    route = _route_template(request)
+    token = ROUTE.set(route)
+    start = perf_counter()
+
+    try:
+        return await call_next(request)
+    finally:
+        ROUTE_SECONDS.labels(route).observe(perf_counter() - start)
+        ROUTE.reset(token)
+
+# collect the chain calls of each api request, returned with the debug header or query flag
+@app.middleware('http')
+async def rpc_trace(request:HttpRequest, call_next):
+    trace = Trace(_route_template(request))
+    token = TRACE.set(trace)
+
+    try:
+        response = await call_next(request)
+    finally:
+        TRACE.reset(token)
+
+    # streamed bodies (ndjson, sse) run after this point, the trace ends with the body.
+    # the headers only cover the chain calls made before the body started
+    response.body_iterator = finishAfterBody(response.body_iterator, trace, response.status_code)
+
+    response.headers['X-RPC-Count'] = str(trace.rpcCount)
+    response.headers['X-RPC-Duration-Ms'] = '{:.3f}'.format(trace.rpcDuration)
+
+    if request.headers.get('X-Debug-Trace') or request.query_params.get('trace') in ['1', 'true']:
+        response.headers['X-RPC-Trace'] = json.dumps(trace.summary())
+
+    return response
+
+def _route_template(request:HttpRequest) -> str:
+    for route in app.router.routes:
+        (match, _) = route.matches(request.scope)
+        if match == Match.FULL:
+            return '{} {}'.format(request.method, route.path)
+
+    return 'unmatched'
+
+@app.get('/metrics', tags=['Config'], summary="Get prometheus metrics")
+async def get_metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get('/requests', response_model=int, tags=['Oracle'], summary="Get the number of oracle requests")
-def get_oracle_requests():
-    global node
-    return node.requests
+async def get_oracle_requests():
+    return await async_node.requests()
+
+@app.get('/requests:store', response_model=RequestStoreStatus, tags=['Oracle'], summary="Get size and eviction counters of the in-memory oracle request store")
+async def get_request_store():
+    return node.requestStore
+
+@app.get('/responder', response_model=ResponderStatus, tags=['Oracle'], summary="Get counters and request to response latency of the automated responder")
+async def get_responder():
+    try:
+        return node.responder
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+# needs to be registered before /requests/{object_name}
+@app.get('/requests/stream', tags=['Oracle'], summary="Stream new oracle requests as server-sent events")
+async def stream_oracle_requests(cursor:str = None, last_event_id:str = Header(None)):
+    cursor = cursor or last_event_id
+
+    try:
+        if cursor is not None:
+            fromCursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        _stream_requests(cursor),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache'})
+
+async def _stream_requests(cursor:str) -> AsyncIterator[str]:
+    async for (event_id, request) in node.requestStream.subscribe(cursor):
+        if request is None:
+            yield ': keepalive\n\n'
+        else:
+            yield 'id: {}\nevent: {}\ndata: {}\n\n'.format(event_id, request.event, request.json())
 
 @app.get('/requests/{object_name}', tags=['Oracle'], summary="Get the oracle request id a the given object name")
-def get_oracle_request(object_name:str):
+async def get_oracle_request(object_name:str):
     try:
-        global node
-        return node.getRequest(object_name)
+        return await async_node.getRequest(object_name)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+# transactions are signed and sent by brownie accounts which only offer
+# a blocking interface, these calls are moved to the threadpool
 @app.put('/requests/{request_id}/respond', tags=['Oracle'], summary="Send a response for an oracle request id")
-def respond_to_oracle_request(request_id:int, fire_category:FireCategory):
+async def respond_to_oracle_request(request_id:int, fire_category:FireCategory):
     try:
-        global node
-        node.sendResponse(request_id, fire_category)
+        await run_in_threadpool(node.sendResponse, request_id, fire_category)
     except ValueError as e:
         logging.error(e)
         raise HTTPException(status_code=404, detail=str(e))
 
-@app.post('/policies', response_model=str, tags=['Policy'])
-def apply_for_fire_policy(object_name: str, object_value:int, response:Response):
+@app.put('/requests:respond', response_model=List[OracleResponseResult], tags=['Oracle'], summary="Send responses for a list of oracle request ids")
+async def respond_to_oracle_requests(responses:List[OracleResponse]):
+    submissions = await run_in_threadpool(node.submitResponses, responses)
+    return await asyncio.gather(*[
+        _response_result(response, submission)
+        for response, submission in zip(responses, submissions)])
+
+async def _response_result(response:OracleResponse, submission) -> OracleResponseResult:
+    result = OracleResponseResult(request_id = response.request_id)
+
     try:
-        global node
-        process_id = node.applyForPolicy(object_name, object_value)
-        response.status_code = status.HTTP_201_CREATED
-        return str(process_id)
+        if isinstance(submission, Exception):
+            raise submission
+
+        tx = await asyncio.wrap_future(submission)
+        result.tx_hash = tx.txid
+        node.setResponded(response)
+    except Exception as e:
+        result.error = str(e)
+
+    return result
+
+@app.post('/policies', response_model=Union[str, Job], tags=['Policy'])
+async def apply_for_fire_policy(object_name: str, object_value:int, response:Response, asynchronous:bool = False):
+    try:
+        if not asynchronous:
+            process_id = await run_in_threadpool(node.applyForPolicy, object_name, object_value)
+            response.status_code = status.HTTP_201_CREATED
+            return str(process_id)
+
+        # only wait for the transaction to be sent, process id is resolved by a job
+        tx = await run_in_threadpool(node.submitApplication, object_name, object_value)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return jobs.submit(tx.txid, tx, node.processIdFromTx)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# number of applications signed and sent per threadpool call
+APPLICATION_CHUNK_SIZE = 100
+
+# with batched=true each chunk is sent as a single FireProduct.applyForPolicies transaction,
+# a failing application then fails all applications of its chunk
+@app.post('/policies:batch', tags=['Policy'], summary="Apply for policies for a list of objects, results are streamed as NDJSON")
+async def apply_for_fire_policies(applications:List[PolicyApplication], batched:bool = False):
+    return StreamingResponse(
+        _stream_application_results(applications, batched),
+        media_type='application/x-ndjson')
+
+async def _stream_application_results(applications:List[PolicyApplication], batched:bool = False) -> AsyncIterator[str]:
+    pending = set()
+
+    for start in range(0, len(applications), APPLICATION_CHUNK_SIZE):
+        chunk = applications[start:start + APPLICATION_CHUNK_SIZE]
+        submit = asyncio.ensure_future(run_in_threadpool(_submit_applications, chunk, batched))
+
+        # stream results of earlier chunks while the next chunk is signed and sent
+        while not submit.done():
+            (done, _) = await asyncio.wait(pending | {submit}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done - {submit}:
+                pending.remove(task)
+                for result in task.result():
+                    yield _ndjson(result)
+
+        for (submitted, submission) in submit.result():
+            pending.add(asyncio.ensure_future(_application_results(submitted, submission, batched)))
+
+    for completed in asyncio.as_completed(pending):
+        for result in await completed:
+            yield _ndjson(result)
+
+def _submit_applications(chunk:List[PolicyApplication], batched:bool) -> List:
+    # (applications, pending transaction or exception) per transaction
+    if not batched:
+        return [([application], submission) for application, submission in zip(chunk, node.submitApplications(chunk))]
+
+    try:
+        return [(chunk, node.submitApplicationsBatch(chunk))]
+    except Exception as e:
+        return [(chunk, e)]
+
+async def _application_results(applications:List[PolicyApplication], submission, batched:bool) -> List[PolicyApplicationResult]:
+    results = [PolicyApplicationResult(object_name = application.object_name) for application in applications]
+
+    try:
+        if isinstance(submission, Exception):
+            raise submission
+
+        tx = await asyncio.wrap_future(submission)
+        process_ids = node.processIdsFromTx(tx) if batched else [node.processIdFromTx(tx)]
+
+        for result, process_id in zip(results, process_ids):
+            result.process_id = str(process_id)
+    except Exception as e:
+        for result in results:
+            result.error = str(e)
+
+    return results
+
+def _ndjson(result:PolicyApplicationResult) -> str:
+    return '{}\n'.format(result.json())
+
+@app.get('/jobs/{job_id}', response_model=Job, tags=['Policy'], summary="Get the state of an asynchronous policy application")
+async def get_job(job_id:str):
+    try:
+        return jobs.get(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+# upper bound for the page size of policy listings
+MAX_PAGE_SIZE = 1000
+
+@app.get('/policies', response_model=PolicyPage, tags=['Policy'], summary="List policies from the local policy index")
+async def list_fire_policies(offset:int = 0, limit:int = 50, state:PolicyState = None):
+    if offset < 0 or limit < 1 or limit > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail='offset must be >= 0 and limit in [1, {}]'.format(MAX_PAGE_SIZE))
+
+    return node.listPolicies(offset, limit, state)
+
 @app.get('/policies/{process_id}', response_model=Policy, tags=['Policy'])
-def get_fire_policy(process_id:str):
+async def get_fire_policy(process_id:str):
     try:
-        global node
-        return node.getPolicy(process_id)
+        return await async_node.getPolicy(process_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 @app.put('/policies/{process_id}/expire', tags=['Policy'])
-def expire_fire_policy(process_id:str):
+async def expire_fire_policy(process_id:str):
     try:
-        global node
-        node.expirePolicy(process_id)
+        await run_in_threadpool(node.expirePolicy, process_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+@app.get('/watchers', response_model=List[WatcherStatus], tags=['Config'], summary="Get strategy and observed latency of the event watchers")
+async def get_watchers():
+    return node.watchers
+
 @app.get('/config', response_model=Config, tags=['Config'])
-def get_node_config():
-    global node
+async def get_node_config():
     return node.config
 
 @app.post('/config', response_model=Config, tags=['Config'])
-def set_node_config(config: PostConfig):
-    global node
-    node.config = config
+async def set_node_config(config: PostConfig):
+    await run_in_threadpool(setattr, node, 'config', config)
     return node.config
 
 def custom_openapi():
@@ -0,0 +1,64 @@
+import importlib
+import json
+import logging
+import os
+
+from functools import lru_cache
+from typing import Dict, List
+
+from server import MANIFEST_ENV
+
+# contracts of this project, all others are taken from the gif-contracts package
+PROJECT_CONTRACTS = ['FireOracle', 'FireProduct']
+GIF_CONTRACTS = ['RegistryController', 'InstanceService', 'PolicyController']
+
+MANIFEST_VERSION = 1
+
+
+class Artifact(object):
+
+    # same attributes as a brownie contract container for abi based helpers
+    def __init__(self, name:str, abi:List[Dict]):
+        self._name = name
+        self.abi = abi
+
+
+def getArtifact(name:str):
+    path = os.environ.get(MANIFEST_ENV)
+    if path:
+        return _loadManifest(path)[name]
+
+    if name in PROJECT_CONTRACTS:
+        return getattr(importlib.import_module('brownie.project.Project'), name)
+
+    return getattr(_gifPackage(), name)
+
+
+def buildManifest() -> Dict:
+    return {
+        'version': MANIFEST_VERSION,
+        'contracts': {
+            name: {'abi': getArtifact(name).abi}
+            for name in PROJECT_CONTRACTS + GIF_CONTRACTS},
+    }
+
+
+@lru_cache(maxsize=None)
+def _loadManifest(path:str) -> Dict[str, Artifact]:
+    with open(path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError('unsupported manifest version {} in {}'.format(manifest.get('version'), path))
+
+    logging.info('loaded {} contract abis from manifest {}'.format(len(manifest['contracts']), path))
+
+    return {
+        name: Artifact(name, contract['abi'])
+        for name, contract in manifest['contracts'].items()}
+
+
+@lru_cache(maxsize=None)
+def _gifPackage():
+    from scripts.util import get_package
+    return get_package('gif-contracts')
@@ -0,0 +1,50 @@
+from typing import Dict, List
+
+from server.node import Node
+from server.policy import Policy
+from server.reader import contractCall, decodeResult
+from server.rpc import AsyncBatchRpc
+
+class AsyncNode(object):
+
+    def __init__(self, node:Node, rpc:AsyncBatchRpc = None):
+        self._node = node
+        self._rpc = rpc or AsyncBatchRpc()
+
+    async def requests(self) -> int:
+        return await self._callOracle('requestIds')
+
+    async def getRequest(self, object_name:str) -> Dict:
+        request_id = await self._callOracle('requestId', object_name)
+        return { "request_id" : request_id }
+
+    async def getPolicy(self, process_id:str) -> Policy:
+        return (await self.getPolicies([process_id]))[0]
+
+    async def getPolicies(self, process_ids:List[str]) -> List[Policy]:
+        cache = self._node.policyCache
+        reader = self._node.policyReader
+
+        policies = {
+            process_id: cache.get(process_id)
+            for process_id in process_ids}
+
+        # fetch all cache misses in a single rpc round trip
+        missing = [process_id for process_id, policy in policies.items() if policy is None]
+        if len(missing) > 0:
+            generation = cache.generation
+            results = await self._rpc.call(reader.buildCalls(missing))
+
+            for policy in reader.decodePolicies(missing, results):
+                cache.put(policy.id, policy, generation)
+                policies[policy.id] = policy
+
+        return [policies[process_id] for process_id in process_ids]
+
+    async def close(self):
+        await self._rpc.close()
+
+    async def _callOracle(self, name:str, *args):
+        oracle = self._node.oracleContract
+        (result,) = await self._rpc.call([contractCall(oracle, name, *args)])
+        return decodeResult(oracle, name, result)[0]
@@ -0,0 +1,97 @@
+import logging
+
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from server.policy import Policy
+
+def processIdKey(processId) -> str:
+    if isinstance(processId, (bytes, bytearray)):
+        return '0x{}'.format(bytes(processId).hex())
+
+    return str(processId).lower()
+
+
+class PolicyCache(object):
+
+    # bounded lru cache, entries expire after TTL seconds
+    MAX_ENTRIES = 1024
+    TTL = 30.0
+
+    def __init__(
+        self,
+        maxEntries:int = MAX_ENTRIES,
+        ttl:float = TTL,
+        invalidateOnNewBlock:bool = True
+    ):
+        self._entries:OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._maxEntries = maxEntries
+        self._ttl = ttl
+        self._invalidateOnNewBlock = invalidateOnNewBlock
+        self._blockNumber = None
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, processId) -> Policy:
+        key = processIdKey(processId)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            (policy, expiresAt) = entry
+            if expiresAt < monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return policy
+
+    def put(self, processId, policy:Policy, generation:int = None):
+        key = processIdKey(processId)
+
+        with self._lock:
+            # drop results read before an invalidation happened
+            if generation is not None and generation != self._generation:
+                return
+
+            self._entries[key] = (policy, monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._maxEntries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, processId):
+        key = processIdKey(processId)
+
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def setBlockNumber(self, blockNumber:int):
+        if self._blockNumber is not None and blockNumber > self._blockNumber:
+            if self._invalidateOnNewBlock:
+                logging.debug('new block {}, clearing policy cache'.format(blockNumber))
+                self.clear()
+
+        self._blockNumber = blockNumber
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -3,4 +3,12 @@ from enum import Enum
 class FireCategory(str, Enum):
     S = 'S'
     M = 'M'
-    L = 'L'
\ No newline at end of file
+    L = 'L'
+
+
+def fireCategoryFromResponse(response) -> str:
+    # oracle responses are abi encoded bytes1 values, as bytes or hex string
+    if isinstance(response, str):
+        response = bytes.fromhex(response[2:] if response.startswith('0x') else response)
+
+    return bytes(response)[:1].decode()
\ No newline at end of file
@@ -4,7 +4,17 @@ class Config(BaseModel):
     registry_address: str = None
     product_address: str = None
     oracle_address: str = None
+    deployment_manifest: str = None
     mnemonic: str = None
+    store_path: str = None
+    max_open_requests: int = None
+    confirmations: int = None
+    start_block: int = None
+    responder_enabled: bool = None
+    responder_workers: int = None
+    responder_batch_size: int = None
+    responder_data_file: str = None
+    trace_file: str = None
     product_account_no:int = None
     oracle_account_no:int = None
     customer_account_no:int = None
@@ -13,4 +23,14 @@ class PostConfig(BaseModel):
     registry_address: str = None
     product_address: str = None
     oracle_address: str = None
+    deployment_manifest: str = None
     mnemonic: str = None
+    store_path: str = None
+    max_open_requests: int = None
+    confirmations: int = None
+    start_block: int = None
+    responder_enabled: bool = None
+    responder_workers: int = None
+    responder_batch_size: int = None
+    responder_data_file: str = None
+    trace_file: str = None
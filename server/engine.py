@@ -0,0 +1,170 @@
+import asyncio
+import json
+import logging
+
+from enum import Enum
+from threading import Event, Lock, Thread
+from time import time
+from typing import Callable, Dict, List
+
+import websockets
+
+from brownie.network.web3 import web3
+from pydantic import BaseModel
+from web3 import WebsocketProvider
+
+class WatcherStrategy(str, Enum):
+    SUBSCRIPTION = 'subscription'
+    ADAPTIVE_POLLING = 'adaptive_polling'
+
+class WatcherStatus(BaseModel):
+    name:str = None
+    strategy:WatcherStrategy = None
+    polling_intervall:float = None
+    polls:int = 0
+    events:int = 0
+    last_latency:float = None
+    average_latency:float = None
+
+
+class WatcherEngine(object):
+
+    # adaptive polling intervall bounds in seconds
+    MIN_INTERVALL = 0.2
+    MAX_INTERVALL = 5.0
+    BACKOFF_FACTOR = 1.5
+
+    # weight of the latest sample in the moving latency average
+    LATENCY_WEIGHT = 0.1
+
+    def __init__(
+        self,
+        name:str,
+        poll:Callable[[], List],
+        strategy:WatcherStrategy = None,
+        minIntervall:float = MIN_INTERVALL,
+        maxIntervall:float = MAX_INTERVALL
+    ):
+        self._poll = poll
+        self._minIntervall = minIntervall
+        self._maxIntervall = maxIntervall
+        self._blockTimestamps:Dict[int, int] = {}
+        self._worker = None
+        self.active = True
+
+        # held while polling, stop() waits for a running poll
+        self._pollLock = Lock()
+        self._stopped = Event()
+
+        self.status = WatcherStatus(
+            name = name,
+            strategy = strategy or defaultStrategy(),
+            polling_intervall = minIntervall)
+
+    def start(self):
+        self._worker = Thread(
+            target=self._run,
+            daemon=True)
+
+        self._worker.start()
+
+    def stop(self):
+        # returns once no poll is running, a stopped engine does not poll again
+        self.active = False
+        self._stopped.set()
+
+        with self._pollLock:
+            pass
+
+        # a subscription thread waits for the next head and exits without polling
+        if self._worker and self.status.strategy == WatcherStrategy.ADAPTIVE_POLLING:
+            self._worker.join()
+
+    def _run(self):
+        if self.status.strategy == WatcherStrategy.SUBSCRIPTION:
+            try:
+                asyncio.run(self._subscriptionLoop(web3.provider.endpoint_uri))
+                return
+            except Exception as e:
+                logging.warning('{}: newHeads subscription failed ({}), falling back to adaptive polling'.format(
+                    self.status.name,
+                    e))
+
+                self.status.strategy = WatcherStrategy.ADAPTIVE_POLLING
+
+        self._pollingLoop()
+
+    def _pollingLoop(self):
+        intervall = self._minIntervall
+
+        while self.active:
+            events = self._pollOnce()
+
+            # poll tightly while events arrive, back off when the chain is idle
+            if len(events) > 0:
+                intervall = self._minIntervall
+            else:
+                intervall = min(intervall * WatcherEngine.BACKOFF_FACTOR, self._maxIntervall)
+
+            self.status.polling_intervall = intervall
+            self._stopped.wait(intervall)
+
+    async def _subscriptionLoop(self, uri:str):
+        async with websockets.connect(uri) as connection:
+            await connection.send(json.dumps({
+                'jsonrpc': '2.0',
+                'id': 1,
+                'method': 'eth_subscribe',
+                'params': ['newHeads'],
+            }))
+
+            response = json.loads(await connection.recv())
+            if 'error' in response:
+                raise ValueError(response['error'])
+
+            self.status.polling_intervall = None
+            logging.info('{}: subscribed to newHeads ({})'.format(
+                self.status.name,
+                response['result']))
+
+            while self.active:
+                json.loads(await connection.recv())
+                await asyncio.get_running_loop().run_in_executor(None, self._pollOnce)
+
+    def _pollOnce(self) -> List:
+        with self._pollLock:
+            if not self.active:
+                return []
+
+            try:
+                events = self._poll()
+            except Exception as e:
+                logging.error('{}: polling failed: {}'.format(self.status.name, e))
+                return []
+
+        self.status.polls += 1
+        self.status.events += len(events)
+
+        for event in events:
+            self._recordLatency(event.blockNumber)
+
+        return events
+
+    def _recordLatency(self, blockNumber:int):
+        if blockNumber not in self._blockTimestamps:
+            self._blockTimestamps = {
+                blockNumber: web3.eth.get_block(blockNumber)['timestamp']}
+
+        latency = max(0, time() - self._blockTimestamps[blockNumber])
+        average = self.status.average_latency
+
+        self.status.last_latency = latency
+        self.status.average_latency = latency if average is None else (
+            (1 - WatcherEngine.LATENCY_WEIGHT) * average + WatcherEngine.LATENCY_WEIGHT * latency)
+
+
+def defaultStrategy() -> WatcherStrategy:
+    if isinstance(web3.provider, WebsocketProvider):
+        return WatcherStrategy.SUBSCRIPTION
+
+    return WatcherStrategy.ADAPTIVE_POLLING
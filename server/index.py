@@ -0,0 +1,71 @@
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Dict, List
+
+from server.cache import processIdKey
+from server.policy import PolicyPage, PolicyState, PolicySummary
+
+class PolicyIndex(object):
+
+    def __init__(self):
+        self._lock = Lock()
+        self._reset()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._policies:Dict[str, PolicySummary] = {}
+        # creation sequence number per process id
+        self._sequence:Dict[str, int] = {}
+        self._processIds:List[str] = []
+        # sorted sequence numbers per policy state for paging by state
+        self._byState:Dict[PolicyState, List[int]] = {
+            state: [] for state in PolicyState}
+
+    def add(self, summary:PolicySummary):
+        key = processIdKey(summary.id)
+
+        with self._lock:
+            if key in self._policies:
+                return
+
+            sequence = len(self._processIds)
+            self._processIds.append(key)
+            self._sequence[key] = sequence
+            self._policies[key] = summary
+            insort(self._byState[summary.state], sequence)
+
+    def setState(self, processId, state:PolicyState):
+        key = processIdKey(processId)
+
+        with self._lock:
+            summary = self._policies.get(key)
+            if summary is None or summary.state == state:
+                return
+
+            sequence = self._sequence[key]
+            sequences = self._byState[summary.state]
+            del sequences[bisect_left(sequences, sequence)]
+            insort(self._byState[state], sequence)
+            summary.state = state
+
+    def getPage(self, offset:int, limit:int, state:PolicyState = None) -> PolicyPage:
+        with self._lock:
+            if state is None:
+                total = len(self._processIds)
+                keys = self._processIds[offset:offset + limit]
+            else:
+                sequences = self._byState[state]
+                total = len(sequences)
+                keys = [self._processIds[sequence] for sequence in sequences[offset:offset + limit]]
+
+            return PolicyPage(
+                total = total,
+                offset = offset,
+                limit = limit,
+                items = [self._policies[key] for key in keys])
+
+    def __len__(self) -> int:
+        return len(self._processIds)
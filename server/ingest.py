@@ -0,0 +1,226 @@
+import logging
+
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+from brownie.network.web3 import web3
+from eth_utils import event_abi_to_log_topic
+
+from server.engine import WatcherEngine, WatcherStatus, WatcherStrategy
+from server.metrics import WATCHER_LAG_BLOCKS
+from server.store import EventStore
+
+class LogIngestor(object):
+
+    # name of the block checkpoint in the event store
+    NAME = 'LogIngestor'
+
+    # max number of blocks per eth_getLogs call
+    CHUNK_SIZE = 2000
+
+    # blocks behind the chain head before logs are handled
+    CONFIRMATIONS = 0
+
+    # number of processed block hashes kept to detect reorgs
+    BLOCK_HASHES = 256
+
+    def __init__(
+        self,
+        store:EventStore = None,
+        strategy:WatcherStrategy = None,
+        chunkSize:int = CHUNK_SIZE,
+        confirmations:int = CONFIRMATIONS,
+        startBlock:int = None
+    ):
+        self._store = store
+        self._chunkSize = chunkSize
+        self._confirmations = confirmations
+
+        # (address, topic) -> (contract event, handler)
+        self._handlers:Dict[Tuple[str, bytes], Tuple] = {}
+        self._headHandlers:List[Callable[[int], None]] = []
+        self._rollbackHandlers:List[Callable[[int], None]] = []
+
+        # (block number, block hash) of processed blocks in ascending order
+        self._blocks = deque(maxlen=LogIngestor.BLOCK_HASHES)
+
+        # chain head of the last poll
+        self._head = None
+
+        # resume after the last processed block, an empty store is filled from the start block
+        # (product deployment), without a store only new blocks are watched
+        checkpoint = store.getCheckpoint(LogIngestor.NAME) if store else None
+        if checkpoint is not None:
+            self._nextBlock = checkpoint + 1
+
+            checkpointHash = store.getCheckpointHash(LogIngestor.NAME)
+            if checkpointHash:
+                self._blocks.append((checkpoint, checkpointHash))
+        elif store:
+            self._nextBlock = startBlock or 0
+        else:
+            self._nextBlock = web3.eth.block_number
+
+        self._engine = WatcherEngine(LogIngestor.NAME, self._poll, strategy)
+
+    @property
+    def status(self) -> WatcherStatus:
+        return self._engine.status
+
+    def register(self, contract, eventNames:List[str], handler:Callable):
+        # contract is a web3 contract, events missing in its abi are skipped
+        events = {
+            entry['name']: entry
+            for entry in contract.abi
+            if entry['type'] == 'event'}
+
+        for eventName in eventNames:
+            if eventName not in events:
+                logging.warning('{} not in abi of contract at {}, skipping'.format(
+                    eventName,
+                    contract.address))
+                continue
+
+            topic = bytes(event_abi_to_log_topic(events[eventName]))
+            self._handlers[(contract.address.lower(), topic)] = (
+                contract.events[eventName](),
+                handler)
+
+    def onNewHead(self, handler:Callable[[int], None]):
+        self._headHandlers.append(handler)
+
+    def onRollback(self, handler:Callable[[int], None]):
+        # handler gets the first orphaned block number
+        self._rollbackHandlers.append(handler)
+
+    def start(self):
+        # backfill blocks missed while the server was down before going live
+        logging.info('{}: backfilling from block {} for {} events'.format(
+            LogIngestor.NAME,
+            self._nextBlock,
+            len(self._handlers)))
+
+        self._poll()
+        self._engine.start()
+
+    def stop(self):
+        # no events are written to the store once stop returns
+        self._engine.stop()
+
+    def _poll(self) -> List:
+        # idle chain, a single eth_blockNumber call per poll
+        head = web3.eth.block_number
+        if head == self._head:
+            return []
+
+        for handler in self._headHandlers:
+            handler(head)
+
+        self._checkReorg()
+
+        events = []
+        confirmedBlock = head - self._confirmations
+        while self._nextBlock <= confirmedBlock:
+            toBlock = min(self._nextBlock + self._chunkSize - 1, confirmedBlock)
+            chunk = self._getEvents(self._nextBlock, toBlock)
+
+            for (event, handler) in chunk:
+                handler(event)
+                self._addBlock(event.blockNumber, bytes(event.blockHash))
+
+            # a single header per chunk, blocks with logs come with their hash
+            toBlockHash = self._getBlockHash(toBlock)
+            self._addBlock(toBlock, toBlockHash)
+
+            if self._store:
+                self._store.setCheckpoint(LogIngestor.NAME, toBlock, toBlockHash)
+
+            self._nextBlock = toBlock + 1
+            events += [event for (event, _) in chunk]
+
+        # a failed poll is retried even without a new block
+        self._head = head
+
+        WATCHER_LAG_BLOCKS.set(head - (self._nextBlock - 1))
+        return events
+
+    def _checkReorg(self):
+        if len(self._blocks) == 0:
+            return
+
+        (blockNumber, blockHash) = self._blocks[-1]
+        if self._getBlockHash(blockNumber) == blockHash:
+            return
+
+        # walk back to the newest processed block that is still canonical
+        oldestBlock = self._blocks[0][0]
+        while len(self._blocks) > 0:
+            (blockNumber, blockHash) = self._blocks[-1]
+            if self._getBlockHash(blockNumber) == blockHash:
+                break
+
+            self._blocks.pop()
+
+        if len(self._blocks) > 0:
+            forkBlock = self._blocks[-1][0] + 1
+        else:
+            forkBlock = oldestBlock
+            logging.error('{}: reorg deeper than {} tracked blocks, rolling back from block {}'.format(
+                LogIngestor.NAME,
+                LogIngestor.BLOCK_HASHES,
+                forkBlock))
+
+        logging.warning('{}: reorg detected, blocks from {} orphaned'.format(
+            LogIngestor.NAME,
+            forkBlock))
+
+        for handler in self._rollbackHandlers:
+            handler(forkBlock)
+
+        self._nextBlock = forkBlock
+        if self._store:
+            self._store.setCheckpoint(
+                LogIngestor.NAME,
+                forkBlock - 1,
+                self._blocks[-1][1] if len(self._blocks) > 0 else None)
+
+    def _addBlock(self, blockNumber:int, blockHash:bytes):
+        if len(self._blocks) > 0 and self._blocks[-1][0] >= blockNumber:
+            return
+
+        self._blocks.append((blockNumber, blockHash))
+
+    def _getBlockHash(self, blockNumber:int) -> bytes:
+        try:
+            return bytes(web3.eth.get_block(blockNumber)['hash'])
+        except Exception:
+            # block no longer exists after a reorg to a shorter chain
+            return None
+
+    def _getEvents(self, fromBlock:int, toBlock:int) -> List[Tuple]:
+        if len(self._handlers) == 0:
+            return []
+
+        addresses = sorted({address for (address, _) in self._handlers})
+        topics = sorted({topic for (_, topic) in self._handlers})
+
+        # single query for all contracts and events, logs are returned in chain order
+        logs = web3.eth.get_logs({
+            'fromBlock': fromBlock,
+            'toBlock': toBlock,
+            'address': [web3.toChecksumAddress(address) for address in addresses],
+            'topics': [['0x{}'.format(topic.hex()) for topic in topics]],
+        })
+
+        events = []
+        for log in logs:
+            key = (log['address'].lower(), bytes(log['topics'][0]))
+
+            # same topic on another registered contract
+            if key not in self._handlers:
+                continue
+
+            (contractEvent, handler) = self._handlers[key]
+            events.append((contractEvent.processLog(log), handler))
+
+        return events
@@ -0,0 +1,76 @@
+import logging
+import uuid
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from threading import Lock
+from typing import Callable
+
+from pydantic import BaseModel
+
+class JobState(str, Enum):
+    PENDING = 'pending'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+class Job(BaseModel):
+    id:str = None
+    state:JobState = JobState.PENDING
+    tx_hash:str = None
+    process_id:str = None
+    error:str = None
+
+
+class JobRegistry(object):
+
+    # finished jobs are dropped oldest first beyond this limit
+    MAX_JOBS = 10000
+
+    # workers only decode mined transactions, no worker waits for a transaction
+    WORKERS = 8
+
+    def __init__(self, maxJobs:int = MAX_JOBS, workers:int = WORKERS):
+        self._jobs:OrderedDict = OrderedDict()
+        self._lock = Lock()
+        self._maxJobs = maxJobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='job')
+
+    def submit(self, txHash:str, pending:Future, resolve:Callable[[object], str]) -> Job:
+        # resolve gets the mined transaction once pending is done
+        job = Job(
+            id = str(uuid.uuid4()),
+            tx_hash = txHash)
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+
+        pending.add_done_callback(lambda done: self._executor.submit(self._run, job, done, resolve))
+        return job
+
+    def get(self, jobId:str) -> Job:
+        with self._lock:
+            if jobId not in self._jobs:
+                raise ValueError('unknown job id {}'.format(jobId))
+
+            return self._jobs[jobId]
+
+    def _run(self, job:Job, pending:Future, resolve:Callable[[object], str]):
+        try:
+            job.process_id = str(resolve(pending.result()))
+            job.state = JobState.SUCCEEDED
+        except Exception as e:
+            logging.error('job {} failed: {}'.format(job.id, e))
+            job.error = str(e)
+            job.state = JobState.FAILED
+
+    def _evict(self):
+        finished = [
+            jobId for jobId, job in self._jobs.items()
+            if job.state != JobState.PENDING]
+
+        for jobId in finished[:max(0, len(self._jobs) - self._maxJobs)]:
+            del self._jobs[jobId]
@@ -0,0 +1,177 @@
+import logging
+import rlp
+
+from contextvars import ContextVar
+from time import perf_counter, time_ns
+from typing import Dict, List, Tuple
+
+from brownie.network.web3 import web3
+from eth_utils import function_abi_to_4byte_selector
+from prometheus_client import Counter, Gauge, Histogram
+
+from server.trace import addSpan
+
+# api route template of the current request, background for watcher and worker threads
+ROUTE:ContextVar = ContextVar('route', default='background')
+
+RPC_SECONDS = Histogram(
+    'fire_rpc_seconds',
+    'Latency of json rpc calls by method and contract function',
+    ['method', 'contract', 'function'])
+
+RPC_BATCH_SECONDS = Histogram(
+    'fire_rpc_batch_seconds',
+    'Latency of json rpc batches')
+
+RPC_CALLS = Counter(
+    'fire_rpc_calls_total',
+    'Number of json rpc calls by api route and method',
+    ['route', 'method'])
+
+ROUTE_SECONDS = Histogram(
+    'fire_route_seconds',
+    'Latency of api requests by route',
+    ['route'])
+
+TRANSACTION_SECONDS = Histogram(
+    'fire_transaction_seconds',
+    'Time from submitting a transaction to its receipt',
+    ['function', 'status'],
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300))
+
+WATCHER_LAG_BLOCKS = Gauge(
+    'fire_watcher_lag_blocks',
+    'Blocks between the chain head and the last block processed by the log ingestor')
+
+RESPONDER_LATENCY_SECONDS = Histogram(
+    'fire_responder_latency_seconds',
+    'Time from an oracle request being seen to its response being mined',
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300))
+
+# methods with a contract address and call data in their first parameter
+CALL_METHODS = ['eth_call', 'eth_estimateGas', 'eth_sendTransaction']
+
+# positions of (to, data) in the rlp list of signed transactions by transaction type
+RAW_TRANSACTION_FIELDS = {
+    None: (3, 5),
+    1: (4, 6),
+    2: (5, 7),
+}
+
+# (address, selector) -> (contract name, function name)
+_functions:Dict[Tuple[str, str], Tuple[str, str]] = {}
+_installed = False
+
+
+def registerContract(name:str, address:str, abi:List[Dict]):
+    # contract functions are resolved from call data for the latency labels
+    for entry in abi:
+        if entry['type'] == 'function':
+            selector = '0x{}'.format(function_abi_to_4byte_selector(entry).hex())
+            _functions[(address.lower(), selector)] = (name, entry['name'])
+
+
+def installRpcMiddleware():
+    global _installed
+
+    if _installed:
+        return
+
+    web3.middleware_onion.add(rpcMiddleware, 'metrics')
+    _installed = True
+    logging.info('rpc metrics middleware installed')
+
+
+def rpcMiddleware(make_request, w3):
+    def middleware(method, params):
+        (contract, function) = _resolve(method, params)
+        RPC_CALLS.labels(ROUTE.get(), method).inc()
+
+        start = perf_counter()
+        startNs = time_ns()
+        try:
+            return make_request(method, params)
+        finally:
+            RPC_SECONDS.labels(method, contract, function).observe(perf_counter() - start)
+            addSpan(
+                method,
+                {
+                    'rpc.method': method,
+                    'contract': contract or None,
+                    'function': function or None,
+                    'block': _block(method, params),
+                },
+                startNs,
+                time_ns())
+
+    return middleware
+
+
+def observeBatch(payloads:List[Dict], seconds:float):
+    # batches bypass the web3 middleware
+    RPC_BATCH_SECONDS.observe(seconds)
+
+    functions = []
+    for payload in payloads:
+        RPC_CALLS.labels(ROUTE.get(), payload['method']).inc()
+        functions.append('.'.join(filter(None, _resolve(payload['method'], payload['params']))) or payload['method'])
+
+    end = time_ns()
+    addSpan(
+        'rpc_batch',
+        {
+            'rpc.method': 'batch',
+            'rpc.calls': len(payloads),
+            'function': ','.join(sorted(set(functions))),
+        },
+        end - int(seconds * 10**9),
+        end)
+
+
+def _block(method:str, params):
+    if method == 'eth_call' and params and len(params) > 1:
+        return str(params[1])
+
+    if method == 'eth_getLogs' and params and isinstance(params[0], dict):
+        return '{}..{}'.format(params[0].get('fromBlock'), params[0].get('toBlock'))
+
+    return None
+
+
+def _resolve(method:str, params) -> Tuple[str, str]:
+    if method == 'eth_sendRawTransaction' and params:
+        (to, data) = _decodeRawTransaction(params[0])
+    elif method in CALL_METHODS and params and isinstance(params[0], dict):
+        to = params[0].get('to')
+        data = params[0].get('data') or ''
+    else:
+        return ('', '')
+
+    if isinstance(data, (bytes, bytearray)):
+        data = '0x{}'.format(bytes(data).hex())
+
+    if to is None or len(data) < 10:
+        return ('', '')
+
+    return _functions.get((str(to).lower(), data[:10].lower()), ('', ''))
+
+
+def _decodeRawTransaction(rawTransaction) -> Tuple[str, bytes]:
+    # transactions signed by local accounts (brownie) are sent raw
+    try:
+        if isinstance(rawTransaction, str):
+            rawTransaction = bytes.fromhex(rawTransaction[2:] if rawTransaction.startswith('0x') else rawTransaction)
+
+        rawTransaction = bytes(rawTransaction)
+        transactionType = rawTransaction[0] if rawTransaction[0] < 0x7f else None
+        if transactionType not in RAW_TRANSACTION_FIELDS:
+            return (None, '')
+
+        fields = rlp.decode(rawTransaction[1:] if transactionType else rawTransaction)
+        (toIndex, dataIndex) = RAW_TRANSACTION_FIELDS[transactionType]
+    except Exception:
+        return (None, '')
+
+    # contract creations have no recipient
+    to = '0x{}'.format(fields[toIndex].hex()) if len(fields[toIndex]) > 0 else None
+    return (to, fields[dataIndex])
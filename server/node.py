@@ -1,18 +1,34 @@
 import logging
 
-from typing import Dict, List
+from typing import Dict, List, Union
 
-from brownie.project.Project import FireProduct, FireOracle
+from brownie.network.web3 import web3
 
+from server import connect
 from server.account import Account
+from server.artifacts import getArtifact
+from server.cache import PolicyCache
 from server.category import FireCategory
 from server.config import Config, PostConfig
-from server.fire import Fire
-from server.policy import Policy
-from server.product import GifInstance
-from server.request import Request, Response
-from server.watcher import FireOracleWatcher
-from scripts.util import contract_from_address, s2h, get_package, s2b
+from server.engine import WatcherStatus
+from server.index import PolicyIndex
+from server.ingest import LogIngestor
+from server.metrics import installRpcMiddleware, registerContract
+from server.policy import Policy, PolicyApplication, PolicyPage, PolicyState
+from server.pipeline import PendingTransaction, TransactionPipeline
+from server.reader import PolicyReader
+from server.request import OracleResponse
+from server.request_store import RequestStore, RequestStoreStatus
+from server.responder import FakeDataProvider, FileDataProvider, Responder, ResponderStatus
+from server.rpc import BatchRpc
+from server.store import EventStore
+from server.stream import RequestStream
+from server.trace import FileSpanExporter, setExporter
+from server.util import getWeb3Contract
+from server.watcher import FireOracleWatcher, FireProductWatcher, GifPolicyWatcher
+from scripts.deployment_manifest import abi_hash, check_deployment_manifest, load_deployment_manifest
+from scripts.registry import RegistryResolver, get_resolver
+from scripts.util import contract_from_address, s2h
 
 class Node(object):
 
@@ -24,10 +40,13 @@ class Node(object):
 
     # initial capitalization of fire insurance product in wei
     INITIAL_CAPITALIZATION = 10**6
+
+    # sqlite file for oracle requests and product events
+    STORE_PATH = EventStore.PATH
     
     def __init__(self):
         self._policies:Dict[str, Policy] = {}
-        self._requests:Dict[int, Request] = {}
+        self._requests = RequestStore()
         self._config:Config = None
         self._instance = None
         self._fireProduct = None
@@ -35,6 +54,16 @@ class Node(object):
         self._registryAddress = None
         self._productAddress = None
         self._oracleAddress = None
+        self._oracleContract = None
+        self._policyReader = None
+        self._policyCache = PolicyCache()
+        self._policyIndex = PolicyIndex()
+        self._ingestor = None
+        self._responder = None
+        self._store = None
+        self._storePath = None
+        self._requestStream = RequestStream()
+        self._pipelines:Dict[str, TransactionPipeline] = {}
     
     @property
     def config(self) -> Config:
@@ -42,8 +71,17 @@ class Node(object):
 
     @config.setter
     def config(self, config:PostConfig):
+        # the previous ingestor must not write old events into the cleared cache or the rebound store
+        if self._ingestor:
+            self._ingestor.stop()
+            self._ingestor = None
+
         self._policies = {}
-        self._requests = {}
+        self._policyCache.clear()
+        self._policyIndex = PolicyIndex()
+
+        # connects on first use when started from an abi manifest
+        connect()
 
         # set up accounts
         logging.info('setting up accounts')
@@ -53,6 +91,17 @@ class Node(object):
         self._productOwner = account.getBrownieAccount(Node.PRODUCT_OWNER)
         self._customer = account.getBrownieAccount(Node.CUSTOMER)
 
+        # one nonce managed transaction pipeline per sending account
+        for pipeline in self._pipelines.values():
+            pipeline.stop()
+
+        self._pipelines = {
+            sender.address: TransactionPipeline(sender)
+            for sender in [self._oracleOwner, self._productOwner, self._customer]}
+
+        # addresses not in the config are taken from the deployment manifest
+        manifest = self._loadManifest(config)
+
         # set up gif instance
         self._registryAddress = config.registry_address
         logging.info('access gif instance via registry at {}'.format(
@@ -64,24 +113,216 @@ class Node(object):
         logging.info('access fire oracle at {}'.format(
             self._oracleAddress))
         
-        self._fireProduct = contract_from_address(FireProduct, config.product_address)
-        self._fireOracle = contract_from_address(FireOracle, config.oracle_address)
+        fireProduct = getArtifact('FireProduct')
+        fireOracle = getArtifact('FireOracle')
+        self._fireProduct = contract_from_address(fireProduct, config.product_address)
+        self._fireOracle = contract_from_address(fireOracle, config.oracle_address)
+        self._oracleContract = getWeb3Contract(fireOracle, config.oracle_address)
+
+        registryController = getArtifact('RegistryController')
+        instanceService = getArtifact('InstanceService')
+        policyController = getArtifact('PolicyController')
+        # addresses cached before this config may belong to an earlier deployment at the same address
+        resolver = get_resolver(config.registry_address, BatchRpc())
+        resolver.clear()
+        instanceServiceAddress = self._getAddress(resolver, manifest, 'InstanceService', instanceService)
+        policyAddress = self._getAddress(resolver, manifest, 'Policy', policyController)
+        self._instanceService = contract_from_address(instanceService, instanceServiceAddress)
+        self._policyReader = PolicyReader(
+            getWeb3Contract(instanceService, instanceServiceAddress),
+            BatchRpc())
+
+        # label rpc latency metrics with contract and function names
+        installRpcMiddleware()
+        registerContract('FireProduct', config.product_address, fireProduct.abi)
+        registerContract('FireOracle', config.oracle_address, fireOracle.abi)
+        registerContract('Registry', config.registry_address, registryController.abi)
+        registerContract('InstanceService', instanceServiceAddress, instanceService.abi)
+        registerContract('Policy', policyAddress, policyController.abi)
+        setExporter(FileSpanExporter(config.trace_file) if config.trace_file else None)
+
+        # restore requests and policies from the event store
+        storePath = config.store_path or Node.STORE_PATH
+        if self._store is None or self._storePath != storePath:
+            if self._store:
+                self._store.close()
+
+            self._store = EventStore(storePath)
+            self._storePath = storePath
+
+        self._store.bind(
+            config.product_address,
+            config.oracle_address,
+            web3.eth.chain_id,
+            bytes(web3.eth.get_block(0)['hash']).hex())
+        self._requestStream.setStore(self._store)
+        self._requests = RequestStore(
+            self._store,
+            config.max_open_requests or RequestStore.MAX_OPEN_REQUESTS)
+        self._restoreEvents()
+
+        # single log ingestion loop for oracle, product and gif policy events
+        self._ingestor = LogIngestor(
+            self._store,
+            confirmations = config.confirmations or LogIngestor.CONFIRMATIONS,
+            startBlock = config.start_block)
+
+        self._ingestor.onRollback(self._rollbackEvents)
+
+        # optionally answer oracle requests from a data provider
+        if self._responder:
+            self._responder.active = False
+            self._responder = None
+
+        if config.responder_enabled:
+            self._responder = Responder(
+                self,
+                FileDataProvider(config.responder_data_file) if config.responder_data_file else FakeDataProvider(),
+                config.responder_workers or Responder.WORKERS,
+                config.responder_batch_size or Responder.BATCH_SIZE)
+
+            for request in self._requests.openRequests():
+                self._responder.submit(request)
+
+        # collect oracle requests to validate responses against
+        FireOracleWatcher(
+            self._ingestor,
+            config.oracle_address,
+            self._requests,
+            self._requestStream,
+            self._responder)
+
+        # keep policy cache in sync with product events and chain head
+        FireProductWatcher(
+            self._ingestor,
+            config.product_address,
+            self._policyCache,
+            self._policyIndex,
+            self._store,
+            self._requests)
 
-        gif = get_package('gif-contracts')
-        registry = contract_from_address(gif.RegistryController, config.registry_address)
-        instanceServiceAddress = registry.getContract(s2b('InstanceService'))
-        self._instanceService = contract_from_address(gif.InstanceService, instanceServiceAddress)
+        GifPolicyWatcher(
+            self._ingestor,
+            policyController,
+            policyAddress,
+            self._policyCache)
+
+        self._ingestor.start()
 
         # create config for config get requests
         self._config = Config(
             registry_address = config.registry_address,
             product_address = config.product_address,
             oracle_address = config.oracle_address,
+            deployment_manifest = config.deployment_manifest if manifest else None,
             mnemonic = config.mnemonic,
+            store_path = storePath,
+            max_open_requests = self._requests.status.max_open_requests,
+            confirmations = config.confirmations or LogIngestor.CONFIRMATIONS,
+            start_block = config.start_block,
+            responder_enabled = self._responder is not None,
+            responder_workers = self._responder.status.workers if self._responder else None,
+            responder_batch_size = self._responder.status.batch_size if self._responder else None,
+            responder_data_file = config.responder_data_file,
+            trace_file = config.trace_file,
             product_account_no = Node.PRODUCT_OWNER,
             oracle_account_no = Node.ORACLE_OWNER,
             customer_account_no = Node.CUSTOMER)
 
+    def _loadManifest(self, config:PostConfig) -> Dict:
+        if not config.deployment_manifest:
+            return None
+
+        manifest = load_deployment_manifest(config.deployment_manifest, check=False)
+        if manifest is None:
+            raise ValueError('deployment manifest {} not found'.format(config.deployment_manifest))
+
+        # addresses of a manifest written for another chain are not used
+        reason = check_deployment_manifest(manifest)
+        if reason is not None:
+            raise ValueError('deployment manifest {} does not match the chain: {}'.format(config.deployment_manifest, reason))
+
+        if config.registry_address and config.registry_address.lower() != manifest['registry'].lower():
+            logging.warning('ignoring deployment manifest {} of registry {}'.format(
+                config.deployment_manifest,
+                manifest['registry']))
+
+            return None
+
+        contracts = manifest['contracts']
+        product = contracts.get('product', {})
+        config.registry_address = manifest['registry']
+        config.product_address = config.product_address or product.get('address')
+        config.oracle_address = config.oracle_address or contracts.get('oracle', {}).get('address')
+
+        # no product events before its deployment block
+        if config.start_block is None and config.product_address == product.get('address'):
+            config.start_block = product.get('block')
+
+        logging.info('using deployment manifest {} with {} contracts'.format(
+            config.deployment_manifest,
+            len(contracts)))
+
+        return manifest
+
+    def _getAddress(self, resolver:RegistryResolver, manifest:Dict, name:str, artifact) -> str:
+        # resolves from the manifest without rpc calls, the registry is the fallback
+        if manifest is None or name not in manifest['contracts']:
+            return resolver.getAddress(name)
+
+        contract = manifest['contracts'][name]
+        if contract['abi_hash'] and contract['abi_hash'] != abi_hash(artifact.abi):
+            logging.warning('abi of {} differs from deployment manifest'.format(name))
+
+        return contract['address']
+
+    def _restoreEvents(self):
+        # watchers backfill the blocks after their checkpoints when started
+        self._requests.restore()
+
+        for summary in self._store.getPolicies():
+            self._policyIndex.add(summary)
+            self._policyIndex.setState(summary.id, summary.state)
+
+    def _rollbackEvents(self, fromBlock:int):
+        # events from orphaned blocks are replayed from the canonical chain
+        self._store.rollback(fromBlock)
+        self._policyCache.clear()
+        self._policyIndex.clear()
+        self._requests.clear()
+        self._restoreEvents()
+
+    @property
+    def watchers(self) -> List[WatcherStatus]:
+        return [self._ingestor.status] if self._ingestor else []
+
+    @property
+    def responder(self) -> ResponderStatus:
+        if self._responder is None:
+            raise ValueError('responder not enabled')
+
+        return self._responder.status
+
+    @property
+    def requestStore(self) -> RequestStoreStatus:
+        return self._requests.status
+
+    @property
+    def requestStream(self) -> RequestStream:
+        return self._requestStream
+
+    @property
+    def policyCache(self) -> PolicyCache:
+        return self._policyCache
+
+    @property
+    def policyReader(self) -> PolicyReader:
+        return self._policyReader
+
+    @property
+    def oracleContract(self):
+        return self._oracleContract
+
     @property
     def requests(self) -> int:
         return self._fireOracle.requestIds()
@@ -90,42 +331,130 @@ class Node(object):
         request_id = self._fireOracle.requestId(object_name)
         return { "request_id" : request_id }
     
-    def sendResponse(self, requestId:int, fireCategory:FireCategory):        
-        self._fireOracle.respond(
+    def sendResponse(self, requestId:int, fireCategory:FireCategory):
+        self.submitResponse(requestId, fireCategory).result()
+        self.setResponded(OracleResponse(
+            request_id = requestId,
+            fire_category = fireCategory))
+
+    def submitResponse(self, requestId:int, fireCategory:FireCategory) -> PendingTransaction:
+        return self._pipelines[self._oracleOwner.address].submit(
+            self._fireOracle.respond,
             requestId, 
-            s2h(fireCategory),
-            { "from" : self._oracleOwner })
+            s2h(fireCategory))
+
+    def submitResponses(self, responses:List[OracleResponse]) -> List[Union[PendingTransaction, Exception]]:
+        submissions = []
+        requestIds = set()
+
+        for response in responses:
+            try:
+                self._validateResponse(response, requestIds)
+                requestIds.add(response.request_id)
+                submissions.append(self.submitResponse(
+                    response.request_id,
+                    response.fire_category))
+            except Exception as e:
+                submissions.append(e)
+
+        return submissions
+
+    def submitResponsesBatch(self, responses:List[OracleResponse]) -> PendingTransaction:
+        # all responses in a single FireOracle.respondBatch transaction
+        return self._pipelines[self._oracleOwner.address].submit(
+            self._fireOracle.respondBatch,
+            [response.request_id for response in responses],
+            [s2h(response.fire_category) for response in responses])
+
+    def setResponded(self, response:OracleResponse):
+        self._requests.setResponded(response.request_id, response.fire_category.value)
+
+    def _validateResponse(self, response:OracleResponse, requestIds:set):
+        request = self._requests.get(response.request_id)
+
+        if request is None:
+            raise ValueError('unknown request id {}'.format(response.request_id))
+        if request.response and not request.response.open:
+            raise ValueError('request id {} already responded'.format(response.request_id))
+        if response.request_id in requestIds:
+            raise ValueError('duplicate response for request id {}'.format(response.request_id))
     
     @property
     def policies(self) -> List[Policy]:
         return list(self._policies.values())
 
-    def getPolicy(self, process_id:str) -> Policy:        
-        application = self._instanceService.getApplication(process_id)
-        policy = self._instanceService.getPolicy(process_id)
-        object_name = self._fireProduct.decodeApplicationParameterFromData(application['data'])
-        return Policy(
-            id = process_id,
-            object_name = object_name,
-            premium = application['premiumAmount'] / 10**6,
-            premium_paid = policy['premiumPaidAmount'] / 10**6,
-            sum_insured = application['sumInsuredAmount'] / 10**6,
-            application_state = application['state'],
-            policy_state = policy['state'],
-            claims_count = policy['claimsCount'],
-            payout_amount = policy['payoutAmount'] / 10**6)
+    def getPolicy(self, process_id:str) -> Policy:
+        policy = self._policyCache.get(process_id)
+        if policy:
+            return policy
+
+        generation = self._policyCache.generation
+        policy = self._policyReader.getPolicy(process_id)
+        self._policyCache.put(process_id, policy, generation)
+        return policy
+
+    def listPolicies(self, offset:int, limit:int, state:PolicyState = None) -> PolicyPage:
+        return self._policyIndex.getPage(offset, limit, state)
+
+    def getPolicies(self, process_ids:List[str]) -> List[Policy]:
+        policies = {
+            process_id: self._policyCache.get(process_id)
+            for process_id in process_ids}
+
+        # fetch all cache misses in a single rpc round trip
+        missing = [process_id for process_id, policy in policies.items() if policy is None]
+        if len(missing) > 0:
+            generation = self._policyCache.generation
+            for policy in self._policyReader.getPolicies(missing):
+                self._policyCache.put(policy.id, policy, generation)
+                policies[policy.id] = policy
+
+        return [policies[process_id] for process_id in process_ids]
 
     def applyForPolicy(self, object_name:str, object_value:int) -> str:
-        tx = self._fireProduct.applyForPolicy(
+        tx = self.submitApplication(object_name, object_value)
+        return self.getApplicationProcessId(tx)
+
+    def submitApplication(self, object_name:str, object_value:int) -> PendingTransaction:
+        # returns as soon as the transaction is sent, without waiting for it to be mined
+        return self._pipelines[self._customer.address].submit(
+            self._fireProduct.applyForPolicy,
             object_name, 
-            object_value * 10**6, 
-            { "from": self._customer })
+            object_value * 10**6)
+
+    def submitApplications(self, applications:List[PolicyApplication]) -> List[Union[PendingTransaction, Exception]]:
+        submissions = []
+
+        for application in applications:
+            try:
+                submissions.append(self.submitApplication(
+                    application.object_name,
+                    application.object_value))
+            except Exception as e:
+                submissions.append(e)
+
+        return submissions
+
+    def submitApplicationsBatch(self, applications:List[PolicyApplication]) -> PendingTransaction:
+        # all applications in a single FireProduct.applyForPolicies transaction
+        return self._pipelines[self._customer.address].submit(
+            self._fireProduct.applyForPolicies,
+            [application.object_name for application in applications],
+            [application.object_value * 10**6 for application in applications])
+
+    def processIdsFromTx(self, tx) -> List[str]:
+        return [event['processId'] for event in tx.events['LogApplicationCreated']]
+
+    def getApplicationProcessId(self, pending:PendingTransaction) -> str:
+        return self.processIdFromTx(pending.result())
+
+    def processIdFromTx(self, tx) -> str:
         process_id = tx.events['LogApplicationCreated'][0]['processId']
         logging.info('processId {}'.format(process_id))
         return process_id
 
     def expirePolicy(self, processId:str):
-        self._fireProduct.expirePolicy(
-            processId, 
-            { "from" : self._productOwner })
+        self._pipelines[self._productOwner.address].submit(
+            self._fireProduct.expirePolicy,
+            processId).result()
     
\ No newline at end of file
@@ -0,0 +1,195 @@
+import logging
+
+from concurrent.futures import Future, TimeoutError
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Dict
+
+from brownie.network.account import Account
+from brownie.network.web3 import web3
+
+from server.metrics import TRANSACTION_SECONDS
+
+# brownie transaction status values
+STATUS_DROPPED = -2
+STATUS_PENDING = -1
+STATUS_REVERTED = 0
+
+class PendingTransaction(Future):
+
+    def __init__(self, nonce:int, tx, timeout:float = None):
+        super().__init__()
+        self.nonce = nonce
+        self.tx = tx
+        self.timeout = timeout
+        self.submittedAt = monotonic()
+        self.createdAt = self.submittedAt
+        self.replacements = 0
+
+    @property
+    def txid(self) -> str:
+        return self.tx.txid
+
+    def result(self, timeout:float = None):
+        # waits at most for all replacement rounds of the transaction
+        timeout = timeout if timeout is not None else self.timeout
+
+        try:
+            return super().result(timeout)
+        except TimeoutError:
+            raise ValueError('tx {} not mined within {}s'.format(self.txid, timeout))
+
+
+class TransactionPipeline(object):
+
+    # seconds to wait for a receipt before a transaction is replaced
+    RECEIPT_TIMEOUT = 60
+    MAX_REPLACEMENTS = 3
+    # brownie requires a gas price increment of at least 10% for replacements
+    REPLACEMENT_GAS_INCREMENT = 1.125
+    POLLING_INTERVALL = 0.5
+    # extra seconds callers wait for a result after the last replacement round
+    RESULT_TIMEOUT_MARGIN = 30
+
+    def __init__(self, account:Account, receiptTimeout:float = RECEIPT_TIMEOUT):
+        self._account = account
+        self._receiptTimeout = receiptTimeout
+        self._lock = Lock()
+        self._nonce = None
+        self._pending:Dict[int, PendingTransaction] = {}
+        self.active = True
+
+        worker = Thread(
+            target=self._trackingLoop,
+            args=(TransactionPipeline.POLLING_INTERVALL,),
+            daemon=True)
+
+        worker.start()
+
+    @property
+    def address(self) -> str:
+        return self._account.address
+
+    @property
+    def inFlight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def resultTimeout(self) -> float:
+        return self._receiptTimeout * (TransactionPipeline.MAX_REPLACEMENTS + 1) + TransactionPipeline.RESULT_TIMEOUT_MARGIN
+
+    def stop(self):
+        # pending transactions are no longer tracked, their callers must not wait forever
+        self.active = False
+
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending = {}
+
+        for transaction in pending:
+            if not transaction.done():
+                transaction.set_exception(ValueError('tx {} no longer tracked, pipeline for {} stopped'.format(
+                    transaction.txid,
+                    self.address)))
+
+    def submit(self, contractMethod, *args) -> PendingTransaction:
+        with self._lock:
+            if self._nonce is None:
+                self._syncNonce()
+
+            try:
+                tx = self._send(contractMethod, args, self._nonce)
+            except ValueError as e:
+                if 'nonce' not in str(e).lower():
+                    raise
+
+                # local counter is out of sync (eg transactions sent outside of the pipeline)
+                logging.warning('{}, resyncing nonce for {}'.format(e, self.address))
+                self._syncNonce()
+                tx = self._send(contractMethod, args, self._nonce)
+
+            pending = PendingTransaction(self._nonce, tx, self.resultTimeout)
+            self._pending[self._nonce] = pending
+            self._nonce += 1
+
+        logging.info('tx {} sent from {} with nonce {}'.format(
+            pending.txid,
+            self.address,
+            pending.nonce))
+
+        return pending
+
+    def _send(self, contractMethod, args, nonce:int):
+        return contractMethod(
+            *args,
+            {
+                'from': self._account,
+                'nonce': nonce,
+                'required_confs': 0,
+            })
+
+    def _syncNonce(self):
+        self._nonce = web3.eth.get_transaction_count(self.address, 'pending')
+
+    def _trackingLoop(self, pollingIntervall):
+        while self.active:
+            for pending in list(self._pending.values()):
+                try:
+                    self._track(pending)
+                except Exception as e:
+                    logging.error('tracking tx {} failed: {}'.format(pending.txid, e))
+
+            sleep(pollingIntervall)
+
+    def _track(self, pending:PendingTransaction):
+        # failed by stop() in the meantime
+        if pending.done():
+            return
+
+        status = pending.tx.status
+
+        if status == STATUS_PENDING or status == STATUS_DROPPED:
+            if monotonic() - pending.submittedAt > self._receiptTimeout or status == STATUS_DROPPED:
+                self._replace(pending)
+
+            return
+
+        with self._lock:
+            self._pending.pop(pending.nonce, None)
+
+        TRANSACTION_SECONDS.labels(
+            pending.tx.fn_name or '',
+            'reverted' if status == STATUS_REVERTED else 'mined').observe(monotonic() - pending.createdAt)
+
+        if status == STATUS_REVERTED:
+            pending.set_exception(ValueError('tx {} reverted: {}'.format(
+                pending.txid,
+                pending.tx.revert_msg)))
+        else:
+            pending.set_result(pending.tx)
+
+    def _replace(self, pending:PendingTransaction):
+        if pending.replacements >= TransactionPipeline.MAX_REPLACEMENTS:
+            with self._lock:
+                self._pending.pop(pending.nonce, None)
+
+                # later transactions would queue behind the nonce gap forever
+                self._syncNonce()
+
+            pending.set_exception(ValueError('tx {} not mined after {} replacements'.format(
+                pending.txid,
+                pending.replacements)))
+            return
+
+        # same nonce with higher gas price, also resubmits dropped transactions
+        logging.warning('replacing tx {} with nonce {}'.format(pending.txid, pending.nonce))
+        pending.tx = pending.tx.replace(gas_price=replacementGasPrice(pending.tx.gas_price))
+        pending.submittedAt = monotonic()
+        pending.replacements += 1
+
+
+def replacementGasPrice(gasPrice:int) -> int:
+    # small gas prices (eg 1 wei on ganache) would not change with the increment alone
+    return max(
+        int(gasPrice * TransactionPipeline.REPLACEMENT_GAS_INCREMENT),
+        gasPrice + 1)
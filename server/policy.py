@@ -1,13 +1,47 @@
-from typing import Dict
+from enum import Enum
+from typing import Dict, List
 from pydantic import BaseModel
 
+# token amounts are shown in units of the 6 decimals product token
+AMOUNT_DIVISOR = 10**6
+
 class Policy(BaseModel):
     id:str = None
     object_name:str = None
-    premium:int = None
-    premium_paid:int = None
-    sum_insured:int = None
+    policy_holder:str = None
+    product_id:int = None
+    premium:float = None
+    premium_paid:float = None
+    sum_insured:float = None
     application_state:int = None
     policy_state:int = None
     claims_count:int = None
-    payout_amount:int = None
+    payout_amount:float = None
+
+class PolicyState(str, Enum):
+    ACTIVE = 'active'
+    EXPIRED = 'expired'
+    CLOSED = 'closed'
+
+class PolicySummary(BaseModel):
+    id:str = None
+    object_name:str = None
+    policy_holder:str = None
+    sum_insured:float = None
+    state:PolicyState = None
+    created_block:int = None
+
+class PolicyPage(BaseModel):
+    total:int = 0
+    offset:int = 0
+    limit:int = 0
+    items:List[PolicySummary] = []
+
+class PolicyApplication(BaseModel):
+    object_name:str
+    object_value:int
+
+class PolicyApplicationResult(BaseModel):
+    object_name:str = None
+    process_id:str = None
+    error:str = None
@@ -5,6 +5,8 @@ from brownie import network
 from brownie.network.account import Account
 
 # from scripts.instance import Instance
+from scripts.registry import get_resolver
+from server.rpc import BatchRpc
 from server.util import (
     getContract,
     s2b32
@@ -23,16 +25,20 @@ class GifInstance(object):
         self.registry = getContract(interface.IRegistry, registryAddress)
         self.owner = owner
 
-        isAddress = self.registry.getContract(s2b32('InstanceService'))
-        self.instanceService = getContract(interface.IInstanceService, isAddress)
+        # all services are resolved with a single batched registry request,
+        # addresses cached for an earlier deployment at the same address are dropped
+        resolver = get_resolver(registryAddress, BatchRpc())
+        resolver.clear()
+        addresses = resolver.resolve()
+        self.instanceService = getContract(interface.IInstanceService, addresses['InstanceService'])
 
         logging.info('validating read access: products {}, oracles {}'.format(
             self.instanceService.products(),
             self.instanceService.oracles(),
         ))
 
-        iosAddress = self.instanceService.getInstanceOperatorService()
-        cosAddress = self.instanceService.getComponentOwnerService()        
+        iosAddress = addresses['InstanceOperatorService']
+        cosAddress = addresses['ComponentOwnerService']
 
         logging.info('validating services. ios {} cos {}'.format(
             iosAddress,
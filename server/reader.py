@@ -0,0 +1,87 @@
+from typing import Dict, List
+
+from brownie.network.web3 import web3
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_output_types
+
+from server.policy import AMOUNT_DIVISOR, Policy
+from server.rpc import BatchRpc, ethCall
+
+class PolicyReader(object):
+
+    # instance service views needed to assemble a policy
+    CALLS = [
+        'getMetadata',
+        'getApplication',
+        'getPolicy',
+    ]
+
+    def __init__(self, instanceService, rpc:BatchRpc):
+        self._instanceService = instanceService
+        self._rpc = rpc
+
+    def getPolicy(self, processId:str) -> Policy:
+        return self.getPolicies([processId])[0]
+
+    def getPolicies(self, processIds:List[str]) -> List[Policy]:
+        results = self._rpc.call(self.buildCalls(processIds))
+        return self.decodePolicies(processIds, results)
+
+    def buildCalls(self, processIds:List[str]) -> List[Dict]:
+        return [
+            contractCall(self._instanceService, name, processId)
+            for processId in processIds
+            for name in PolicyReader.CALLS]
+
+    def decodePolicies(self, processIds:List[str], results:List[str]) -> List[Policy]:
+        n = len(PolicyReader.CALLS)
+
+        return [
+            self._toPolicy(processId, results[idx * n:(idx + 1) * n])
+            for idx, processId in enumerate(processIds)]
+
+    def _decode(self, name:str, result:str) -> Dict:
+        fn_abi = self._instanceService.get_function_by_name(name).abi
+        values = decodeResult(self._instanceService, name, result)
+
+        # all calls return a single struct
+        return _named(fn_abi['outputs'][0]['components'], values[0])
+
+    def _toPolicy(self, processId:str, results:List[str]) -> Policy:
+        (metadata, application, policy) = [
+            self._decode(name, result)
+            for name, result in zip(PolicyReader.CALLS, results)]
+
+        object_name = web3.codec.decode_abi(['string'], application['data'])[0]
+
+        return Policy(
+            id = processId,
+            object_name = object_name,
+            policy_holder = metadata['owner'],
+            product_id = metadata['productId'],
+            premium = application['premiumAmount'] / AMOUNT_DIVISOR,
+            premium_paid = policy['premiumPaidAmount'] / AMOUNT_DIVISOR,
+            sum_insured = application['sumInsuredAmount'] / AMOUNT_DIVISOR,
+            application_state = application['state'],
+            policy_state = policy['state'],
+            claims_count = policy['claimsCount'],
+            payout_amount = policy['payoutAmount'] / AMOUNT_DIVISOR)
+
+
+def contractCall(contract, name:str, *args) -> Dict:
+    return ethCall(
+        contract.address,
+        contract.encodeABI(fn_name=name, args=list(args)))
+
+
+def decodeResult(contract, name:str, result:str):
+    fn_abi = contract.get_function_by_name(name).abi
+    return web3.codec.decode_abi(
+        get_abi_output_types(fn_abi),
+        HexBytes(result))
+
+
+def _named(components:List[Dict], values) -> Dict:
+    return {
+        component['name']: value
+        for component, value in zip(components, values)}
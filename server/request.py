@@ -1,9 +1,12 @@
-from typing import Dict
+from typing import Dict, Optional
 from pydantic import BaseModel
 
+from server.category import FireCategory
+
 class Response(BaseModel):
     open:bool = True
-    fire_category:str = None
+    # explicitly None for open requests restored from the event store
+    fire_category:Optional[str] = None
 
 class Request(BaseModel):
     log_id:str = None
@@ -11,3 +14,12 @@ class Request(BaseModel):
     event:str = None
     args:Dict = None
     response:Response = None
+
+class OracleResponse(BaseModel):
+    request_id:int
+    fire_category:FireCategory
+
+class OracleResponseResult(BaseModel):
+    request_id:int = None
+    tx_hash:str = None
+    error:str = None
@@ -0,0 +1,161 @@
+import logging
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Set, Tuple
+
+from pydantic import BaseModel
+
+from server.request import Request, Response
+from server.store import EventStore
+
+class RequestStoreStatus(BaseModel):
+    open_requests:int = 0
+    max_open_requests:int = None
+    responded:int = 0
+    expired:int = 0
+    spilled:int = 0
+    store_reads:int = 0
+
+
+class RequestStore(object):
+
+    # only open requests are kept in memory, answered, expired and overflowing
+    # requests are only kept in the event store
+    MAX_OPEN_REQUESTS = 10000
+
+    def __init__(self, store:EventStore = None, maxOpenRequests:int = MAX_OPEN_REQUESTS):
+        self._store = store
+        self._maxOpenRequests = maxOpenRequests
+        self._lock = Lock()
+
+        # request id -> (log id, address, object name)
+        self._entries:OrderedDict = OrderedDict()
+        self._objectNames:Dict[str, Set[int]] = {}
+
+        self._status = RequestStoreStatus(max_open_requests = maxOpenRequests)
+
+    @property
+    def status(self) -> RequestStoreStatus:
+        with self._lock:
+            return self._status.copy(update = {'open_requests': len(self._entries)})
+
+    def restore(self):
+        if self._store is None:
+            return
+
+        requests = self._store.getOpenRequests(self._maxOpenRequests)
+
+        with self._lock:
+            for requestId, request in requests.items():
+                self._put(requestId, (request.log_id, request.address, request.args['objectName']))
+
+        logging.info('restored {} open oracle requests'.format(len(requests)))
+
+    def openRequests(self) -> List[Request]:
+        with self._lock:
+            entries = list(self._entries.items())
+
+        return [_toRequest(requestId, entry) for (requestId, entry) in entries]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._objectNames.clear()
+
+    def add(self, event) -> Request:
+        # returns None for requests that are already known
+        requestId = event.args['requestId']
+
+        with self._lock:
+            if requestId in self._entries:
+                return None
+
+        if self._store:
+            request = self._store.addOracleRequest(event)
+        else:
+            request = _toRequest(requestId, (
+                '({},{},{})'.format(event.blockNumber, event.transactionIndex, event.logIndex),
+                event.address,
+                event.args['objectName']))
+
+        if request and request.response.open:
+            with self._lock:
+                self._put(requestId, (request.log_id, request.address, request.args['objectName']))
+
+        return request
+
+    def get(self, requestId:int) -> Request:
+        with self._lock:
+            entry = self._entries.get(requestId)
+            if entry is None and self._store:
+                self._status.store_reads += 1
+
+        if entry:
+            return _toRequest(requestId, entry)
+
+        if self._store:
+            return self._store.getRequest(requestId)
+
+        return None
+
+    def setResponded(self, requestId:int, fireCategory:str):
+        with self._lock:
+            if self._remove(requestId):
+                self._status.responded += 1
+
+        if self._store:
+            self._store.setResponded(requestId, fireCategory)
+
+    def expire(self, objectName:str):
+        # the policy for the object is expired, its open requests are no longer kept in memory
+        with self._lock:
+            for requestId in list(self._objectNames.get(objectName, [])):
+                self._remove(requestId)
+                self._status.expired += 1
+
+    def __contains__(self, requestId:int) -> bool:
+        return self.get(requestId) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, requestId:int, entry:Tuple[str, str, str]):
+        self._entries[requestId] = entry
+        self._objectNames.setdefault(entry[2], set()).add(requestId)
+
+        while len(self._entries) > self._maxOpenRequests:
+            (oldestId, oldest) = self._entries.popitem(last=False)
+            self._removeObjectName(oldestId, oldest)
+            self._status.spilled += 1
+
+    def _remove(self, requestId:int) -> bool:
+        entry = self._entries.pop(requestId, None)
+        if entry is None:
+            return False
+
+        self._removeObjectName(requestId, entry)
+        return True
+
+    def _removeObjectName(self, requestId:int, entry:Tuple[str, str, str]):
+        requestIds = self._objectNames.get(entry[2])
+        if requestIds is None:
+            return
+
+        requestIds.discard(requestId)
+        if len(requestIds) == 0:
+            del self._objectNames[entry[2]]
+
+
+def _toRequest(requestId:int, entry:Tuple[str, str, str]) -> Request:
+    (logId, address, objectName) = entry
+
+    return Request(
+        log_id = logId,
+        address = address,
+        event = 'LogFireOracleRequest',
+        args = {
+            'requestId': requestId,
+            'objectName': objectName,
+        },
+        response = Response(open = True))
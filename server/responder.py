@@ -0,0 +1,224 @@
+import hashlib
+import json
+import logging
+import os
+
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import monotonic
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+from server.category import FireCategory
+from server.metrics import RESPONDER_LATENCY_SECONDS
+from server.request import OracleResponse, Request
+
+class ResponderStatus(BaseModel):
+    workers:int = None
+    batch_size:int = None
+    data_provider:str = None
+    queued:int = 0
+    responded:int = 0
+    failed:int = 0
+    last_latency:float = None
+    average_latency:float = None
+    max_latency:float = None
+
+
+class DataProvider(object):
+
+    # raises ValueError if no fire category is available for the object
+    def getFireCategory(self, objectName:str) -> FireCategory:
+        raise NotImplementedError
+
+
+class FileDataProvider(DataProvider):
+
+    # json file mapping object names to fire categories, reloaded when changed
+    def __init__(self, path:str):
+        self._path = path
+        self._modified = None
+        self._categories:Dict[str, FireCategory] = {}
+
+    def getFireCategory(self, objectName:str) -> FireCategory:
+        modified = os.path.getmtime(self._path)
+        if modified != self._modified:
+            with open(self._path) as f:
+                self._categories = {
+                    name: FireCategory(category)
+                    for name, category in json.load(f).items()}
+
+            self._modified = modified
+
+        if objectName not in self._categories:
+            raise ValueError('no fire category for object {} in {}'.format(objectName, self._path))
+
+        return self._categories[objectName]
+
+
+class FakeDataProvider(DataProvider):
+
+    # stable pseudo random category per object name
+    def getFireCategory(self, objectName:str) -> FireCategory:
+        categories = list(FireCategory)
+        digest = hashlib.sha256(objectName.encode('utf-8')).digest()
+        return categories[digest[0] % len(categories)]
+
+
+class _Item(object):
+
+    def __init__(self, requestId:int, objectName:str):
+        self.requestId = requestId
+        self.objectName = objectName
+        self.receivedAt = monotonic()
+
+
+class Responder(object):
+
+    WORKERS = 4
+    BATCH_SIZE = 10
+    # seconds a worker waits for more requests to fill a batch
+    BATCH_WAIT = 0.5
+
+    # weight of the latest sample in the moving latency average
+    LATENCY_WEIGHT = 0.1
+
+    def __init__(
+        self,
+        node,
+        provider:DataProvider,
+        workers:int = WORKERS,
+        batchSize:int = BATCH_SIZE,
+        batchWait:float = BATCH_WAIT
+    ):
+        self._node = node
+        self._provider = provider
+        self._batchSize = batchSize
+        self._batchWait = batchWait
+        self._queue = Queue()
+        self._lock = Lock()
+        self._pending = set()
+        self.active = True
+
+        self._status = ResponderStatus(
+            workers = workers,
+            batch_size = batchSize,
+            data_provider = type(provider).__name__)
+
+        for _ in range(workers):
+            worker = Thread(
+                target=self._workLoop,
+                daemon=True)
+
+            worker.start()
+
+    @property
+    def status(self) -> ResponderStatus:
+        with self._lock:
+            return self._status.copy(update = {'queued': len(self._pending)})
+
+    def submit(self, request:Request):
+        requestId = request.args['requestId']
+
+        with self._lock:
+            if requestId in self._pending:
+                return
+
+            self._pending.add(requestId)
+
+        self._queue.put(_Item(requestId, request.args['objectName']))
+
+    def _workLoop(self):
+        while self.active:
+            batch = self._nextBatch()
+            if len(batch) > 0:
+                self._respond(batch)
+
+    def _nextBatch(self) -> List[_Item]:
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except Empty:
+            return []
+
+        deadline = monotonic() + self._batchWait
+        while len(batch) < self._batchSize:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+
+        return batch
+
+    def _respond(self, batch:List[_Item]):
+        items = []
+        responses = []
+
+        for item in batch:
+            try:
+                responses.append(OracleResponse(
+                    request_id = item.requestId,
+                    fire_category = self._provider.getFireCategory(item.objectName)))
+                items.append(item)
+            except Exception as e:
+                logging.error('no response for request {}: {}'.format(item.requestId, e))
+                self._finish([item], False)
+
+        if len(responses) == 0:
+            return
+
+        if len(responses) > 1:
+            try:
+                self._node.submitResponsesBatch(responses).result()
+            except Exception as e:
+                # a single failing response (e.g. already answered) reverts the whole batch
+                logging.warning('batch response to requests {} failed ({}), responding one by one'.format(
+                    [response.request_id for response in responses],
+                    e))
+            else:
+                for response in responses:
+                    self._node.setResponded(response)
+
+                logging.info('responded to requests {}'.format(
+                    [response.request_id for response in responses]))
+
+                self._finish(items, True)
+                return
+
+        for (item, response) in zip(items, responses):
+            try:
+                self._node.submitResponse(response.request_id, response.fire_category).result()
+            except Exception as e:
+                logging.error('responding to request {} failed: {}'.format(response.request_id, e))
+                self._finish([item], False)
+                continue
+
+            self._node.setResponded(response)
+            logging.info('responded to request {}'.format(response.request_id))
+            self._finish([item], True)
+
+    def _finish(self, items:List[_Item], succeeded:bool):
+        now = monotonic()
+
+        with self._lock:
+            for item in items:
+                self._pending.discard(item.requestId)
+
+                if not succeeded:
+                    self._status.failed += 1
+                    continue
+
+                # time from the request being seen by the watcher to the mined response
+                latency = now - item.receivedAt
+                average = self._status.average_latency
+                RESPONDER_LATENCY_SECONDS.observe(latency)
+
+                self._status.responded += 1
+                self._status.last_latency = latency
+                self._status.max_latency = max(latency, self._status.max_latency or 0)
+                self._status.average_latency = latency if average is None else (
+                    (1 - Responder.LATENCY_WEIGHT) * average + Responder.LATENCY_WEIGHT * latency)
@@ -0,0 +1,83 @@
+import logging
+
+from time import perf_counter
+from typing import Dict, List
+
+import aiohttp
+
+from brownie.network.web3 import web3
+from fastapi.concurrency import run_in_threadpool
+
+from scripts.rpc import JsonRpcBatch, _payloads, _results
+from server.metrics import observeBatch
+
+class BatchRpc(JsonRpcBatch):
+
+    # records rpc metrics for each batch
+    def _observe(self, payloads:List[Dict], duration:float):
+        observeBatch(payloads, duration)
+
+
+class AsyncBatchRpc(object):
+
+    TIMEOUT = 30
+
+    # size of the pooled connection session shared by all requests
+    CONNECTIONS = 100
+
+    def __init__(self, endpoint:str = None, connections:int = CONNECTIONS):
+        self._endpoint = endpoint
+        self._connections = connections
+        self._session = None
+        self._syncRpc = None
+
+    def _getSession(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._connections),
+                timeout=aiohttp.ClientTimeout(total=AsyncBatchRpc.TIMEOUT))
+
+        return self._session
+
+    def _getSyncRpc(self) -> BatchRpc:
+        if self._syncRpc is None or self._syncRpc._provider is not web3.provider:
+            self._syncRpc = BatchRpc(web3.provider)
+
+        return self._syncRpc
+
+    async def call(self, calls:List[Dict]) -> List:
+        if len(calls) == 0:
+            return []
+
+        # resolved on first use, the network may be connected after construction
+        endpoint = self._endpoint or getattr(web3.provider, 'endpoint_uri', None)
+
+        # websocket and ipc providers have no http batch endpoint, their blocking calls go to the threadpool
+        if not str(endpoint).startswith('http'):
+            return await run_in_threadpool(self._getSyncRpc().call, calls)
+
+        payloads = _payloads(calls)
+        session = self._getSession()
+        start = perf_counter()
+
+        async with session.post(endpoint, json=payloads) as response:
+            response.raise_for_status()
+            responses = await response.json()
+
+        observeBatch(payloads, perf_counter() - start)
+
+        logging.debug('async rpc batch with {} requests'.format(len(payloads)))
+        return _results(responses)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def ethCall(to:str, data:str, block='latest') -> Dict:
+    return {
+        'method': 'eth_call',
+        'params': [{'to': to, 'data': data}, block],
+    }
+
@@ -0,0 +1,357 @@
+import json
+import logging
+import sqlite3
+
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from server.cache import processIdKey
+from server.category import fireCategoryFromResponse
+from server.policy import AMOUNT_DIVISOR, PolicyState, PolicySummary
+from server.request import Request, Response
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS oracle_requests (
+    request_id INTEGER PRIMARY KEY,
+    object_name TEXT NOT NULL,
+    address TEXT,
+    block_number INTEGER NOT NULL,
+    transaction_index INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    responded INTEGER NOT NULL DEFAULT 0,
+    fire_category TEXT
+);
+
+CREATE INDEX IF NOT EXISTS oracle_requests_object_name ON oracle_requests (object_name);
+
+CREATE TABLE IF NOT EXISTS product_events (
+    block_number INTEGER NOT NULL,
+    transaction_index INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    process_id TEXT,
+    request_id INTEGER,
+    object_name TEXT,
+    args TEXT,
+    PRIMARY KEY (block_number, transaction_index, log_index)
+);
+
+CREATE INDEX IF NOT EXISTS product_events_process_id ON product_events (process_id);
+CREATE INDEX IF NOT EXISTS product_events_request_id ON product_events (request_id);
+CREATE INDEX IF NOT EXISTS product_events_object_name ON product_events (object_name);
+
+CREATE TABLE IF NOT EXISTS policies (
+    process_id TEXT PRIMARY KEY,
+    object_name TEXT,
+    policy_holder TEXT,
+    sum_insured TEXT,
+    state TEXT NOT NULL,
+    created_block INTEGER,
+    created_position INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS policies_object_name ON policies (object_name);
+CREATE INDEX IF NOT EXISTS policies_state ON policies (state, created_position);
+'''
+
+REQUEST_QUERY = (
+    'SELECT request_id, object_name, address, block_number, transaction_index, log_index, responded, fire_category '
+    'FROM oracle_requests ')
+
+# keys in meta table
+CHECKPOINT = 'checkpoint.{}'
+CHECKPOINT_HASH = 'checkpoint_hash.{}'
+PRODUCT_ADDRESS = 'product_address'
+ORACLE_ADDRESS = 'oracle_address'
+CHAIN_ID = 'chain_id'
+GENESIS_HASH = 'genesis_hash'
+
+class EventStore(object):
+
+    PATH = 'fire_server.db'
+
+    # policy state after a product event, other events leave the state unchanged
+    STATES = {
+        'LogFirePolicyExpired': PolicyState.EXPIRED,
+        'LogFirePayoutExecuted': PolicyState.CLOSED,
+    }
+
+    def __init__(self, path:str = PATH):
+        self._path = path
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+        logging.info('event store {} opened'.format(path))
+
+    def bind(self, productAddress:str, oracleAddress:str, chainId:int = None, genesisHash:str = None):
+        # a store only holds the events of a single product/oracle pair on a single chain.
+        # a restarted ganache reuses chain id and contract addresses but has a new genesis block
+        binding = {
+            PRODUCT_ADDRESS: productAddress,
+            ORACLE_ADDRESS: oracleAddress,
+            CHAIN_ID: str(chainId) if chainId is not None else None,
+            GENESIS_HASH: genesisHash,
+        }
+
+        if all(self._getMeta(name) == value for name, value in binding.items()):
+            return
+
+        logging.info('binding event store to product {} and oracle {} on chain {} with genesis {}'.format(
+            productAddress,
+            oracleAddress,
+            chainId,
+            genesisHash))
+
+        with self._lock, self._db:
+            for table in ['meta', 'oracle_requests', 'product_events', 'policies']:
+                self._db.execute('DELETE FROM {}'.format(table))
+
+            for name, value in binding.items():
+                self._setMeta(name, value)
+
+    def getCheckpoint(self, name:str) -> int:
+        # last block fully processed by the named watcher
+        value = self._getMeta(CHECKPOINT.format(name))
+        return int(value) if value is not None else None
+
+    def getCheckpointHash(self, name:str) -> bytes:
+        value = self._getMeta(CHECKPOINT_HASH.format(name))
+        return bytes.fromhex(value) if value else None
+
+    def setCheckpoint(self, name:str, blockNumber:int, blockHash:bytes = None):
+        with self._lock, self._db:
+            self._setMeta(CHECKPOINT.format(name), str(blockNumber))
+            self._setMeta(CHECKPOINT_HASH.format(name), blockHash.hex() if blockHash else None)
+
+    def rollback(self, fromBlock:int):
+        # drop events from orphaned blocks and restore the state before them
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE oracle_requests SET responded = 0, fire_category = NULL WHERE request_id IN '
+                '(SELECT request_id FROM product_events WHERE event = ? AND block_number >= ?)',
+                ('LogFireOracleCallbackReceived', fromBlock))
+
+            processIds = [
+                row[0] for row in self._db.execute(
+                    'SELECT DISTINCT process_id FROM product_events WHERE block_number >= ?',
+                    (fromBlock,)).fetchall()]
+
+            requests = self._db.execute(
+                'DELETE FROM oracle_requests WHERE block_number >= ?',
+                (fromBlock,)).rowcount
+            events = self._db.execute(
+                'DELETE FROM product_events WHERE block_number >= ?',
+                (fromBlock,)).rowcount
+            self._db.execute(
+                'DELETE FROM policies WHERE created_block >= ?',
+                (fromBlock,))
+
+            for processId in processIds:
+                self._db.execute(
+                    'UPDATE policies SET state = ? WHERE process_id = ?',
+                    (self._policyState(processId).value, processId))
+
+        logging.warning('rolled back blocks from {}: {} requests, {} product events'.format(
+            fromBlock,
+            requests,
+            events))
+
+    def addOracleRequest(self, event) -> Request:
+        # returns the stored request, None if the request was already stored
+        with self._lock, self._db:
+            if not self._addOracleRequest(event):
+                return None
+
+            row = self._db.execute(
+                REQUEST_QUERY + 'WHERE request_id = ?',
+                (event.args['requestId'],)).fetchone()
+
+        return _toRequest(row)
+
+    def addProductEvent(self, event):
+        with self._lock, self._db:
+            self._addProductEvent(event)
+
+    def setResponded(self, requestId:int, fireCategory:str):
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE oracle_requests SET responded = 1, fire_category = ? WHERE request_id = ?',
+                (fireCategory, requestId))
+
+    def getRequest(self, requestId:int) -> Request:
+        with self._lock:
+            row = self._db.execute(
+                REQUEST_QUERY + 'WHERE request_id = ?',
+                (requestId,)).fetchone()
+
+        return _toRequest(row) if row else None
+
+    def getOpenRequests(self, limit:int) -> Dict[int, Request]:
+        # most recent open requests
+        with self._lock:
+            rows = self._db.execute(
+                REQUEST_QUERY + 'WHERE responded = 0 ORDER BY request_id DESC LIMIT ?',
+                (limit,)).fetchall()
+
+        return {
+            row[0]: _toRequest(row)
+            for row in reversed(rows)}
+
+    def getRequestsAfter(self, position:Tuple[int, int, int]) -> List[Tuple[Tuple[int, int, int], Request]]:
+        with self._lock:
+            rows = self._db.execute(
+                REQUEST_QUERY + 'WHERE (block_number, transaction_index, log_index) > (?, ?, ?) '
+                'ORDER BY block_number, transaction_index, log_index',
+                position).fetchall()
+
+        return [
+            ((row[3], row[4], row[5]), _toRequest(row))
+            for row in rows]
+
+    def getPolicies(self) -> List[PolicySummary]:
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT process_id, object_name, policy_holder, sum_insured, state, created_block '
+                'FROM policies ORDER BY created_position').fetchall()
+
+        return [
+            PolicySummary(
+                id = row[0],
+                object_name = row[1],
+                policy_holder = row[2],
+                sum_insured = int(row[3]) / AMOUNT_DIVISOR,
+                state = PolicyState(row[4]),
+                created_block = row[5])
+            for row in rows]
+
+    def close(self):
+        self._db.close()
+
+    def _getMeta(self, name:str) -> str:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT value FROM meta WHERE name = ?',
+                (name,)).fetchone()
+
+        return row[0] if row else None
+
+    def _setMeta(self, name:str, value:str):
+        self._db.execute(
+            'INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+            (name, value))
+
+    def _policyState(self, processId:str) -> PolicyState:
+        row = self._db.execute(
+            'SELECT event FROM product_events WHERE process_id = ? AND event IN ({}) '
+            'ORDER BY block_number DESC, transaction_index DESC, log_index DESC LIMIT 1'.format(
+                ', '.join('?' for _ in EventStore.STATES)),
+            (processId, *EventStore.STATES)).fetchone()
+
+        return EventStore.STATES[row[0]] if row else PolicyState.ACTIVE
+
+    def _addOracleRequest(self, event) -> bool:
+        requestId = event.args['requestId']
+        inserted = self._db.execute(
+            'INSERT OR IGNORE INTO oracle_requests '
+            '(request_id, object_name, address, block_number, transaction_index, log_index) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                requestId,
+                event.args['objectName'],
+                event.address,
+                event.blockNumber,
+                event.transactionIndex,
+                event.logIndex,
+            )).rowcount
+
+        if inserted == 0:
+            return False
+
+        # the product watcher may have seen the oracle callback before the request
+        callback = self._db.execute(
+            'SELECT args FROM product_events WHERE event = ? AND request_id = ?',
+            ('LogFireOracleCallbackReceived', requestId)).fetchone()
+
+        if callback:
+            self._db.execute(
+                'UPDATE oracle_requests SET responded = 1, fire_category = ? WHERE request_id = ?',
+                (fireCategoryFromResponse(json.loads(callback[0])['fireCategory']), requestId))
+
+        return True
+
+    def _addProductEvent(self, event):
+        processId = processIdKey(event.args['processId'])
+
+        inserted = self._db.execute(
+            'INSERT OR IGNORE INTO product_events '
+            '(block_number, transaction_index, log_index, event, process_id, request_id, object_name, args) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                event.blockNumber,
+                event.transactionIndex,
+                event.logIndex,
+                event.event,
+                processId,
+                event.args.get('requestId'),
+                event.args.get('objectName'),
+                json.dumps(_jsonArgs(event.args)),
+            )).rowcount
+
+        # already ingested
+        if inserted == 0:
+            return
+
+        if event.event == 'LogFirePolicyCreated':
+            self._db.execute(
+                'INSERT OR IGNORE INTO policies '
+                '(process_id, object_name, policy_holder, sum_insured, state, created_block, created_position) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    processId,
+                    event.args['objectName'],
+                    event.args['policyHolder'],
+                    str(event.args['sumInsured']),
+                    PolicyState.ACTIVE.value,
+                    event.blockNumber,
+                    _positionKey(event),
+                ))
+
+        elif event.event in EventStore.STATES:
+            self._db.execute(
+                'UPDATE policies SET state = ? WHERE process_id = ?',
+                (EventStore.STATES[event.event].value, processId))
+
+
+def _positionKey(event) -> int:
+    # sortable single integer for the position of a log in the chain
+    (blockNumber, transactionIndex, logIndex) = (event.blockNumber, event.transactionIndex, event.logIndex)
+    return (blockNumber * 100000 + transactionIndex) * 100000 + logIndex
+
+
+def _jsonArgs(args) -> Dict:
+    return {
+        name: '0x{}'.format(bytes(value).hex()) if isinstance(value, (bytes, bytearray)) else value
+        for name, value in dict(args).items()}
+
+
+def _toRequest(row) -> Request:
+    (requestId, objectName, address, blockNumber, transactionIndex, logIndex, responded, fireCategory) = row
+
+    return Request(
+        log_id = '({},{},{})'.format(blockNumber, transactionIndex, logIndex),
+        address = address,
+        event = 'LogFireOracleRequest',
+        args = {
+            'requestId': requestId,
+            'objectName': objectName,
+        },
+        response = Response(
+            open = responded == 0,
+            fire_category = fireCategory))
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+from threading import Lock
+from typing import AsyncIterator, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from server.request import Request
+from server.store import EventStore
+
+def toCursor(position:Tuple[int, int, int]) -> str:
+    return '{}-{}-{}'.format(*position)
+
+
+def fromCursor(cursor:str) -> Tuple[int, int, int]:
+    try:
+        (blockNumber, transactionIndex, logIndex) = [int(part) for part in cursor.split('-')]
+        return (blockNumber, transactionIndex, logIndex)
+    except ValueError:
+        raise ValueError('invalid cursor {}, expected <block>-<tx index>-<log index>'.format(cursor))
+
+
+class _Subscription(object):
+
+    def __init__(self, loop:asyncio.AbstractEventLoop, maxSize:int):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxSize)
+        self.overflowed = False
+
+    def offer(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class RequestStream(object):
+
+    # slow subscribers are dropped and need to resume from their last cursor
+    QUEUE_SIZE = 1000
+    KEEPALIVE = 15.0
+
+    def __init__(self):
+        self._lock = Lock()
+        self._subscriptions = set()
+        self._store:EventStore = None
+
+    def setStore(self, store:EventStore):
+        self._store = store
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, position:Tuple[int, int, int], request:Request):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+
+        # called from watcher threads, hand over to the event loop of each subscriber
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.offer, (position, request))
+
+    async def subscribe(self, cursor:str = None) -> AsyncIterator[Tuple[str, Request]]:
+        subscription = _Subscription(asyncio.get_running_loop(), RequestStream.QUEUE_SIZE)
+
+        # register before replaying so that no request falls in between
+        with self._lock:
+            self._subscriptions.add(subscription)
+
+        try:
+            lastPosition = None
+
+            if cursor is not None and self._store is not None:
+                # sqlite query runs in the threadpool, not on the event loop
+                replay = await run_in_threadpool(self._store.getRequestsAfter, fromCursor(cursor))
+
+                for (position, request) in replay:
+                    lastPosition = position
+                    yield (toCursor(position), request)
+
+            while not subscription.overflowed:
+                try:
+                    (position, request) = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        RequestStream.KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield (None, None)
+                    continue
+
+                if lastPosition is not None and position <= lastPosition:
+                    continue
+
+                lastPosition = position
+                yield (toCursor(position), request)
+
+            logging.warning('request stream subscriber too slow, subscription closed')
+        finally:
+            with self._lock:
+                self._subscriptions.discard(subscription)
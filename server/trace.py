@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+
+from contextvars import ContextVar
+from queue import Queue
+from threading import Thread
+from time import time_ns
+from typing import AsyncIterator, Dict, List
+
+# trace of the api request being handled, None outside of api requests
+TRACE:ContextVar = ContextVar('trace', default=None)
+
+SERVICE_NAME = 'fire-server'
+
+
+class Span(object):
+
+    def __init__(self, traceId:str, parentId:str, name:str, attributes:Dict, start:int, end:int):
+        self.traceId = traceId
+        self.spanId = os.urandom(8).hex()
+        self.parentId = parentId
+        self.name = name
+        self.attributes = attributes
+        self.start = start
+        self.end = end
+
+    def dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'duration_ms': round((self.end - self.start) / 10**6, 3),
+            **self.attributes,
+        }
+
+    def otlp(self) -> Dict:
+        # otlp json encoding of a span
+        return {
+            'traceId': self.traceId,
+            'spanId': self.spanId,
+            'parentSpanId': self.parentId or '',
+            'name': self.name,
+            'kind': 3 if self.parentId else 2,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [
+                {'key': key, 'value': _otlpValue(value)}
+                for key, value in self.attributes.items()
+                if value is not None],
+        }
+
+
+class Trace(object):
+
+    def __init__(self, route:str):
+        self.traceId = os.urandom(16).hex()
+        self.rootId = os.urandom(8).hex()
+        self.route = route
+        self.start = time_ns()
+        self.end = None
+        self.statusCode = None
+        self.spans:List[Span] = []
+
+    def addSpan(self, name:str, attributes:Dict, start:int, end:int):
+        # called from the event loop and threadpool threads of the request
+        self.spans.append(Span(self.traceId, self.rootId, name, attributes, start, end))
+
+    def finish(self, statusCode:int):
+        self.end = time_ns()
+        self.statusCode = statusCode
+
+    @property
+    def rpcCount(self) -> int:
+        return sum(span.attributes.get('rpc.calls', 1) for span in self.spans)
+
+    @property
+    def rpcDuration(self) -> float:
+        return sum(span.end - span.start for span in self.spans) / 10**6
+
+    def summary(self) -> Dict:
+        return {
+            'trace_id': self.traceId,
+            'route': self.route,
+            'rpc_count': self.rpcCount,
+            'rpc_duration_ms': round(self.rpcDuration, 3),
+            'spans': [span.dict() for span in self.spans],
+        }
+
+    def otlp(self) -> Dict:
+        root = Span(self.traceId, None, self.route, {'http.status_code': self.statusCode}, self.start, self.end)
+        root.spanId = self.rootId
+
+        return {
+            'resourceSpans': [{
+                'resource': {
+                    'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}],
+                },
+                'scopeSpans': [{
+                    'scope': {'name': __name__},
+                    'spans': [root.otlp()] + [span.otlp() for span in self.spans],
+                }],
+            }],
+        }
+
+
+class FileSpanExporter(object):
+
+    # one otlp json document per line and trace, written by a background
+    # thread to keep file i/o off the event loop
+    def __init__(self, path:str):
+        self._path = path
+        self._queue = Queue()
+
+        worker = Thread(
+            target=self._writeLoop,
+            daemon=True)
+
+        worker.start()
+
+    def export(self, trace:Trace):
+        self._queue.put(trace)
+
+    def flush(self):
+        # blocks until all exported traces are written
+        self._queue.join()
+
+    def close(self):
+        # pending traces are still written before the worker stops
+        self._queue.put(None)
+
+    def _writeLoop(self):
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                self._queue.task_done()
+                return
+
+            try:
+                with open(self._path, 'a') as f:
+                    f.write(json.dumps(trace.otlp()) + '\n')
+            except Exception as e:
+                logging.error('exporting trace {} failed: {}'.format(trace.traceId, e))
+            finally:
+                self._queue.task_done()
+
+
+_exporter:FileSpanExporter = None
+
+
+def setExporter(exporter:FileSpanExporter):
+    global _exporter
+
+    if _exporter is not None:
+        _exporter.close()
+
+    _exporter = exporter
+
+    logging.info('trace exporter set to {}'.format(exporter._path if exporter else None))
+
+
+def export(trace:Trace):
+    if _exporter is None:
+        return
+
+    try:
+        _exporter.export(trace)
+    except Exception as e:
+        logging.error('exporting trace {} failed: {}'.format(trace.traceId, e))
+
+
+async def finishAfterBody(body:AsyncIterator, trace:Trace, statusCode:int) -> AsyncIterator:
+    # ends and exports the trace once the response body is sent
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        trace.finish(statusCode)
+        export(trace)
+
+
+def addSpan(name:str, attributes:Dict, start:int, end:int):
+    trace = TRACE.get()
+    if trace is not None:
+        trace.addSpan(name, attributes, start, end)
+
+
+def _otlpValue(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+
+    return {'stringValue': str(value)}
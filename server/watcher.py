@@ -1,52 +1,164 @@
 import logging
 
-from threading import Thread
-from time import sleep
-from typing import Dict
-
-from brownie.project.Project import FireOracle
-
-from server.fire import Fire
-from server.request import Request
+from server.artifacts import getArtifact
+from server.cache import PolicyCache, processIdKey
+from server.category import fireCategoryFromResponse
+from server.index import PolicyIndex
+from server.ingest import LogIngestor
+from server.policy import AMOUNT_DIVISOR, PolicyState, PolicySummary
+from server.request_store import RequestStore
+from server.responder import Responder
+from server.store import EventStore
+from server.stream import RequestStream
 from server.util import getWeb3Contract
 
 class FireOracleWatcher(object):
 
-    def __init__(self, fire:Fire, events:Dict[int, Request]):
-        self._events = events
-        self.active = True
+    EVENTS = ['LogFireOracleRequest']
 
-        contract = getWeb3Contract(FireOracle, fire.oracle.contract.address)
-        logMoveFilter = contract.events.LogFireOracleRequest.createFilter(
-            fromBlock='latest')
+    def __init__(
+        self,
+        ingestor:LogIngestor,
+        oracleAddress:str,
+        requests:RequestStore,
+        stream:RequestStream = None,
+        responder:Responder = None
+    ):
+        self._requests = requests
+        self._stream = stream
+        self._responder = responder
 
-        worker = Thread(
-            target=self._eventLoop, 
-            args=(logMoveFilter, 1), 
-            daemon=True)
-    
-        worker.start()
-
-    def _eventLoop(self, eventFilter, pollingIntervall):
-        while self.active:
-            for event in eventFilter.get_new_entries():
-                self._handleEvent(event)
-        
-            sleep(pollingIntervall)
+        ingestor.register(
+            getWeb3Contract(getArtifact('FireOracle'), oracleAddress),
+            FireOracleWatcher.EVENTS,
+            self._handleEvent)
 
     def _handleEvent(self, event):
-        request = Request(
-            log_id = '({},{},{})'.format(
-                event.blockNumber,
-                event.transactionIndex,
-                event.logIndex),
-            address = event.address,
-            event = event.event,
-            args = dict(event.args))
-        
         requestId = event.args['requestId']
-        self._events[requestId] = request
 
-        logging.info('events[{}] = {}'.format(
+        # request store persists the request, replayed requests are already known
+        request = self._requests.add(event)
+        if request is None:
+            return
+
+        # publish after storing, subscribers resuming from a cursor read the store
+        if self._stream:
+            self._stream.publish(
+                (event.blockNumber, event.transactionIndex, event.logIndex),
+                request)
+
+        if self._responder and request.response.open:
+            self._responder.submit(request)
+
+        logging.info('requests[{}] = {}'.format(
             requestId, 
-            request))
\ No newline at end of file
+            request))
+
+
+class FireProductWatcher(object):
+
+    # product events that change the state of the policy for a process id
+    EVENTS = [
+        'LogFirePolicyCreated',
+        'LogFirePolicyExpired',
+        'LogFireOracleCallbackReceived',
+        'LogFireClaimConfirmed',
+        'LogFirePayoutExecuted',
+    ]
+
+    # policy state after the event, events not listed leave the state unchanged
+    STATES = {
+        'LogFirePolicyCreated': PolicyState.ACTIVE,
+        'LogFirePolicyExpired': PolicyState.EXPIRED,
+        'LogFirePayoutExecuted': PolicyState.CLOSED,
+    }
+
+    def __init__(
+        self,
+        ingestor:LogIngestor,
+        productAddress:str,
+        cache:PolicyCache,
+        index:PolicyIndex = None,
+        store:EventStore = None,
+        requests:RequestStore = None
+    ):
+        self._cache = cache
+        self._index = index
+        self._store = store
+        self._requests = requests
+
+        ingestor.register(
+            getWeb3Contract(getArtifact('FireProduct'), productAddress),
+            FireProductWatcher.EVENTS,
+            self._handleEvent)
+
+        ingestor.onNewHead(self._cache.setBlockNumber)
+
+    def _handleEvent(self, event):
+        processId = event.args['processId']
+        self._cache.invalidate(processId)
+
+        if self._index is not None:
+            self._indexEvent(event)
+
+        if self._store:
+            self._store.addProductEvent(event)
+
+        # answered and expired requests are evicted from memory
+        if self._requests is not None:
+            if event.event == 'LogFireOracleCallbackReceived':
+                self._requests.setResponded(
+                    event.args['requestId'],
+                    fireCategoryFromResponse(event.args['fireCategory']))
+            elif event.event == 'LogFirePolicyExpired':
+                self._requests.expire(event.args['objectName'])
+
+        logging.info('{} for {}, policy cache entry invalidated'.format(
+            event.event,
+            processId))
+
+    def _indexEvent(self, event):
+        if event.event == 'LogFirePolicyCreated':
+            self._index.add(PolicySummary(
+                id = processIdKey(event.args['processId']),
+                object_name = event.args['objectName'],
+                policy_holder = event.args['policyHolder'],
+                sum_insured = event.args['sumInsured'] / AMOUNT_DIVISOR,
+                state = PolicyState.ACTIVE,
+                created_block = event.blockNumber))
+
+        elif event.event in FireProductWatcher.STATES:
+            self._index.setState(
+                event.args['processId'],
+                FireProductWatcher.STATES[event.event])
+
+
+class GifPolicyWatcher(object):
+
+    # gif policy module events, the module is shared by all products of the instance
+    EVENTS = [
+        'LogMetadataStateChanged',
+        'LogApplicationStateChanged',
+        'LogPolicyStateChanged',
+        'LogPremiumCollected',
+        'LogClaimCreated',
+        'LogClaimStateChanged',
+        'LogPayoutCreated',
+        'LogPayoutProcessed',
+    ]
+
+    def __init__(self, ingestor:LogIngestor, policyController, policyAddress:str, cache:PolicyCache):
+        self._cache = cache
+
+        ingestor.register(
+            getWeb3Contract(policyController, policyAddress),
+            GifPolicyWatcher.EVENTS,
+            self._handleEvent)
+
+    def _handleEvent(self, event):
+        # cached policies also hold gif state not covered by product events
+        self._cache.invalidate(event.args['processId'])
+
+        logging.debug('{} for {}, policy cache entry invalidated'.format(
+            event.event,
+            event.args['processId']))
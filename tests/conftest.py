@@ -37,6 +37,8 @@ from scripts.util import (
     get_package,
 )
 
+from scripts.deployment_cache import DeploymentCache
+
 from scripts.instance import (
     GifRegistry,
     GifInstance,
@@ -59,16 +61,33 @@ CONTRACT_CLASS_RISKPOOL = FireRiskpool
 
 INITIAL_ACCOUNT_FUNDING = '1 ether'
 
+# gif instance, token and product are deployed once per session
+DEPLOYMENT_CACHE = DeploymentCache()
+
 
 def get_filled_account(
     accounts,
     account_no,
     funding=INITIAL_ACCOUNT_FUNDING
 ) -> Account:
+    # funded once per session, module fixtures may only change the chain via the cache
+    return DEPLOYMENT_CACHE.get(
+        'account{}'.format(account_no),
+        lambda: fill_account(accounts, account_no, funding))
+
+def fill_account(accounts, account_no, funding) -> Account:
     owner = get_account(ACCOUNTS_MNEMONIC, account_no)
     accounts[account_no].transfer(owner, funding)
     return owner
 
+# replaces brownie's module_isolation, which resets the chain and drops the cached deployments.
+# every module starts and ends with the chain state right after the cached deployments
+@pytest.fixture(scope="module", autouse=True)
+def module_isolation():
+    DEPLOYMENT_CACHE.revert()
+    yield
+    DEPLOYMENT_CACHE.revert()
+
 # fixtures with `yield` execute the code that is placed before the `yield` as setup code
 # and code after `yield` is teardown code. 
 # See https://docs.pytest.org/en/7.1.x/how-to/fixtures.html#yield-fixtures-recommended
@@ -136,10 +155,16 @@ def theOutsider(accounts) -> Account:
 #=== gif instance fixtures ====================================================#
 
 @pytest.fixture(scope="module")
-def registry(instanceOperator) -> GifRegistry: return GifRegistry(instanceOperator, None)
+def registry(instanceOperator) -> GifRegistry:
+    return DEPLOYMENT_CACHE.get(
+        'registry',
+        lambda: GifRegistry(instanceOperator, None))
 
 @pytest.fixture(scope="module")
-def instance(instanceOperator, instanceWallet) -> GifInstance: return GifInstance(instanceOperator, instanceWallet)
+def instance(instanceOperator, instanceWallet) -> GifInstance:
+    return DEPLOYMENT_CACHE.get(
+        'instance',
+        lambda: GifInstance(instanceOperator, instanceWallet))
 
 @pytest.fixture(scope="module")
 def instanceService(instance): return instance.getInstanceService()
@@ -147,7 +172,10 @@ def instanceService(instance): return instance.getInstanceService()
 #=== stable coin fixtures ============================================#
 
 @pytest.fixture(scope="module")
-def token(instanceOperator) -> CONTRACT_CLASS_TOKEN: return CONTRACT_CLASS_TOKEN.deploy({'from': instanceOperator})
+def token(instanceOperator) -> CONTRACT_CLASS_TOKEN:
+    return DEPLOYMENT_CACHE.get(
+        'token',
+        lambda: CONTRACT_CLASS_TOKEN.deploy({'from': instanceOperator}))
 
 #=== fire contracts fixtures ========================================#
 
@@ -161,18 +189,20 @@ def gifProductDeploy(
     riskpoolKeeper: Account, 
     riskpoolWallet: Account
 ) -> GifProductComplete:
-    return GifProductComplete(
-        instance, 
-        CONTRACT_CLASS_PRODUCT,
-        CONTRACT_CLASS_ORACLE,
-        CONTRACT_CLASS_RISKPOOL,
-        productOwner, 
-        oracleProvider, 
-        riskpoolKeeper, 
-        riskpoolWallet,
-        investor,
-        token,
-        name=PRODUCT_BASE_NAME)
+    return DEPLOYMENT_CACHE.get(
+        'gifProductDeploy',
+        lambda: GifProductComplete(
+            instance, 
+            CONTRACT_CLASS_PRODUCT,
+            CONTRACT_CLASS_ORACLE,
+            CONTRACT_CLASS_RISKPOOL,
+            productOwner, 
+            oracleProvider, 
+            riskpoolKeeper, 
+            riskpoolWallet,
+            investor,
+            token,
+            name=PRODUCT_BASE_NAME))
 
 @pytest.fixture(scope="module")
 def gifProduct(gifProductDeploy) -> GifProduct: return gifProductDeploy.getProduct()
@@ -185,3 +215,12 @@ def oracle(gifProduct) -> CONTRACT_CLASS_ORACLE: return gifProduct.getOracle().g
 
 @pytest.fixture(scope="module")
 def riskpool(gifProduct) -> CONTRACT_CLASS_RISKPOOL: return gifProduct.getRiskpool().getContract()
+
+#=== session timing report ==========================================#
+
+def pytest_terminal_summary(terminalreporter):
+    lines = DEPLOYMENT_CACHE.report()
+    if lines:
+        terminalreporter.section('deployment cache')
+        for line in lines:
+            terminalreporter.write_line(line)
@@ -0,0 +1,133 @@
+import brownie
+import pytest
+
+from brownie import history
+
+from scripts.util import s2h
+from scripts.deploy_fire import (
+    create_bundle,
+    create_policy,
+    create_policies,
+    respond_to_requests,
+)
+
+BATCH_SIZE = 3
+OBJECT_VALUE = 10 ** 5
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+def test_apply_for_policies_gas(
+    instance,
+    instanceService,
+    instanceOperator,
+    investor,
+    customer,
+    product,
+    riskpool,
+):
+    create_bundle(
+        instance, 
+        instanceOperator, 
+        riskpool, 
+        investor)
+
+    # single call path
+    gas_single = 0
+    for idx in range(BATCH_SIZE):
+        create_policy(
+            instance, 
+            instanceOperator, 
+            product, 
+            customer, 
+            object_name='Single House {}'.format(idx),
+            object_value=OBJECT_VALUE)
+
+        gas_single += history[-1].gas_used
+
+    # batch call path
+    object_names = ['Batch House {}'.format(idx) for idx in range(BATCH_SIZE)]
+    process_ids = create_policies(
+        instance, 
+        instanceOperator, 
+        product, 
+        customer, 
+        object_names,
+        [OBJECT_VALUE] * BATCH_SIZE)
+
+    gas_batch = history[-1].gas_used
+
+    print('applyForPolicy gas per item: single {} batch {}'.format(
+        gas_single / BATCH_SIZE,
+        gas_batch / BATCH_SIZE))
+
+    assert len(process_ids) == BATCH_SIZE
+    assert product.applications() == 2 * BATCH_SIZE
+    assert gas_batch < gas_single
+
+    for object_name, process_id in zip(object_names, process_ids):
+        assert product.activePolicy(object_name)
+        assert instanceService.getPolicy(process_id).dict()['premiumPaidAmount'] > 0
+
+
+def test_apply_for_policies_length_mismatch(
+    customer,
+    product,
+):
+    with brownie.reverts('ERROR:FI-012:ARRAY_LENGTH_MISMATCH'):
+        product.applyForPolicies(
+            ['House A', 'House B'],
+            [OBJECT_VALUE],
+            {'from': customer})
+
+
+def test_respond_batch_gas(
+    instance,
+    instanceOperator,
+    investor,
+    customer,
+    oracleProvider,
+    product,
+    oracle,
+    riskpool,
+):
+    create_bundle(
+        instance, 
+        instanceOperator, 
+        riskpool, 
+        investor)
+
+    object_names = ['House {}'.format(idx) for idx in range(2 * BATCH_SIZE)]
+    create_policies(
+        instance, 
+        instanceOperator, 
+        product, 
+        customer, 
+        object_names,
+        [OBJECT_VALUE] * len(object_names))
+
+    request_ids = [oracle.requestId(object_name) for object_name in object_names]
+
+    # single call path
+    gas_single = 0
+    for request_id in request_ids[:BATCH_SIZE]:
+        tx = oracle.respond(request_id, s2h('S'), {'from': oracleProvider})
+        gas_single += tx.gas_used
+
+    # batch call path
+    tx = respond_to_requests(
+        oracle,
+        oracleProvider,
+        request_ids[BATCH_SIZE:],
+        ['S'] * BATCH_SIZE)
+
+    gas_batch = tx.gas_used
+
+    print('respond gas per item: single {} batch {}'.format(
+        gas_single / BATCH_SIZE,
+        gas_batch / BATCH_SIZE))
+
+    assert len(tx.events['LogFireOracleCallbackReceived']) == BATCH_SIZE
+    assert gas_batch < gas_single
@@ -0,0 +1,161 @@
+import json
+import os
+import pytest
+
+import scripts.deployment_manifest
+
+from scripts.deployment_manifest import (
+    DEPLOYMENT_MANIFEST_VERSION,
+    check_deployment_manifest,
+    load_addresses,
+    load_deployment_manifest,
+)
+
+CHAIN_ID = 1337
+REGISTRY = '0x' + '01' * 20
+IOS = '0x' + '02' * 20
+TOKEN = '0x' + '03' * 20
+
+
+class FakeChain(object):
+
+    # stands in for brownie's network module
+    def __init__(self, chainId=CHAIN_ID, code=b'\x60\x80'):
+        self.web3 = self
+        self.eth = self
+        self.chain = self
+        self.chain_id = chainId
+        self.code = code
+        self.codeRequests = 0
+
+    @property
+    def id(self):
+        return self.chain_id
+
+    def get_code(self, address):
+        self.codeRequests += 1
+        return self.code
+
+
+class FakeResolver(object):
+
+    registered = {'InstanceOperatorService': IOS}
+
+    def __init__(self, registryAddress):
+        self.registryAddress = registryAddress
+
+    def resolve(self, names):
+        return {name: FakeResolver.registered[name] for name in names}
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = FakeChain()
+    monkeypatch.setattr(scripts.deployment_manifest, 'network', chain)
+    monkeypatch.setattr(scripts.deployment_manifest, 'RegistryResolver', FakeResolver)
+    monkeypatch.setattr(FakeResolver, 'registered', {'InstanceOperatorService': IOS})
+    return chain
+
+
+def manifest(chainId=CHAIN_ID, version=DEPLOYMENT_MANIFEST_VERSION):
+    return {
+        'version': version,
+        'chain_id': chainId,
+        'registry': REGISTRY,
+        'instance_operator': '0x' + '04' * 20,
+        'contracts': {
+            'InstanceOperatorService': {'address': IOS, 'abi_hash': None},
+            'token': {'address': TOKEN, 'abi_hash': None},
+        },
+    }
+
+
+def write(path, content):
+    with open(path, 'w') as f:
+        json.dump(content, f)
+
+    return str(path)
+
+
+def test_manifest_matches_chain(chain):
+    assert check_deployment_manifest(manifest()) is None
+
+
+def test_manifest_of_other_chain(chain):
+    assert 'chain id 1' in check_deployment_manifest(manifest(chainId=1))
+
+    # manifests written before the chain id was recorded
+    legacy = manifest()
+    del legacy['chain_id']
+    assert 'chain id None' in check_deployment_manifest(legacy)
+
+
+def test_manifest_without_registry_code(chain):
+    # ganache restarted with the same chain id
+    chain.code = b''
+    assert 'no registry contract' in check_deployment_manifest(manifest())
+
+
+def test_manifest_with_other_instance_operator_service(chain, monkeypatch):
+    monkeypatch.setattr(FakeResolver, 'registered', {'InstanceOperatorService': '0x' + '05' * 20})
+    assert 'InstanceOperatorService' in check_deployment_manifest(manifest())
+
+
+def test_load_manifest_ignores_stale_manifest(chain, tmp_path):
+    path = write(tmp_path / 'deployment.json', manifest())
+
+    assert load_deployment_manifest(path)['registry'] == REGISTRY
+
+    chain.chain_id = 80001
+    assert load_deployment_manifest(path) is None
+    assert load_deployment_manifest(path, check=False)['registry'] == REGISTRY
+
+
+def test_load_manifest_checks_once_per_chain(chain, tmp_path):
+    path = write(tmp_path / 'deployment.json', manifest())
+
+    for _ in range(3):
+        assert load_deployment_manifest(path)['registry'] == REGISTRY
+
+    assert chain.codeRequests == 1
+
+    chain.chain_id = 80001
+    assert load_deployment_manifest(path) is None
+    assert load_deployment_manifest(path) is None
+    assert chain.codeRequests == 1
+
+    chain.chain_id = CHAIN_ID
+    assert load_deployment_manifest(path)['registry'] == REGISTRY
+    assert chain.codeRequests == 1
+
+
+def test_load_manifest_rereads_modified_file(chain, tmp_path):
+    path = write(tmp_path / 'deployment.json', manifest())
+    assert load_deployment_manifest(path)['contracts']['token']['address'] == TOKEN
+
+    updated = manifest()
+    updated['contracts']['token']['address'] = REGISTRY
+    write(path, updated)
+    os.utime(path, (0, os.path.getmtime(path) + 10))
+
+    assert load_deployment_manifest(path)['contracts']['token']['address'] == REGISTRY
+
+
+def test_load_manifest_version(chain, tmp_path):
+    path = write(tmp_path / 'deployment.json', manifest(version=DEPLOYMENT_MANIFEST_VERSION + 1))
+
+    with pytest.raises(ValueError, match='unsupported deployment manifest version'):
+        load_deployment_manifest(path)
+
+
+def test_load_addresses(chain, tmp_path):
+    path = write(tmp_path / 'deployment.json', manifest())
+    address_file = tmp_path / 'addresses.txt'
+    address_file.write_text('token={}\nregistry={}\n'.format(REGISTRY, TOKEN))
+
+    assert load_addresses(path, str(address_file))['token'] == TOKEN
+
+    # stale manifest, the legacy address file is used
+    chain.chain_id = 80001
+    assert load_addresses(path, str(address_file)) == {'token': REGISTRY, 'registry': TOKEN}
+    assert load_addresses(path, str(tmp_path / 'missing.txt')) == {}
@@ -8,10 +8,18 @@ from scripts.const import (
     INSTANCE_SERVICE_NAME,
 )
 
+from brownie import RegistryBatcher
 from brownie.network.account import Account
 
 from scripts.util import s2b
-from scripts.instance import GifInstance
+from scripts.registry import get_resolver
+from scripts.instance import (
+    GIF_MODULES,
+    GifInstance,
+    GifRegistry,
+    contractAddress,
+    gifModuleLevels,
+)
 
 # enforce function isolation for tests below
 @pytest.fixture(autouse=True)
@@ -37,3 +45,56 @@ def test_instanceservice(
 
     assert instanceService.address == registry.getContract(s2b(INSTANCE_SERVICE_NAME))
     assert instanceService.getInstanceOperator() == instanceOperator
+
+
+def test_registry_deploy_clears_resolver(
+    instanceOperator: Account,
+):
+    # registry proxy is the second contract deployed, after its controller
+    proxyAddress = contractAddress(instanceOperator.address, instanceOperator.nonce + 1)
+
+    # stale addresses of an earlier deployment to the same address (ganache restart)
+    get_resolver(proxyAddress).addresses['Registry'] = instanceOperator.address
+
+    registry = GifRegistry(instanceOperator, None).getRegistry()
+
+    assert registry.address == proxyAddress
+    assert get_resolver(proxyAddress).getAddress('Registry') == proxyAddress
+
+
+def test_gif_module_levels():
+    levels = gifModuleLevels(GIF_MODULES)
+
+    assert levels == [
+        ['Access'],
+        ['Component'],
+        ['Query', 'License', 'Policy', 'ComponentOwnerService'],
+        ['Bundle', 'OracleService'],
+        ['Pool'],
+        ['Treasury'],
+        ['InstanceService', 'RiskpoolService'],
+        ['InstanceOperatorService']]
+
+    # every module only depends on modules of earlier levels
+    level = {moduleName: idx for (idx, names) in enumerate(levels) for moduleName in names}
+    for (moduleName, _, dependencies) in GIF_MODULES:
+        assert all(level[dependency] < level[moduleName] for dependency in dependencies)
+
+
+def test_gif_module_levels_cycle():
+    modules = [('A', 'A', ['B']), ('B', 'B', ['A']), ('C', 'C', [])]
+
+    with pytest.raises(AssertionError, match='cyclic or unknown module dependencies'):
+        gifModuleLevels(modules)
+
+
+def test_contract_address(
+    instanceOperator: Account,
+):
+    sender = '0x6ac7ea33f8831ea9dcc53393aaa88b25a785dbf0'
+    assert contractAddress(sender, 0) == '0xcd234A471b72ba2F1Ccf0A70FCABA648a5eeCD8d'
+    assert contractAddress(sender, 1) == '0x343c43A37D37dfF08AE8C4A11544c718AbB4fCF8'
+
+    # prediction used by the pipelined deployer before a deployment is mined
+    predicted = contractAddress(instanceOperator.address, instanceOperator.nonce)
+    assert RegistryBatcher.deploy({'from': instanceOperator}).address == predicted
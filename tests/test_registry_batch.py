@@ -0,0 +1,194 @@
+import brownie
+import pytest
+import time
+
+import scripts.instance
+
+from brownie import (
+    history,
+    RegistryBatcher,
+)
+
+from scripts.const import ZERO_ADDRESS
+from scripts.util import s2b
+from scripts.instance import (
+    GifInstance,
+    GifRegistry,
+    PipelinedDeployer,
+)
+
+BATCH_SIZE = 5
+
+# enforce function isolation for tests below
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    pass
+
+def test_register_batch_gas(
+    instanceOperator,
+    customer,
+):
+    # bare registry, registrations of a full instance are only accepted from its instance operator service
+    registry = GifRegistry(instanceOperator, None).getRegistry()
+    contracts = registry.contracts()
+
+    # single call path
+    start = time.perf_counter()
+    gas_single = 0
+    for idx in range(BATCH_SIZE):
+        tx = registry.register(s2b('Single{}'.format(idx)), customer, {'from': instanceOperator})
+        gas_single += tx.gas_used
+
+    time_single = time.perf_counter() - start
+
+    # batch call path incl. deployment and instance operator handover
+    start = time.perf_counter()
+    batcher = RegistryBatcher.deploy({'from': instanceOperator})
+    registry.register(s2b('InstanceOperatorService'), batcher, {'from': instanceOperator})
+    gas_handover = history[-1].gas_used
+
+    names = [s2b('Batch{}'.format(idx)) for idx in range(BATCH_SIZE)]
+    tx = batcher.registerBatch(registry, names, [customer] * BATCH_SIZE, {'from': instanceOperator})
+    gas_batch = gas_handover + tx.gas_used
+    time_batch = time.perf_counter() - start
+
+    print('register gas per item: single {} batch {}'.format(
+        gas_single / BATCH_SIZE,
+        gas_batch / BATCH_SIZE))
+    print('register wall time: single {:.3f}s batch {:.3f}s'.format(
+        time_single,
+        time_batch))
+
+    # the batcher hands the new instance operator service name back to the instance operator
+    assert registry.contracts() == contracts + 2 * BATCH_SIZE + 1
+    assert registry.getContract(s2b('InstanceOperatorService')) == instanceOperator
+    assert gas_batch < gas_single
+
+    for name in names:
+        assert registry.getContract(name) == customer
+
+
+def test_register_batch_requires_handover(
+    instanceOperator,
+    customer,
+):
+    registry = GifRegistry(instanceOperator, None).getRegistry()
+    batcher = RegistryBatcher.deploy({'from': instanceOperator})
+
+    with brownie.reverts('ERROR:RB-003:BATCHER_NOT_INSTANCE_OPERATOR'):
+        batcher.registerBatch(registry, [s2b('Batch')], [customer], {'from': instanceOperator})
+
+    registry.register(s2b('InstanceOperatorService'), batcher, {'from': instanceOperator})
+
+    with brownie.reverts('ERROR:RB-001:NOT_OWNER'):
+        batcher.registerBatch(registry, [s2b('Batch')], [customer], {'from': customer})
+
+    with brownie.reverts('ERROR:RB-002:ARRAY_LENGTH_MISMATCH'):
+        batcher.registerBatch(registry, [s2b('Batch')], [], {'from': instanceOperator})
+
+
+def test_pipelined_batch_retried_with_estimated_gas(
+    instanceOperator,
+    customer,
+    monkeypatch,
+):
+    registry = GifRegistry(instanceOperator, None).getRegistry()
+    deployer = PipelinedDeployer(instanceOperator, RegistryBatcher.deploy({'from': instanceOperator}))
+
+    # batch runs out of gas and is sent again once the handover is mined
+    monkeypatch.setattr(scripts.instance, 'BATCHER_REGISTER_GAS', 1000)
+    names = register_batch(deployer, registry, customer)
+    deployer.wait()
+
+    assert deployer.transactions == 2
+    assert registry.getContract(s2b('InstanceOperatorService')) == instanceOperator
+
+    for name in names:
+        assert registry.getContract(name) == customer
+
+
+def test_pipelined_batch_failure_restores_instance_operator(
+    instanceOperator,
+    customer,
+    monkeypatch,
+):
+    registry = GifRegistry(instanceOperator, None).getRegistry()
+    deployer = PipelinedDeployer(instanceOperator, RegistryBatcher.deploy({'from': instanceOperator}))
+
+    def estimate_gas(*args):
+        raise ValueError('execution reverted')
+
+    # batch fails and can not be sent again
+    monkeypatch.setattr(scripts.instance, 'BATCHER_REGISTER_GAS', 1000)
+    monkeypatch.setattr(deployer.batcher.registerBatch, 'estimate_gas', estimate_gas)
+    names = register_batch(deployer, registry, customer)
+
+    with pytest.raises(ValueError, match='registry batch tx'):
+        deployer.wait()
+
+    assert registry.getContract(s2b('InstanceOperatorService')) == instanceOperator
+
+    for name in names:
+        assert registry.getContract(name) == ZERO_ADDRESS
+
+
+def test_deploy_instance_batched_registrations(
+    instanceOperator,
+    instanceWallet,
+):
+    # current path, every controller and proxy registered in its own transaction
+    (time_single, gas_single, txs_single) = deploy_instance(instanceOperator, instanceWallet, False)
+
+    # batched path, one handover and one batch transaction per deployment round
+    (time_batch, gas_batch, txs_batch) = deploy_instance(instanceOperator, instanceWallet, True)
+
+    print('instance deploy: single {} txs {} gas {:.3f}s batch {} txs {} gas {:.3f}s'.format(
+        txs_single, gas_single, time_single,
+        txs_batch, gas_batch, time_batch))
+
+    # batcher deployment and handovers roughly offset the saved base transaction costs
+    assert txs_batch < txs_single
+
+
+def test_deploy_instance_pipelined_wall_time(
+    instanceOperator,
+    instanceWallet,
+):
+    # sequential path, waits for every receipt
+    (time_sequential, _, txs_sequential) = deploy_instance(instanceOperator, instanceWallet, False, pipelined=False)
+
+    # pipelined path, waits once per dependency level
+    (time_pipelined, _, txs_pipelined) = deploy_instance(instanceOperator, instanceWallet, False)
+
+    print('instance deploy wall time: sequential {} txs {:.3f}s pipelined {} txs {:.3f}s'.format(
+        txs_sequential, time_sequential,
+        txs_pipelined, time_pipelined))
+
+    assert time_pipelined < time_sequential
+
+
+def register_batch(deployer, registry, address):
+    names = [s2b('Batch{}'.format(idx)) for idx in range(BATCH_SIZE)]
+    for name in names:
+        deployer.register(registry, name, address)
+
+    return names
+
+
+def deploy_instance(instanceOperator, instanceWallet, batch_registrations, pipelined=True):
+    transactions = len(history)
+    start = time.perf_counter()
+    instance = GifInstance(
+        instanceOperator,
+        instanceWallet,
+        pipelined=pipelined,
+        batch_registrations=batch_registrations)
+    duration = time.perf_counter() - start
+
+    registry = instance.getRegistry()
+    assert registry.contracts() == 32
+    assert registry.getContract(s2b('InstanceOperatorService')) == instance.getInstanceOperatorService()
+    assert instance.getInstanceService().getInstanceOperator() == instanceOperator
+
+    txs = history[transactions:]
+    return (duration, sum([tx.gas_used for tx in txs]), len(txs))
@@ -0,0 +1,120 @@
+import pytest
+
+import scripts.registry
+
+from eth_utils import to_checksum_address
+
+from scripts.registry import (
+    GET_CONTRACT_SELECTOR,
+    SANDBOX_NAMES,
+    ZERO_ADDRESS,
+    RegistryResolver,
+    get_resolver,
+)
+from scripts.util import s2b
+
+REGISTRY = to_checksum_address('0x' + '01' * 20)
+
+
+def address_of(name):
+    return to_checksum_address('0x{:040x}'.format(SANDBOX_NAMES.index(name) + 1000))
+
+
+class FakeRpc(object):
+
+    # answers getContract calls, names in missing are not registered
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.batches = []
+
+    def call(self, calls):
+        self.batches.append(calls)
+        return [self._getContract(call['params'][0]) for call in calls]
+
+    def _getContract(self, tx):
+        assert tx['to'] == REGISTRY
+        assert tx['data'].startswith(GET_CONTRACT_SELECTOR)
+
+        name = next(name for name in SANDBOX_NAMES if s2b(name)[2:] == tx['data'][len(GET_CONTRACT_SELECTOR):])
+        address = ZERO_ADDRESS if name in self.missing else address_of(name)
+        return '0x' + '00' * 12 + address[2:].lower()
+
+
+@pytest.fixture
+def resolvers(monkeypatch):
+    monkeypatch.setattr(scripts.registry, '_resolvers', {})
+    monkeypatch.setattr(scripts.registry.network, 'show_active', lambda: 'development')
+
+
+def test_resolver_batches_sandbox_names():
+    rpc = FakeRpc()
+    resolver = RegistryResolver(REGISTRY, rpc)
+
+    assert resolver.getAddress('InstanceService') == address_of('InstanceService')
+    assert len(rpc.batches) == 1
+    assert len(rpc.batches[0]) == len(SANDBOX_NAMES)
+
+    # all sandbox names are cached after the first lookup
+    assert resolver.resolve() == {name: address_of(name) for name in SANDBOX_NAMES}
+    assert resolver.getAddress('Policy') == address_of('Policy')
+    assert resolver.requests == 1
+
+
+def test_resolver_does_not_cache_unregistered_names():
+    rpc = FakeRpc(missing=['InstanceOperatorService'])
+    resolver = RegistryResolver(REGISTRY, rpc)
+
+    assert resolver.getAddress('InstanceOperatorService') == ZERO_ADDRESS
+
+    # registered later, e.g. while the instance is deployed
+    rpc.missing.clear()
+
+    assert resolver.getAddress('InstanceOperatorService') == address_of('InstanceOperatorService')
+    assert resolver.getAddress('Registry') == address_of('Registry')
+    assert resolver.requests == 2
+    assert len(rpc.batches[1]) == 1
+
+
+def test_resolver_clear():
+    rpc = FakeRpc()
+    resolver = RegistryResolver(REGISTRY, rpc)
+    resolver.resolve()
+    resolver.clear()
+    resolver.resolve(['Registry'])
+
+    assert resolver.requests == 2
+
+
+def test_resolver_default_rpc(monkeypatch):
+    rpc = FakeRpc()
+    monkeypatch.setattr(scripts.registry, 'JsonRpcBatch', lambda: rpc)
+
+    assert RegistryResolver(REGISTRY).getAddress('Registry') == address_of('Registry')
+    assert len(rpc.batches) == 1
+
+
+def test_get_resolver_cache(resolvers):
+    rpc = FakeRpc()
+    resolver = get_resolver(REGISTRY, rpc)
+    resolver.resolve()
+
+    assert get_resolver(REGISTRY.lower()) is resolver
+    assert get_resolver(REGISTRY).addresses == resolver.addresses
+
+
+def test_get_resolver_replaces_rpc(resolvers):
+    resolver = get_resolver(REGISTRY, FakeRpc())
+    rpc = FakeRpc()
+
+    assert get_resolver(REGISTRY, rpc) is resolver
+    assert resolver.rpc is rpc
+
+    # without an rpc argument the last one is kept
+    assert get_resolver(REGISTRY).rpc is rpc
+
+
+def test_get_resolver_per_network(resolvers, monkeypatch):
+    resolver = get_resolver(REGISTRY, FakeRpc())
+    monkeypatch.setattr(scripts.registry.network, 'show_active', lambda: 'ganache')
+
+    assert get_resolver(REGISTRY) is not resolver
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import server.api
+
+from concurrent.futures import Future
+from threading import Event
+
+from server.policy import PolicyApplication
+
+
+class FakeTx(object):
+
+    def __init__(self, processIds):
+        self.processIds = processIds
+
+
+class FakeNode(object):
+
+    # objects named 'Reverted' fail when mined, chunks starting with 'Slow' are sent once release is set
+    def __init__(self):
+        self.release = Event()
+        self.sent = []
+
+    def submitApplications(self, applications):
+        self._wait(applications)
+        self.sent += [[application.object_name] for application in applications]
+        return [self._mine([application]) for application in applications]
+
+    def submitApplicationsBatch(self, applications):
+        self._wait(applications)
+        self.sent.append([application.object_name for application in applications])
+        return self._mine(applications)
+
+    def processIdFromTx(self, tx):
+        (processId,) = tx.processIds
+        return processId
+
+    def processIdsFromTx(self, tx):
+        return tx.processIds
+
+    def _wait(self, applications):
+        if applications[0].object_name.startswith('Slow'):
+            assert self.release.wait(5)
+
+    def _mine(self, applications):
+        pending = Future()
+        if any(application.object_name == 'Reverted' for application in applications):
+            pending.set_exception(ValueError('tx reverted'))
+        else:
+            pending.set_result(FakeTx(['0x{}'.format(application.object_name) for application in applications]))
+
+        return pending
+
+
+def applications(*names):
+    return [PolicyApplication(object_name = name, object_value = 100) for name in names]
+
+
+def stream(node, applications, batched=False):
+    async def collect():
+        return [json.loads(line) async for line in server.api._stream_application_results(applications, batched)]
+
+    return asyncio.run(collect())
+
+
+def test_stream_application_results(monkeypatch):
+    node = FakeNode()
+    monkeypatch.setattr(server.api, 'node', node)
+    monkeypatch.setattr(server.api, 'APPLICATION_CHUNK_SIZE', 2)
+
+    results = stream(node, applications('House', 'Reverted', 'Shed'))
+
+    assert sorted([(result['object_name'], result['process_id'], result['error']) for result in results]) == [
+        ('House', '0xHouse', None),
+        ('Reverted', None, 'tx reverted'),
+        ('Shed', '0xShed', None)]
+    assert node.sent == [['House'], ['Reverted'], ['Shed']]
+
+
+def test_stream_application_results_batched(monkeypatch):
+    node = FakeNode()
+    monkeypatch.setattr(server.api, 'node', node)
+    monkeypatch.setattr(server.api, 'APPLICATION_CHUNK_SIZE', 2)
+
+    results = stream(node, applications('House', 'Shed', 'Barn', 'Reverted'), batched=True)
+    processIds = {result['object_name']: result['process_id'] for result in results}
+
+    # one applyForPolicies transaction per chunk, a failing chunk fails all its applications
+    assert node.sent == [['House', 'Shed'], ['Barn', 'Reverted']]
+    assert processIds == {'House': '0xHouse', 'Shed': '0xShed', 'Barn': None, 'Reverted': None}
+
+
+def test_stream_application_results_before_later_chunks_are_sent(monkeypatch):
+    node = FakeNode()
+    monkeypatch.setattr(server.api, 'node', node)
+    monkeypatch.setattr(server.api, 'APPLICATION_CHUNK_SIZE', 1)
+
+    async def collect():
+        results = server.api._stream_application_results(applications('House', 'Slow'))
+        first = json.loads(await asyncio.wait_for(results.__anext__(), 1))
+
+        # the second chunk is still being sent
+        node.release.set()
+        rest = [json.loads(line) async for line in results]
+        return [first] + rest
+
+    assert [result['object_name'] for result in asyncio.run(collect())] == ['House', 'Slow']
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+
+import server.api
+import server.rpc
+
+from fastapi import HTTPException
+
+from server.async_node import AsyncNode
+from server.cache import PolicyCache
+from server.policy import Policy
+from server.rpc import AsyncBatchRpc, ethCall
+
+PRODUCT = '0x' + '01' * 20
+
+
+def process_id(idx) -> str:
+    return '0x{:064x}'.format(idx)
+
+
+class FakeReader(object):
+
+    # a single eth_call per policy, the result is used as object name
+    def buildCalls(self, processIds):
+        return [ethCall(PRODUCT, processId) for processId in processIds]
+
+    def decodePolicies(self, processIds, results):
+        return [
+            Policy(id = processId, object_name = result)
+            for processId, result in zip(processIds, results)]
+
+
+class FakeNode(object):
+
+    def __init__(self):
+        self.policyCache = PolicyCache()
+        self.policyReader = FakeReader()
+
+
+class FakeAsyncRpc(object):
+
+    def __init__(self):
+        self.batches = []
+
+    async def call(self, calls):
+        self.batches.append(calls)
+        return ['House {}'.format(int(call['params'][0]['data'], 16)) for call in calls]
+
+
+class FakeProvider(object):
+
+    endpoint_uri = 'ws://127.0.0.1:8545'
+
+    def __init__(self):
+        self.requests = []
+
+    def make_request(self, method, params):
+        self.requests.append((method, params))
+        return {'jsonrpc': '2.0', 'id': len(self.requests), 'result': '0x{}'.format(len(self.requests))}
+
+
+class FakeWeb3(object):
+
+    def __init__(self, provider):
+        self.provider = provider
+
+
+def test_async_node_batches_cache_misses():
+    node = FakeNode()
+    rpc = FakeAsyncRpc()
+    asyncNode = AsyncNode(node, rpc)
+    node.policyCache.put(process_id(1), Policy(id = process_id(1), object_name = 'Cached'))
+
+    policies = asyncio.run(asyncNode.getPolicies([process_id(1), process_id(2), process_id(3)]))
+
+    assert [policy.object_name for policy in policies] == ['Cached', 'House 2', 'House 3']
+    assert [len(batch) for batch in rpc.batches] == [2]
+
+    # misses are cached after the first lookup
+    assert asyncio.run(asyncNode.getPolicy(process_id(2))).object_name == 'House 2'
+    assert len(rpc.batches) == 1
+
+
+def test_async_batch_rpc_websocket_provider(monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setattr(server.rpc, 'web3', FakeWeb3(provider))
+    rpc = AsyncBatchRpc()
+
+    results = asyncio.run(rpc.call([ethCall('0x01', '0x'), ethCall('0x02', '0x')]))
+
+    assert results == ['0x1', '0x2']
+    assert [method for (method, _) in provider.requests] == ['eth_call', 'eth_call']
+    assert rpc._session is None
+
+
+def test_get_fire_policy_route(monkeypatch):
+    monkeypatch.setattr(server.api, 'async_node', AsyncNode(FakeNode(), FakeAsyncRpc()))
+
+    assert asyncio.run(server.api.get_fire_policy(process_id(7))).object_name == 'House 7'
+
+
+def test_get_fire_policy_route_not_found(monkeypatch):
+    class MissingPolicies(FakeAsyncRpc):
+
+        async def call(self, calls):
+            raise ValueError('execution reverted')
+
+    monkeypatch.setattr(server.api, 'async_node', AsyncNode(FakeNode(), MissingPolicies()))
+
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(server.api.get_fire_policy(process_id(7)))
+
+    assert e.value.status_code == 404
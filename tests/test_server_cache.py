@@ -0,0 +1,85 @@
+import pytest
+
+import server.cache
+
+from server.cache import PolicyCache, processIdKey
+from server.policy import Policy
+
+PROCESS_ID = '0x' + 'ab' * 32
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.cache, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_cache_lru_eviction():
+    cache = PolicyCache(maxEntries=2)
+
+    cache.put('0x01', Policy(id='0x01'))
+    cache.put('0x02', Policy(id='0x02'))
+
+    # touch 0x01 so 0x02 becomes the least recently used entry
+    assert cache.get('0x01').id == '0x01'
+    cache.put('0x03', Policy(id='0x03'))
+
+    assert len(cache) == 2
+    assert cache.get('0x02') is None
+    assert cache.get('0x01').id == '0x01'
+    assert cache.get('0x03').id == '0x03'
+
+
+def test_cache_ttl_expiry(clock):
+    cache = PolicyCache(ttl=10.0)
+    cache.put(PROCESS_ID, Policy(id=PROCESS_ID))
+
+    clock[0] += 9.0
+    assert cache.get(PROCESS_ID) is not None
+
+    clock[0] += 2.0
+    assert cache.get(PROCESS_ID) is None
+    assert len(cache) == 0
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_block_invalidation():
+    cache = PolicyCache()
+    cache.setBlockNumber(10)
+    cache.put(PROCESS_ID, Policy(id=PROCESS_ID))
+
+    # same block keeps the entries
+    cache.setBlockNumber(10)
+    assert cache.get(PROCESS_ID) is not None
+
+    cache.setBlockNumber(11)
+    assert cache.get(PROCESS_ID) is None
+
+
+def test_cache_block_invalidation_disabled():
+    cache = PolicyCache(invalidateOnNewBlock=False)
+    cache.setBlockNumber(10)
+    cache.put(PROCESS_ID, Policy(id=PROCESS_ID))
+    cache.setBlockNumber(11)
+
+    assert cache.get(PROCESS_ID) is not None
+
+
+def test_cache_drops_reads_older_than_invalidation():
+    cache = PolicyCache()
+    generation = cache.generation
+
+    cache.invalidate(PROCESS_ID)
+    cache.put(PROCESS_ID, Policy(id=PROCESS_ID), generation)
+
+    assert cache.get(PROCESS_ID) is None
+
+
+def test_cache_key_normalization():
+    cache = PolicyCache()
+    cache.put(bytes.fromhex(PROCESS_ID[2:]), Policy(id=PROCESS_ID))
+
+    assert processIdKey(PROCESS_ID.upper().replace('0X', '0x')) == PROCESS_ID
+    assert cache.get(PROCESS_ID.upper().replace('0X', '0x')).id == PROCESS_ID
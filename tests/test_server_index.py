@@ -0,0 +1,72 @@
+from server.index import PolicyIndex
+from server.policy import PolicyState, PolicySummary
+
+
+def summary(idx, state=PolicyState.ACTIVE) -> PolicySummary:
+    return PolicySummary(
+        id = '0x{:064x}'.format(idx),
+        object_name = 'House {}'.format(idx),
+        sum_insured = 100,
+        state = state,
+        created_block = idx)
+
+
+def test_index_pages_in_creation_order():
+    index = PolicyIndex()
+    for idx in range(5):
+        index.add(summary(idx))
+
+    page = index.getPage(1, 2)
+
+    assert page.total == 5
+    assert page.offset == 1
+    assert page.limit == 2
+    assert [item.object_name for item in page.items] == ['House 1', 'House 2']
+    assert len(index.getPage(4, 10).items) == 1
+    assert len(index.getPage(10, 10).items) == 0
+
+
+def test_index_ignores_duplicates():
+    index = PolicyIndex()
+    index.add(summary(1))
+    index.add(summary(1, PolicyState.EXPIRED))
+
+    assert len(index) == 1
+    assert index.getPage(0, 10).items[0].state == PolicyState.ACTIVE
+
+
+def test_index_pages_by_state():
+    index = PolicyIndex()
+    for idx in range(6):
+        index.add(summary(idx))
+
+    for idx in [1, 3, 4]:
+        index.setState('0x{:064x}'.format(idx), PolicyState.EXPIRED)
+
+    index.setState('0x{:064x}'.format(4), PolicyState.CLOSED)
+
+    expired = index.getPage(0, 10, PolicyState.EXPIRED)
+    active = index.getPage(0, 10, PolicyState.ACTIVE)
+    closed = index.getPage(0, 10, PolicyState.CLOSED)
+
+    assert [item.created_block for item in expired.items] == [1, 3]
+    assert [item.created_block for item in active.items] == [0, 2, 5]
+    assert [item.created_block for item in closed.items] == [4]
+    assert index.getPage(1, 1, PolicyState.ACTIVE).items[0].created_block == 2
+    assert index.getPage(0, 10).total == 6
+
+
+def test_index_unknown_process_id():
+    index = PolicyIndex()
+    index.setState('0x01', PolicyState.EXPIRED)
+
+    assert len(index) == 0
+
+
+def test_index_clear():
+    index = PolicyIndex()
+    index.add(summary(1))
+    index.clear()
+
+    assert len(index) == 0
+    assert index.getPage(0, 10, PolicyState.ACTIVE).total == 0
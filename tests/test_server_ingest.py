@@ -0,0 +1,306 @@
+import pytest
+
+import server.ingest
+
+from threading import Event, Thread
+
+from eth_utils import event_abi_to_log_topic
+
+from server.engine import WatcherStrategy
+from server.ingest import LogIngestor
+from server.store import EventStore
+
+CONTRACT = '0x' + '01' * 20
+OTHER = '0x' + '02' * 20
+
+PING_ABI = {
+    'type': 'event',
+    'name': 'Ping',
+    'anonymous': False,
+    'inputs': [{'name': 'id', 'type': 'uint256', 'indexed': False}],
+}
+
+PING_TOPIC = bytes(event_abi_to_log_topic(PING_ABI))
+
+
+class FakeEvent(object):
+
+    def __init__(self, log):
+        self.args = {'id': log['id']}
+        self.blockNumber = log['blockNumber']
+        self.blockHash = log['blockHash']
+
+
+class FakeContractEvent(object):
+
+    def processLog(self, log):
+        return FakeEvent(log)
+
+
+class FakeContract(object):
+
+    def __init__(self, address):
+        self.address = address
+        self.abi = [PING_ABI]
+        self.events = {'Ping': FakeContractEvent}
+
+
+class FakeChain(object):
+
+    # stands in for web3 of the ingestor, blocks are forked by bumping their fork id
+    def __init__(self, head):
+        self.eth = self
+        self.forks = {}
+        self.logs = []
+        self.queries = []
+        self.block_number = head
+
+    def mine(self, blocks):
+        self.block_number += blocks
+
+    def fork(self, fromBlock):
+        for blockNumber in range(fromBlock, self.block_number + 1):
+            self.forks[blockNumber] = self.forks.get(blockNumber, 0) + 1
+
+        self.logs = [log for log in self.logs if log['blockNumber'] < fromBlock]
+
+    def emit(self, blockNumber, id, address=CONTRACT):
+        self.logs.append({
+            'address': address,
+            'topics': [PING_TOPIC],
+            'blockNumber': blockNumber,
+            'id': id})
+
+    def get_block(self, blockNumber):
+        if blockNumber > self.block_number:
+            raise ValueError('block {} not found'.format(blockNumber))
+
+        return {'hash': self._hash(blockNumber)}
+
+    def get_logs(self, query):
+        self.queries.append((query['fromBlock'], query['toBlock']))
+        return [
+            dict(log, blockHash=self._hash(log['blockNumber']))
+            for log in self.logs
+            if query['fromBlock'] <= log['blockNumber'] <= query['toBlock']]
+
+    def toChecksumAddress(self, address):
+        return address
+
+    def _hash(self, blockNumber):
+        return bytes([blockNumber % 256, self.forks.get(blockNumber, 0)]) + bytes(30)
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = FakeChain(head=10)
+    monkeypatch.setattr(server.ingest, 'web3', chain)
+    return chain
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / 'fire_server.db'))
+    yield store
+    store.close()
+
+
+def create_ingestor(store, handled, **kwargs):
+    ingestor = LogIngestor(store, WatcherStrategy.ADAPTIVE_POLLING, **kwargs)
+    ingestor.register(FakeContract(CONTRACT), ['Ping', 'Pong'], lambda event: handled.append(event.args['id']))
+    return ingestor
+
+
+def test_ingest_chunked_backfill(chain, store):
+    handled = []
+    heads = []
+    chain.emit(2, 1)
+    chain.emit(5, 2)
+    chain.emit(9, 3)
+
+    ingestor = create_ingestor(store, handled, chunkSize=4)
+    ingestor.onNewHead(heads.append)
+    events = ingestor._poll()
+
+    assert chain.queries == [(0, 3), (4, 7), (8, 10)]
+    assert handled == [1, 2, 3]
+    assert len(events) == 3
+    assert heads == [10]
+    assert store.getCheckpoint(LogIngestor.NAME) == 10
+    assert store.getCheckpointHash(LogIngestor.NAME) == chain.get_block(10)['hash']
+
+    # nothing new, no getLogs call
+    assert ingestor._poll() == []
+    assert len(chain.queries) == 3
+
+
+def test_ingest_empty_store_from_start_block(chain, store):
+    handled = []
+    chain.emit(2, 1)
+    chain.emit(7, 2)
+
+    create_ingestor(store, handled, startBlock=6)._poll()
+
+    assert chain.queries == [(6, 10)]
+    assert handled == [2]
+
+
+def test_ingest_resumes_from_checkpoint(chain, store):
+    chain.emit(5, 1)
+    create_ingestor(store, [])._poll()
+
+    chain.mine(3)
+    chain.emit(12, 2)
+    handled = []
+    ingestor = create_ingestor(store, handled)
+    ingestor._poll()
+
+    assert chain.queries[-1] == (11, 13)
+    assert handled == [2]
+    assert store.getCheckpoint(LogIngestor.NAME) == 13
+
+
+def test_ingest_waits_for_confirmations(chain, store):
+    handled = []
+    chain.emit(8, 1)
+    chain.emit(9, 2)
+
+    ingestor = create_ingestor(store, handled, confirmations=2)
+    ingestor._poll()
+
+    assert handled == [1]
+    assert store.getCheckpoint(LogIngestor.NAME) == 8
+
+    chain.mine(1)
+    ingestor._poll()
+
+    assert handled == [1, 2]
+
+
+def test_ingest_skips_other_contracts(chain, store):
+    handled = []
+    chain.emit(3, 1, address=OTHER)
+    chain.emit(4, 2)
+
+    create_ingestor(store, handled)._poll()
+
+    assert handled == [2]
+
+
+def test_ingest_rolls_back_reorged_blocks(chain, store):
+    handled = []
+    rollbacks = []
+    chain.emit(5, 1)
+    chain.emit(9, 2)
+
+    ingestor = create_ingestor(store, handled)
+    ingestor.onRollback(rollbacks.append)
+    ingestor._poll()
+
+    # blocks 8 and later replaced by a longer fork with another log
+    chain.fork(8)
+    chain.mine(2)
+    chain.emit(11, 3)
+    ingestor._poll()
+
+    # block 5 is the newest processed block with a known hash
+    assert rollbacks == [6]
+    assert handled == [1, 2, 3]
+    assert chain.queries[-1] == (6, 12)
+    assert store.getCheckpoint(LogIngestor.NAME) == 12
+    assert store.getCheckpointHash(LogIngestor.NAME) == chain.get_block(12)['hash']
+
+
+def test_ingest_reorg_to_shorter_chain(chain, store):
+    rollbacks = []
+    ingestor = create_ingestor(store, [])
+    ingestor.onRollback(rollbacks.append)
+    ingestor._poll()
+
+    # head block 10 orphaned, new chain ends at block 9
+    chain.fork(10)
+    chain.block_number = 9
+    ingestor._poll()
+
+    assert rollbacks == [10]
+    assert store.getCheckpoint(LogIngestor.NAME) == 9
+
+
+def test_ingest_reorg_after_restart(chain, store):
+    create_ingestor(store, [])._poll()
+
+    # checkpoint block orphaned while the server was down
+    chain.fork(10)
+    chain.mine(1)
+    rollbacks = []
+    ingestor = create_ingestor(store, [])
+    ingestor.onRollback(rollbacks.append)
+    ingestor._poll()
+
+    assert rollbacks == [10]
+    assert store.getCheckpoint(LogIngestor.NAME) == 11
+
+
+def test_ingest_idle_poll(chain, store, monkeypatch):
+    heads = []
+    ingestor = create_ingestor(store, [])
+    ingestor.onNewHead(heads.append)
+    ingestor._poll()
+
+    # unchanged head, neither head handlers nor block headers
+    blocks = []
+    monkeypatch.setattr(chain, 'get_block', lambda blockNumber: blocks.append(blockNumber))
+    assert ingestor._poll() == []
+    assert heads == [10]
+    assert blocks == []
+
+
+def test_ingest_retries_failed_poll_on_same_head(chain, store):
+    handled = []
+    chain.emit(5, 1)
+
+    def handle(event):
+        # fails on the first attempt, e.g. a node timeout
+        handled.append(event.args['id'])
+        if len(handled) == 1:
+            raise ValueError('handler failed')
+
+    ingestor = LogIngestor(store, WatcherStrategy.ADAPTIVE_POLLING)
+    ingestor.register(FakeContract(CONTRACT), ['Ping'], handle)
+
+    with pytest.raises(ValueError):
+        ingestor._poll()
+
+    ingestor._poll()
+
+    assert handled == [1, 1]
+    assert store.getCheckpoint(LogIngestor.NAME) == 10
+
+
+def test_ingest_stop_waits_for_running_poll(chain, store, monkeypatch):
+    polling = Event()
+    release = Event()
+    polls = []
+
+    def poll():
+        polls.append(len(polls))
+        polling.set()
+        release.wait()
+        return []
+
+    ingestor = create_ingestor(store, [])
+    monkeypatch.setattr(ingestor._engine, '_poll', poll)
+    ingestor._engine.start()
+    assert polling.wait(1)
+
+    # the store must not be rebound while the poll still writes to it
+    stopper = Thread(target=ingestor.stop)
+    stopper.start()
+    stopper.join(0.2)
+    assert stopper.is_alive()
+
+    release.set()
+    stopper.join(1)
+
+    assert not stopper.is_alive()
+    assert polls == [0]
@@ -0,0 +1,114 @@
+import pytest
+import time
+
+from concurrent.futures import Future
+
+from server.job import JobRegistry, JobState
+
+TX_HASH = '0x' + '11' * 32
+
+
+def mined(tx='0xprocess') -> Future:
+    pending = Future()
+    pending.set_result(tx)
+    return pending
+
+
+def wait_for_jobs(registry):
+    registry._executor.shutdown(wait=True)
+
+
+def wait_for_job(registry, job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while registry.get(job.id).state == JobState.PENDING:
+        assert time.monotonic() < deadline, 'job {} still pending'.format(job.id)
+        time.sleep(0.01)
+
+
+def test_job_succeeded():
+    registry = JobRegistry()
+    job = registry.submit(TX_HASH, mined(), lambda tx: tx)
+    wait_for_job(registry, job)
+
+    job = registry.get(job.id)
+    assert job.state == JobState.SUCCEEDED
+    assert job.tx_hash == TX_HASH
+    assert job.process_id == '0xprocess'
+    assert job.error is None
+
+
+def test_job_failed():
+    pending = Future()
+    pending.set_exception(ValueError('transaction reverted'))
+
+    registry = JobRegistry()
+    job = registry.submit(TX_HASH, pending, lambda tx: tx)
+    wait_for_job(registry, job)
+
+    job = registry.get(job.id)
+    assert job.state == JobState.FAILED
+    assert job.error == 'transaction reverted'
+    assert job.process_id is None
+
+
+def test_job_resolve_failed():
+    def resolve(tx):
+        raise KeyError('LogApplicationCreated')
+
+    registry = JobRegistry()
+    job = registry.submit(TX_HASH, mined(), resolve)
+    wait_for_job(registry, job)
+
+    assert registry.get(job.id).state == JobState.FAILED
+
+
+def test_job_unknown_id():
+    registry = JobRegistry()
+
+    with pytest.raises(ValueError, match='unknown job id'):
+        registry.get('no-such-job')
+
+
+def test_job_eviction():
+    registry = JobRegistry(maxJobs=2)
+    jobs = []
+
+    for idx in range(3):
+        jobs.append(registry.submit(TX_HASH, mined(), lambda tx: tx))
+        wait_for_job(registry, jobs[-1])
+
+    # finished jobs beyond the limit are dropped oldest first
+    latest = registry.submit(TX_HASH, mined(), lambda tx: tx)
+    wait_for_job(registry, latest)
+
+    for job in jobs[:2]:
+        with pytest.raises(ValueError):
+            registry.get(job.id)
+
+    assert registry.get(jobs[2].id).state == JobState.SUCCEEDED
+    assert registry.get(latest.id).state == JobState.SUCCEEDED
+
+
+def test_job_eviction_keeps_pending_jobs():
+    registry = JobRegistry(maxJobs=1)
+    pending = [Future() for _ in range(3)]
+    jobs = [registry.submit(TX_HASH, tx, lambda tx: tx) for tx in pending]
+
+    for job in jobs:
+        assert registry.get(job.id).state == JobState.PENDING
+
+    for tx in pending:
+        tx.set_result('0xprocess')
+
+    wait_for_jobs(registry)
+
+
+def test_job_does_not_block_workers():
+    # more unmined transactions than workers, later jobs still finish
+    registry = JobRegistry(workers=1)
+    waiting = [registry.submit(TX_HASH, Future(), lambda tx: tx) for _ in range(3)]
+    job = registry.submit(TX_HASH, mined(), lambda tx: tx)
+    wait_for_job(registry, job)
+
+    assert registry.get(job.id).state == JobState.SUCCEEDED
+    assert all(registry.get(job.id).state == JobState.PENDING for job in waiting)
@@ -0,0 +1,94 @@
+import rlp
+
+from eth_utils import function_abi_to_4byte_selector, to_checksum_address
+from prometheus_client import REGISTRY
+
+from server.metrics import (
+    ROUTE,
+    _resolve,
+    observeBatch,
+    registerContract,
+    rpcMiddleware,
+)
+
+ORACLE = '0x' + '0a' * 20
+
+RESPOND_ABI = {
+    'type': 'function',
+    'name': 'respond',
+    'inputs': [
+        {'name': 'requestId', 'type': 'uint256'},
+        {'name': 'fireCategory', 'type': 'bytes1'}],
+    'outputs': [],
+}
+
+RESPOND_DATA = bytes(function_abi_to_4byte_selector(RESPOND_ABI)) + bytes(64)
+
+
+def setup_module(module):
+    registerContract('FireOracle', ORACLE, [RESPOND_ABI])
+
+
+def raw_transaction(transactionType=None, to=ORACLE, data=RESPOND_DATA):
+    # unsigned placeholders for v, r, s, only to and data are decoded
+    if transactionType is None:
+        return rlp.encode([0, 1, 21000, bytes.fromhex(to[2:]) if to else b'', 0, data, 27, 1, 1])
+
+    return bytes([transactionType]) + rlp.encode([1337, 0, 1, 2, 21000, bytes.fromhex(to[2:]) if to else b'', 0, data, [], 0, 1, 1])
+
+
+def rpc_calls(route, method):
+    return REGISTRY.get_sample_value('fire_rpc_calls_total', {'route': route, 'method': method}) or 0
+
+
+def test_metrics_resolve_call():
+    params = [{'to': to_checksum_address(ORACLE), 'data': '0x' + RESPOND_DATA.hex()}, 'latest']
+
+    assert _resolve('eth_call', params) == ('FireOracle', 'respond')
+    assert _resolve('eth_estimateGas', [{'to': ORACLE, 'data': RESPOND_DATA}]) == ('FireOracle', 'respond')
+    assert _resolve('eth_call', [{'to': '0x' + '0b' * 20, 'data': RESPOND_DATA}]) == ('', '')
+    assert _resolve('eth_blockNumber', []) == ('', '')
+
+
+def test_metrics_resolve_legacy_raw_transaction():
+    assert _resolve('eth_sendRawTransaction', ['0x' + raw_transaction().hex()]) == ('FireOracle', 'respond')
+
+
+def test_metrics_resolve_typed_raw_transaction():
+    assert _resolve('eth_sendRawTransaction', [raw_transaction(2)]) == ('FireOracle', 'respond')
+
+
+def test_metrics_resolve_invalid_raw_transaction():
+    # contract creation and garbage are not labeled
+    assert _resolve('eth_sendRawTransaction', [raw_transaction(2, to=None)]) == ('', '')
+    assert _resolve('eth_sendRawTransaction', ['0x05ff']) == ('', '')
+    assert _resolve('eth_sendRawTransaction', ['0x']) == ('', '')
+
+
+def test_metrics_rpc_middleware():
+    before = rpc_calls('/requests', 'eth_call')
+    latency = REGISTRY.get_sample_value(
+        'fire_rpc_seconds_count',
+        {'method': 'eth_call', 'contract': 'FireOracle', 'function': 'respond'}) or 0
+
+    middleware = rpcMiddleware(lambda method, params: {'result': '0x'}, None)
+    token = ROUTE.set('/requests')
+    try:
+        assert middleware('eth_call', [{'to': ORACLE, 'data': RESPOND_DATA}, 'latest']) == {'result': '0x'}
+    finally:
+        ROUTE.reset(token)
+
+    assert rpc_calls('/requests', 'eth_call') == before + 1
+    assert REGISTRY.get_sample_value(
+        'fire_rpc_seconds_count',
+        {'method': 'eth_call', 'contract': 'FireOracle', 'function': 'respond'}) == latency + 1
+
+
+def test_metrics_observe_batch():
+    before = rpc_calls('background', 'eth_call')
+    batches = REGISTRY.get_sample_value('fire_rpc_batch_seconds_count') or 0
+
+    observeBatch([{'method': 'eth_call', 'params': [{'to': ORACLE, 'data': RESPOND_DATA}, 'latest']}] * 3, 0.01)
+
+    assert rpc_calls('background', 'eth_call') == before + 3
+    assert REGISTRY.get_sample_value('fire_rpc_batch_seconds_count') == batches + 1
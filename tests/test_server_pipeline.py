@@ -0,0 +1,163 @@
+import pytest
+
+import server.pipeline
+
+from server.pipeline import (
+    STATUS_DROPPED,
+    STATUS_PENDING,
+    STATUS_REVERTED,
+    TransactionPipeline,
+    replacementGasPrice,
+)
+
+SENDER = '0x' + '22' * 20
+
+
+class FakeAccount(object):
+    address = SENDER
+
+
+class FakeTransaction(object):
+
+    def __init__(self, nonce, gas_price=1, status=STATUS_PENDING):
+        self.nonce = nonce
+        self.gas_price = gas_price
+        self.status = status
+        self.txid = '0x{:064x}'.format(nonce * 1000 + gas_price)
+        self.fn_name = 'respond'
+        self.revert_msg = None
+        self.replaced_with = []
+
+    def replace(self, gas_price=None, increment=None):
+        replacement = FakeTransaction(self.nonce, gas_price)
+        self.replaced_with.append(replacement)
+        return replacement
+
+
+class FakeChain(object):
+
+    # stands in for web3 and a contract method of the pipeline
+    def __init__(self, transactionCount=0):
+        self.transactionCount = transactionCount
+        self.sent = []
+        self.eth = self
+
+    def get_transaction_count(self, address, block):
+        return self.transactionCount
+
+    def method(self, *args):
+        params = args[-1]
+        tx = FakeTransaction(params['nonce'])
+        self.sent.append(tx)
+        return tx
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    chain = FakeChain(transactionCount=5)
+    monkeypatch.setattr(server.pipeline, 'web3', chain)
+    # keeps the tracking thread idle, tests drive _track directly
+    monkeypatch.setattr(TransactionPipeline, 'POLLING_INTERVALL', 3600)
+    return chain
+
+
+@pytest.fixture
+def pipeline(chain):
+    pipeline = TransactionPipeline(FakeAccount(), receiptTimeout=0)
+    yield pipeline
+    pipeline.stop()
+
+
+def test_pipeline_nonces(chain, pipeline):
+    pending = [pipeline.submit(chain.method, idx) for idx in range(3)]
+
+    assert [p.nonce for p in pending] == [5, 6, 7]
+    assert pipeline.inFlight == 3
+
+
+def test_pipeline_result(chain, pipeline):
+    pending = pipeline.submit(chain.method)
+    pending.tx.status = 1
+    pipeline._track(pending)
+
+    assert pending.result() is pending.tx
+    assert pipeline.inFlight == 0
+
+
+def test_pipeline_reverted(chain, pipeline):
+    pending = pipeline.submit(chain.method)
+    pending.tx.status = STATUS_REVERTED
+    pipeline._track(pending)
+
+    with pytest.raises(ValueError, match='reverted'):
+        pending.result()
+
+
+def test_pipeline_replacement_gas_price(chain, pipeline):
+    pending = pipeline.submit(chain.method)
+    original = pending.tx
+    pipeline._track(pending)
+
+    # 1 wei gas price is bumped to 2 wei, the increment alone would keep 1 wei
+    assert pending.replacements == 1
+    assert pending.tx is original.replaced_with[0]
+    assert pending.tx.nonce == pending.nonce
+    assert pending.tx.gas_price == 2
+
+    assert replacementGasPrice(1) == 2
+    assert replacementGasPrice(10 ** 9) == int(10 ** 9 * TransactionPipeline.REPLACEMENT_GAS_INCREMENT)
+
+
+def test_pipeline_dropped_is_replaced(chain):
+    pipeline = TransactionPipeline(FakeAccount(), receiptTimeout=3600)
+    pending = pipeline.submit(chain.method)
+    pending.tx.status = STATUS_DROPPED
+    pipeline._track(pending)
+
+    assert pending.replacements == 1
+    pipeline.stop()
+
+
+def test_pipeline_resyncs_nonce_after_giving_up(chain, pipeline):
+    pending = pipeline.submit(chain.method)
+
+    for _ in range(TransactionPipeline.MAX_REPLACEMENTS + 1):
+        pipeline._track(pending)
+
+    with pytest.raises(ValueError, match='not mined after'):
+        pending.result()
+
+    # the node never saw the given up nonce, the next transaction reuses it
+    assert pipeline.submit(chain.method).nonce == 5
+
+
+def test_pipeline_stop_fails_pending(chain, pipeline):
+    pending = pipeline.submit(chain.method)
+    pipeline.stop()
+
+    with pytest.raises(ValueError, match='pipeline for .* stopped'):
+        pending.result()
+
+    # tracking a stopped transaction does not touch it again
+    pending.tx.status = 1
+    pipeline._track(pending)
+
+
+def test_pipeline_result_timeout(chain, pipeline):
+    pending = pipeline.submit(chain.method)
+
+    with pytest.raises(ValueError, match='not mined within'):
+        pending.result(0.01)
+
+
+def test_pipeline_resyncs_on_nonce_error(chain, pipeline):
+    pipeline.submit(chain.method)
+    chain.transactionCount = 9
+
+    def method(*args):
+        if args[-1]['nonce'] != 9:
+            raise ValueError('nonce too low')
+
+        return chain.method(*args)
+
+    assert pipeline.submit(method).nonce == 9
@@ -0,0 +1,124 @@
+import pytest
+
+from server.request_store import RequestStore
+from server.store import EventStore
+
+PRODUCT = '0x' + '01' * 20
+ORACLE = '0x' + '02' * 20
+
+
+class FakeEvent(object):
+
+    def __init__(self, event, args, blockNumber, logIndex=0, address=ORACLE):
+        self.event = event
+        self.args = args
+        self.blockNumber = blockNumber
+        self.transactionIndex = 0
+        self.logIndex = logIndex
+        self.address = address
+
+
+def request_event(requestId, objectName, blockNumber=5):
+    return FakeEvent(
+        'LogFireOracleRequest',
+        {'requestId': requestId, 'objectName': objectName},
+        blockNumber,
+        logIndex=requestId)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / 'fire_server.db'))
+    store.bind(PRODUCT, ORACLE, 1337, 'aa' * 32)
+    yield store
+    store.close()
+
+
+def test_request_store_add_and_respond():
+    requests = RequestStore()
+    request = requests.add(request_event(1, 'House'))
+
+    assert request.response.open
+    assert request.args == {'requestId': 1, 'objectName': 'House'}
+    assert requests.add(request_event(1, 'House')) is None
+    assert 1 in requests
+    assert [r.args['requestId'] for r in requests.openRequests()] == [1]
+
+    requests.setResponded(1, 'M')
+
+    assert 1 not in requests
+    assert len(requests) == 0
+    assert requests.status.responded == 1
+
+
+def test_request_store_expire_by_object_name():
+    requests = RequestStore()
+    requests.add(request_event(1, 'House'))
+    requests.add(request_event(2, 'Shed'))
+    requests.add(request_event(3, 'House'))
+
+    requests.expire('House')
+
+    assert [r.args['requestId'] for r in requests.openRequests()] == [2]
+    assert requests.status.expired == 2
+
+    # unknown objects are ignored
+    requests.expire('Barn')
+    assert len(requests) == 1
+
+
+def test_request_store_spills_oldest_requests():
+    requests = RequestStore(maxOpenRequests=2)
+    for requestId in range(1, 4):
+        requests.add(request_event(requestId, 'House'))
+
+    assert [r.args['requestId'] for r in requests.openRequests()] == [2, 3]
+    assert requests.status.spilled == 1
+    assert requests.status.open_requests == 2
+
+    # the spilled request is no longer linked to its object
+    requests.expire('House')
+    assert requests.status.expired == 2
+
+
+def test_request_store_reads_spilled_requests_from_store(store):
+    requests = RequestStore(store, maxOpenRequests=1)
+    requests.add(request_event(1, 'House'))
+    requests.add(request_event(2, 'Shed'))
+
+    assert len(requests) == 1
+    assert requests.get(1).response.open
+    assert requests.status.store_reads == 1
+
+    requests.setResponded(1, 'L')
+
+    assert requests.get(1).response.fire_category == 'L'
+    assert requests.status.responded == 0
+
+
+def test_request_store_restore(store):
+    requests = RequestStore(store)
+    requests.add(request_event(1, 'House'))
+    requests.add(request_event(2, 'Shed'))
+    requests.setResponded(1, 'S')
+
+    restored = RequestStore(store)
+    restored.restore()
+
+    assert [r.args['requestId'] for r in restored.openRequests()] == [2]
+    assert not restored.get(1).response.open
+
+
+def test_request_store_skips_answered_requests(store):
+    # callback ingested before the request, e.g. after a restart
+    store.addProductEvent(FakeEvent(
+        'LogFireOracleCallbackReceived',
+        {'processId': bytes(32), 'requestId': 1, 'fireCategory': b'L'},
+        6,
+        address=PRODUCT))
+
+    requests = RequestStore(store)
+    request = requests.add(request_event(1, 'House'))
+
+    assert not request.response.open
+    assert len(requests) == 0
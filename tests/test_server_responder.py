@@ -0,0 +1,152 @@
+import json
+import pytest
+
+from concurrent.futures import Future
+
+from server.category import FireCategory
+from server.request import Request, Response
+from server.responder import (
+    DataProvider,
+    FakeDataProvider,
+    FileDataProvider,
+    Responder,
+)
+
+
+class FakeNode(object):
+
+    # answered requests revert, like FireOracle.respond for a closed request
+    def __init__(self, answered=()):
+        self.answered = set(answered)
+        self.batches = []
+        self.singles = []
+        self.responded = []
+
+    def submitResponse(self, requestId, fireCategory):
+        self.singles.append(requestId)
+        return self._mine([requestId])
+
+    def submitResponsesBatch(self, responses):
+        self.batches.append([response.request_id for response in responses])
+        return self._mine([response.request_id for response in responses])
+
+    def setResponded(self, response):
+        self.responded.append(response.request_id)
+
+    def _mine(self, requestIds):
+        pending = Future()
+        if self.answered.intersection(requestIds):
+            pending.set_exception(ValueError('tx reverted'))
+        else:
+            self.answered.update(requestIds)
+            pending.set_result(None)
+
+        return pending
+
+
+class MissingDataProvider(DataProvider):
+
+    def getFireCategory(self, objectName):
+        if objectName == 'Unknown':
+            raise ValueError('no fire category for object {}'.format(objectName))
+
+        return FireCategory.S
+
+
+def oracle_request(requestId, objectName='House'):
+    return Request(
+        log_id = '(5,0,{})'.format(requestId),
+        address = '0x' + '02' * 20,
+        event = 'LogFireOracleRequest',
+        args = {'requestId': requestId, 'objectName': objectName},
+        response = Response(open = True))
+
+
+def respond(responder, requests):
+    # drives a single batch without worker threads
+    for request in requests:
+        responder.submit(request)
+
+    responder._respond(responder._nextBatch())
+
+
+def create_responder(node, provider=None):
+    return Responder(node, provider or MissingDataProvider(), workers=0, batchWait=0.01)
+
+
+def test_responder_batch():
+    node = FakeNode()
+    responder = create_responder(node)
+
+    respond(responder, [oracle_request(1), oracle_request(2), oracle_request(3)])
+
+    assert node.batches == [[1, 2, 3]]
+    assert node.singles == []
+    assert node.responded == [1, 2, 3]
+    assert responder.status.responded == 3
+    assert responder.status.queued == 0
+
+
+def test_responder_single_request():
+    node = FakeNode()
+    responder = create_responder(node)
+
+    respond(responder, [oracle_request(1)])
+
+    assert node.batches == []
+    assert node.singles == [1]
+    assert responder.status.responded == 1
+
+
+def test_responder_retries_failed_batch_per_request():
+    # request 2 was answered by someone else, the batch reverts
+    node = FakeNode(answered=[2])
+    responder = create_responder(node)
+
+    respond(responder, [oracle_request(1), oracle_request(2), oracle_request(3)])
+
+    assert node.batches == [[1, 2, 3]]
+    assert node.singles == [1, 2, 3]
+    assert node.responded == [1, 3]
+    assert responder.status.responded == 2
+    assert responder.status.failed == 1
+    assert responder.status.queued == 0
+
+
+def test_responder_skips_requests_without_data():
+    node = FakeNode()
+    responder = create_responder(node)
+
+    respond(responder, [oracle_request(1, 'Unknown'), oracle_request(2)])
+
+    assert node.singles == [2]
+    assert responder.status.failed == 1
+    assert responder.status.responded == 1
+
+
+def test_responder_ignores_queued_duplicates():
+    node = FakeNode()
+    responder = create_responder(node)
+
+    responder.submit(oracle_request(1))
+    responder.submit(oracle_request(1))
+
+    assert responder.status.queued == 1
+    assert len(responder._nextBatch()) == 1
+
+
+def test_file_data_provider(tmp_path):
+    path = tmp_path / 'categories.json'
+    path.write_text(json.dumps({'House': 'L'}))
+    provider = FileDataProvider(str(path))
+
+    assert provider.getFireCategory('House') == FireCategory.L
+
+    with pytest.raises(ValueError, match='no fire category'):
+        provider.getFireCategory('Shed')
+
+
+def test_fake_data_provider_is_stable():
+    provider = FakeDataProvider()
+
+    assert provider.getFireCategory('House') == provider.getFireCategory('House')
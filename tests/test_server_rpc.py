@@ -0,0 +1,54 @@
+import pytest
+
+from server.rpc import BatchRpc, _results, ethCall
+
+
+class FakeProvider(object):
+
+    def __init__(self):
+        self.requests = []
+
+    def make_request(self, method, params):
+        self.requests.append((method, params))
+        return {'jsonrpc': '2.0', 'id': len(self.requests), 'result': '0x{}'.format(len(self.requests))}
+
+
+def test_results_ordered_by_id():
+    responses = [
+        {'jsonrpc': '2.0', 'id': 1, 'result': '0x1'},
+        {'jsonrpc': '2.0', 'id': 0, 'result': '0x0'},
+    ]
+
+    assert _results(responses) == ['0x0', '0x1']
+
+
+def test_results_error_item():
+    responses = [
+        {'jsonrpc': '2.0', 'id': 0, 'result': '0x0'},
+        {'jsonrpc': '2.0', 'id': 1, 'error': {'code': -32000, 'message': 'execution reverted'}},
+    ]
+
+    with pytest.raises(ValueError, match='execution reverted'):
+        _results(responses)
+
+
+def test_results_batch_level_error():
+    # a rejected batch is answered with a single error object that has no id
+    response = {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'batch too large'}}
+
+    with pytest.raises(ValueError, match='batch too large'):
+        _results(response)
+
+    with pytest.raises(ValueError, match='batch too large'):
+        _results([response])
+
+
+def test_batch_rpc_non_http_fallback():
+    provider = FakeProvider()
+    rpc = BatchRpc(provider)
+
+    results = rpc.call([ethCall('0x01', '0x'), ethCall('0x02', '0x')])
+
+    assert not rpc.batched
+    assert results == ['0x1', '0x2']
+    assert [method for (method, _) in provider.requests] == ['eth_call', 'eth_call']
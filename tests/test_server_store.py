@@ -0,0 +1,166 @@
+import pytest
+
+from server.policy import PolicyState
+from server.store import EventStore
+
+PRODUCT = '0x' + '01' * 20
+ORACLE = '0x' + '02' * 20
+GENESIS = 'aa' * 32
+PROCESS_ID = '0x' + 'ab' * 32
+SUM_INSURED = 10 ** 5 * 10 ** 6
+
+
+class FakeEvent(object):
+
+    def __init__(self, event, args, blockNumber, transactionIndex=0, logIndex=0, address=ORACLE):
+        self.event = event
+        self.args = args
+        self.blockNumber = blockNumber
+        self.transactionIndex = transactionIndex
+        self.logIndex = logIndex
+        self.address = address
+
+
+def request_event(requestId, objectName, blockNumber):
+    return FakeEvent(
+        'LogFireOracleRequest',
+        {'requestId': requestId, 'objectName': objectName},
+        blockNumber)
+
+
+def policy_event(event, blockNumber, **args):
+    return FakeEvent(
+        event,
+        dict(processId=bytes.fromhex(PROCESS_ID[2:]), **args),
+        blockNumber,
+        address=PRODUCT)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / 'fire_server.db'))
+    store.bind(PRODUCT, ORACLE, 1337, GENESIS)
+    yield store
+    store.close()
+
+
+def test_store_bind_keeps_events_on_same_chain(store):
+    store.addOracleRequest(request_event(1, 'House', 5))
+    store.bind(PRODUCT, ORACLE, 1337, GENESIS)
+
+    assert store.getRequest(1) is not None
+
+
+def test_store_bind_resets_on_new_chain(store):
+    # restarted ganache: same chain id and addresses, new genesis block
+    store.addOracleRequest(request_event(1, 'House', 5))
+    store.setCheckpoint('LogIngestor', 5, bytes(32))
+    store.bind(PRODUCT, ORACLE, 1337, 'bb' * 32)
+
+    assert store.getRequest(1) is None
+    assert store.getCheckpoint('LogIngestor') is None
+
+
+def test_store_bind_resets_on_new_chain_id(store):
+    store.addOracleRequest(request_event(1, 'House', 5))
+    store.bind(PRODUCT, ORACLE, 80001, GENESIS)
+
+    assert store.getRequest(1) is None
+
+
+def test_store_checkpoint(store):
+    assert store.getCheckpoint('LogIngestor') is None
+    assert store.getCheckpointHash('LogIngestor') is None
+
+    store.setCheckpoint('LogIngestor', 42, bytes.fromhex('cd' * 32))
+
+    assert store.getCheckpoint('LogIngestor') == 42
+    assert store.getCheckpointHash('LogIngestor') == bytes.fromhex('cd' * 32)
+
+
+def test_store_requests(store):
+    request = store.addOracleRequest(request_event(1, 'House', 5))
+
+    assert request.args == {'requestId': 1, 'objectName': 'House'}
+    assert request.response.open
+    assert store.addOracleRequest(request_event(1, 'House', 5)) is None
+
+    store.setResponded(1, 'M')
+
+    assert not store.getRequest(1).response.open
+    assert store.getRequest(1).response.fire_category == 'M'
+    assert store.getOpenRequests(10) == {}
+
+
+def test_store_callback_before_request(store):
+    store.addProductEvent(policy_event(
+        'LogFireOracleCallbackReceived', 6,
+        requestId=1,
+        fireCategory=b'L'))
+
+    request = store.addOracleRequest(request_event(1, 'House', 5))
+
+    assert not request.response.open
+    assert request.response.fire_category == 'L'
+
+
+def test_store_policies(store):
+    store.addProductEvent(policy_event(
+        'LogFirePolicyCreated', 5,
+        objectName='House',
+        policyHolder='0x' + '03' * 20,
+        sumInsured=SUM_INSURED))
+
+    (policy,) = store.getPolicies()
+    assert policy.id == PROCESS_ID
+    assert policy.state == PolicyState.ACTIVE
+    assert policy.sum_insured == 10 ** 5
+
+    store.addProductEvent(policy_event('LogFirePolicyExpired', 6, objectName='House'))
+    assert store.getPolicies()[0].state == PolicyState.EXPIRED
+
+
+def test_store_fractional_sum_insured(store):
+    # token amounts below a full token unit
+    store.addProductEvent(policy_event(
+        'LogFirePolicyCreated', 5,
+        objectName='House',
+        policyHolder='0x' + '03' * 20,
+        sumInsured=100500))
+
+    assert store.getPolicies()[0].sum_insured == 0.1005
+
+
+def test_store_rollback_across_reorg(store):
+    store.addOracleRequest(request_event(1, 'House', 5))
+    store.addProductEvent(policy_event(
+        'LogFirePolicyCreated', 5,
+        logIndex=1,
+        objectName='House',
+        policyHolder='0x' + '03' * 20,
+        sumInsured=SUM_INSURED))
+    store.addProductEvent(policy_event(
+        'LogFireOracleCallbackReceived', 7,
+        requestId=1,
+        fireCategory=b'S'))
+    store.setResponded(1, 'S')
+    store.addProductEvent(policy_event('LogFirePolicyExpired', 8, objectName='House'))
+    store.addOracleRequest(request_event(2, 'Shed', 8))
+
+    # blocks 7 and later orphaned: callback and expiry are undone
+    store.rollback(7)
+
+    assert store.getRequest(1).response.open
+    assert store.getRequest(2) is None
+    assert store.getPolicies()[0].state == PolicyState.ACTIVE
+    assert list(store.getOpenRequests(10)) == [1]
+
+    # events of the reorged blocks are ingested again
+    store.addProductEvent(policy_event('LogFirePolicyExpired', 7, objectName='House'))
+    assert store.getPolicies()[0].state == PolicyState.EXPIRED
+
+    # blocks 5 and later orphaned: nothing remains
+    store.rollback(5)
+
+    assert store.getRequest(1) is None
+    assert store.getPolicies() == []
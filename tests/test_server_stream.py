@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+
+from server.request import Request
+from server.store import EventStore
+from server.stream import RequestStream, fromCursor, toCursor
+
+PRODUCT = '0x' + '01' * 20
+ORACLE = '0x' + '02' * 20
+
+
+class FakeEvent(object):
+
+    def __init__(self, requestId, blockNumber):
+        self.event = 'LogFireOracleRequest'
+        self.args = {'requestId': requestId, 'objectName': 'House {}'.format(requestId)}
+        self.blockNumber = blockNumber
+        self.transactionIndex = 0
+        self.logIndex = requestId
+        self.address = ORACLE
+
+
+def position(requestId, blockNumber=5):
+    return (blockNumber, 0, requestId)
+
+
+def live_request(requestId) -> Request:
+    return Request(event = 'LogFireOracleRequest', args = {'requestId': requestId})
+
+
+def request_ids(items):
+    return [request.args['requestId'] for (_, request) in items]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / 'fire_server.db'))
+    store.bind(PRODUCT, ORACLE, 1337, 'aa' * 32)
+
+    for requestId in [1, 2, 3]:
+        store.addOracleRequest(FakeEvent(requestId, 5))
+
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def stream(store):
+    stream = RequestStream()
+    stream.setStore(store)
+    return stream
+
+
+def test_cursor():
+    assert toCursor((5, 0, 3)) == '5-0-3'
+    assert fromCursor('5-0-3') == (5, 0, 3)
+
+    with pytest.raises(ValueError, match='invalid cursor'):
+        fromCursor('5-0')
+
+
+def test_stream_replays_after_cursor(stream):
+    async def subscribe():
+        subscription = stream.subscribe(toCursor(position(1)))
+        items = [await subscription.__anext__() for _ in range(2)]
+
+        # then live requests
+        stream.publish(position(1, 6), live_request(4))
+        items.append(await subscription.__anext__())
+
+        await subscription.aclose()
+        return items
+
+    items = asyncio.run(subscribe())
+
+    assert request_ids(items) == [2, 3, 4]
+    assert [cursor for (cursor, _) in items] == ['5-0-2', '5-0-3', '6-0-1']
+    assert stream.subscribers == 0
+
+
+def test_stream_skips_live_requests_already_replayed(stream):
+    async def subscribe():
+        subscription = stream.subscribe(toCursor(position(1)))
+        items = [await subscription.__anext__()]
+
+        # published by the ingestor while the replay was read from the store
+        stream.publish(position(3), live_request(3))
+        stream.publish(position(4), live_request(4))
+        items += [await subscription.__anext__() for _ in range(2)]
+
+        await subscription.aclose()
+        return items
+
+    assert request_ids(asyncio.run(subscribe())) == [2, 3, 4]
+
+
+def test_stream_keepalive(stream, monkeypatch):
+    monkeypatch.setattr(RequestStream, 'KEEPALIVE', 0.01)
+
+    async def subscribe():
+        subscription = stream.subscribe()
+        item = await subscription.__anext__()
+        await subscription.aclose()
+        return item
+
+    assert asyncio.run(subscribe()) == (None, None)
+
+
+def test_stream_closes_slow_subscriber(stream, monkeypatch):
+    monkeypatch.setattr(RequestStream, 'QUEUE_SIZE', 2)
+
+    async def subscribe():
+        subscription = stream.subscribe()
+        first = asyncio.ensure_future(subscription.__anext__())
+        await asyncio.sleep(0)
+        assert stream.subscribers == 1
+
+        for requestId in [1, 2, 3]:
+            stream.publish(position(requestId, 6), live_request(requestId))
+
+        items = [await first]
+        async for item in subscription:
+            items.append(item)
+
+        return items
+
+    # the subscriber resumes from its last cursor after the disconnect
+    assert request_ids(asyncio.run(subscribe())) == [1]
+    assert stream.subscribers == 0
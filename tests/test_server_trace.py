@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import server.trace
+
+from server.trace import (
+    TRACE,
+    FileSpanExporter,
+    Trace,
+    addSpan,
+    finishAfterBody,
+)
+
+
+def test_trace_collects_spans_of_current_request():
+    trace = Trace('GET /policies')
+    addSpan('eth_call', {'rpc.method': 'eth_call'}, 0, 10**6)
+
+    token = TRACE.set(trace)
+    try:
+        addSpan('eth_call', {'rpc.method': 'eth_call'}, 0, 2 * 10**6)
+        addSpan('rpc_batch', {'rpc.method': 'batch', 'rpc.calls': 3}, 0, 10**6)
+    finally:
+        TRACE.reset(token)
+
+    assert trace.rpcCount == 4
+    assert trace.rpcDuration == 3.0
+    assert [span['name'] for span in trace.summary()['spans']] == ['eth_call', 'rpc_batch']
+
+
+def test_trace_otlp():
+    trace = Trace('GET /policies')
+    trace.addSpan('eth_call', {'rpc.method': 'eth_call', 'contract': None}, 1, 2)
+    trace.finish(200)
+
+    (root, span) = trace.otlp()['resourceSpans'][0]['scopeSpans'][0]['spans']
+
+    assert root['spanId'] == span['parentSpanId']
+    assert root['traceId'] == span['traceId'] == trace.traceId
+    assert root['attributes'] == [{'key': 'http.status_code', 'value': {'intValue': '200'}}]
+    assert span['attributes'] == [{'key': 'rpc.method', 'value': {'stringValue': 'eth_call'}}]
+
+
+def test_file_span_exporter(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    exporter = FileSpanExporter(str(path))
+
+    for route in ['GET /policies', 'GET /requests']:
+        trace = Trace(route)
+        trace.finish(200)
+        exporter.export(trace)
+
+    exporter.flush()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+
+    assert [line['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['name'] for line in lines] == ['GET /policies', 'GET /requests']
+
+
+def test_trace_ends_after_streamed_body(tmp_path, monkeypatch):
+    exporter = FileSpanExporter(str(tmp_path / 'traces.jsonl'))
+    monkeypatch.setattr(server.trace, '_exporter', exporter)
+    trace = Trace('POST /policies:batch')
+
+    async def body():
+        yield b'{"index": 0}\n'
+        trace.addSpan('eth_sendRawTransaction', {}, 0, 10**6)
+        yield b'{"index": 1}\n'
+
+    async def stream():
+        chunks = []
+        async for chunk in finishAfterBody(body(), trace, 200):
+            # the trace stays open while the body is streamed
+            assert trace.end is None
+            chunks.append(chunk)
+
+        return chunks
+
+    assert len(asyncio.run(stream())) == 2
+    assert trace.end is not None
+    assert trace.statusCode == 200
+
+    exporter.flush()
+    (line,) = (tmp_path / 'traces.jsonl').read_text().splitlines()
+    assert len(json.loads(line)['resourceSpans'][0]['scopeSpans'][0]['spans']) == 2
+
+
+def test_trace_ends_when_client_disconnects():
+    trace = Trace('GET /requests/stream')
+
+    async def body():
+        while True:
+            yield b': keepalive\n\n'
+
+    async def disconnect():
+        stream = finishAfterBody(body(), trace, 200)
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(disconnect())
+
+    assert trace.end is not None
+
+
+
+def test_file_span_exporter_close(tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    exporter = FileSpanExporter(str(path))
+
+    trace = Trace('GET /policies')
+    trace.finish(200)
+    exporter.export(trace)
+    exporter.close()
+    exporter.flush()
+
+    assert len(path.read_text().splitlines()) == 1